@@ -13,7 +13,9 @@ from auction.models import (
     Deal,
     DealBill,
     Product,
+    ProxyBid,
 )
+from auction.models.product import BID_STATE_FIELDS
 
 
 class UserCreationForm(forms.ModelForm):
@@ -106,13 +108,19 @@ class UserAdmin(BaseUserAdmin):
     filter_horizontal = ()
 
 
+class ProductAdmin(admin.ModelAdmin):
+    # состояние ставок поддерживается при вставке ставок
+    readonly_fields = BID_STATE_FIELDS
+
+
 admin.site.register(Client, UserAdmin)
 admin.site.register(ClientData)
-admin.site.register(Product)
+admin.site.register(Product, ProductAdmin)
 admin.site.register(Bid)
 admin.site.register(Deal)
 admin.site.register(DealBill)
 admin.site.register(Company)
+admin.site.register(ProxyBid)
 
 
 app = apps.get_app_config("graphql_auth")
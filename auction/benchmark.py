@@ -0,0 +1,59 @@
+"""
+Данные нагрузочных тестов аукциона (management команды bench_*)
+
+Все клиенты прогона заводятся с общим префиксом email,
+лоты и остальные данные удаляются каскадом вместе с ними.
+"""
+from decimal import Decimal
+from typing import Any, List, Tuple
+
+from django.contrib.auth.hashers import make_password
+
+from auction.models import Client, Product
+from auction.order_book.order_book_factory import OrderBookFactory
+
+
+def seed_clients(prefix: str, count: int) -> Tuple[Client, List[Client]]:
+    """ продавец и count покупателей """
+    password: str = make_password(None)
+    seller: Client = Client.objects.create(
+        email=f"{prefix}seller@bench.local", password=password
+    )
+    clients: List[Client] = Client.objects.bulk_create(
+        [
+            Client(email=f"{prefix}{index}@bench.local", password=password)
+            for index in range(count)
+        ]
+    )
+
+    return seller, clients
+
+
+def seed_products(
+    name: str, seller: Client, count: int, **fields: Any
+) -> List[Product]:
+    """ count лотов продавца с именами name0, name1... """
+    return Product.objects.bulk_create(
+        [
+            Product(
+                seller=seller,
+                name=f"{name}{index}",
+                description="benchmark lot",
+                start_price=Decimal(1),
+                **fields,
+            )
+            for index in range(count)
+        ]
+    )
+
+
+def cleanup(prefix: str, product_ids: List[int]) -> None:
+    """ закрываем лоты в order book и удаляем клиентов прогона """
+    order_book = OrderBookFactory.get_order_book()
+    if order_book is not None:
+        for product_id in product_ids:
+            order_book.close_lot(product_id)
+        order_book.flush()
+
+    # лоты, ставки, сделки и счета удалятся каскадом
+    Client.objects.filter(email__startswith=prefix).delete()
@@ -0,0 +1,87 @@
+"""
+Кэш чтений товара: карточка и текущая цена
+
+У каждого товара в кэше есть версия, значения лежат вместе с версией,
+при которой их прочитали из базы. Ставка или смена статуса после коммита
+меняет версию, и все закэшированные значения товара сразу устаревают.
+Версию читаем до похода в базу, поэтому значение, прочитанное
+параллельно с изменением, не переживет инвалидацию.
+"""
+from __future__ import annotations
+
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+T = TypeVar("T")
+
+PRODUCT_CACHE_PREFIX: str = "auction:product"
+
+PRODUCT_DETAIL: str = "detail"
+PRODUCT_PRICE: str = "price"
+
+
+def version_key(product_id: int) -> str:
+    return f"{PRODUCT_CACHE_PREFIX}:{product_id}:version"
+
+
+def value_key(product_id: int, kind: str) -> str:
+    return f"{PRODUCT_CACHE_PREFIX}:{product_id}:{kind}"
+
+
+def new_version() -> str:
+    return uuid.uuid4().hex
+
+
+def get_or_load(product_id: int, kind: str, load: Callable[[], T]) -> T:
+    """
+    значение товара из кэша или из load,
+    один поход в кэш на попадание
+    """
+    cached: Dict[str, Any] = cache.get_many(
+        [version_key(product_id), value_key(product_id, kind)]
+    )
+    version: Optional[str] = cached.get(version_key(product_id))
+    entry: Optional[Any] = cached.get(value_key(product_id, kind))
+
+    if version is not None and entry is not None and entry[0] == version:
+        return entry[1]
+
+    # версии тоже истекают: пропавшая версия - просто промах
+    timeout: int = settings.PRODUCT_CACHE_TIMEOUT
+
+    if version is None:
+        version = new_version()
+        if not cache.add(version_key(product_id), version, timeout=timeout):
+            version = cache.get(version_key(product_id))
+
+    value: T = load()
+
+    if version is not None:
+        cache.set(
+            value_key(product_id, kind),
+            (version, value),
+            timeout=timeout,
+        )
+
+    return value
+
+
+def invalidate_products(product_ids: Iterable[int]) -> None:
+    """ сбрасываем кэш товаров после коммита текущей транзакции """
+    versions: List[str] = [
+        version_key(product_id) for product_id in product_ids
+    ]
+
+    if not versions:
+        return
+
+    transaction.on_commit(
+        lambda: cache.set_many(
+            {key: new_version() for key in versions},
+            timeout=settings.PRODUCT_CACHE_TIMEOUT,
+        )
+    )
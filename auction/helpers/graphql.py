@@ -1,28 +1,61 @@
 """
 Методы для вызова из graphql
 """
+import base64
+import binascii
 import functools
+import logging
+from datetime import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as ModelValidationError
 from django.core.paginator import Page, Paginator
-
-from auction.models import Bid, Product
+from django.db import transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Coalesce
+from pydantic import ValidationError
+from rx import Observable
+
+from auction import cache as product_cache
+from auction.metrics import observe_bid
+from auction.models import Bid, Client, Product, ProxyBid
+from auction.models.product import ORDER_BOOK_FIELDS, ProductStatus
+from auction.order_book.order_book import OrderBookResult
+from auction.order_book.order_book_factory import OrderBookFactory
+from auction.pubsub import EVENT_CLOSED, Event, PubSubFactory, publish_price
 from auction.structures.graphql import (
     BidInput,
+    CursorListInput,
     IdInput,
     PageListInput,
     ProductActionInput,
+    ProductFilterInput,
     ProductInput,
+    ProductListOrder,
     ProductUpdateInput,
+    ProxyBidInput,
+    SearchInput,
 )
-from core.errors import CodeError
+from core.errors import CodeError, GenericException
 
 if TYPE_CHECKING:
-    from datetime import datetime
+    from django.db.models import QuerySet
 
-    from django.db.models import Manager
+logger = logging.getLogger(__name__)
 
 
 def catch_product_not_found(func: Callable[..., Any]) -> Callable[..., Any]:
@@ -52,6 +85,7 @@ def create_new_product(product_input: ProductInput) -> Product:
         buy_price=product_input.buy_price,
         start_date=product_input.start_date,
         end_date=product_input.end_date,
+        soft_close=product_input.soft_close,
     )
 
     product.save()
@@ -80,6 +114,14 @@ def update_product(product_update_input: ProductUpdateInput) -> Product:
         setattr(product, key, value)
 
     product.save()
+
+    if product.soft_close:
+        # продления идут через базу, order book о них не знает
+        product.close_in_order_book()
+    elif changes.keys() & set(ORDER_BOOK_FIELDS):
+        # order book принимает ставки по своей копии end_date и start_price
+        product.reopen_in_order_book()
+
     return product
 
 
@@ -107,10 +149,18 @@ def delete_product(product_action_input: ProductActionInput) -> Product:
     return product
 
 
+@observe_bid
 @catch_product_not_found
-def create_bid(bid_input: BidInput) -> Bid:
-    """ Выставление новой ставки по товару """
-    product = Product.objects.get(id=bid_input.product_id)
+def create_bid(bid_input: BidInput, product: Optional[Product] = None) -> Bid:
+    """
+    Выставление новой ставки по товару
+
+    ставка принимается или отклоняется одним условным UPDATE
+    строки товара внутри Bid.save, без предварительного SELECT ставок,
+    product - уже загруженный товар ставки
+    """
+    if product is None:
+        product = Product.objects.get(id=bid_input.product_id)
 
     bid = Bid(
         client=bid_input.client,
@@ -118,31 +168,438 @@ def create_bid(bid_input: BidInput) -> Bid:
         product=product,
     )
 
+    if place_bid_in_order_book(bid):
+        return bid
+
     bid.save()
     bid.post_save()
+
+    # ставка могла перебить автоставки конкурентов, но она уже принята:
+    # ошибка автоставок не должна вернуться клиенту
+    try:
+        ProxyBid.resolve(product)
+    except Exception as e:
+        logger.warning(f"failed proxy bids for {product.id}: {e}")
+
     return bid
 
 
+@catch_product_not_found
+def set_proxy_bid(proxy_bid_input: ProxyBidInput) -> List[Bid]:
+    """
+    Автоставка клиента по активному лоту: новый максимум или его замена
+
+    лот с автоставками уходит из order book, его ставки идут через базу,
+    где их видит движок автоставок. Возвращает видимые ставки торгов.
+    """
+    product: Product = Product.objects.get(id=proxy_bid_input.product_id)
+
+    if product.status != ProductStatus.ACTIVE:
+        raise CodeError.WRONG_STATUS.exception
+
+    product.close_in_order_book()
+    product.refresh_from_db(fields=["current_price", "leading_bid"])
+
+    if not Bid.is_possible_to_place_bid(product, proxy_bid_input.max_price):
+        raise CodeError.ALREADY_HAS_HIGHER_BID.exception
+
+    # без ставок по лоту автоставка ниже стартовой цены никогда не сработает
+    if proxy_bid_input.max_price < product.start_price:
+        raise CodeError.LOWER_THAN_START_PRICE.exception
+
+    # автоставка сохраняется, только если ее удалось разрешить
+    with transaction.atomic():
+        ProxyBid.objects.update_or_create(
+            client=proxy_bid_input.client,
+            product=product,
+            defaults={"max_price": proxy_bid_input.max_price},
+        )
+        product.has_proxy_bids = True
+        bids: List[Bid] = ProxyBid.place_bids(product)
+
+    ProxyBid.post_place_bids(product, bids)
+    return bids
+
+
+class BidResult(NamedTuple):
+    """ результат одной ставки из пакета """
+
+    product_id: Any
+    bid: Optional[Bid] = None
+    error: Optional[GenericException] = None
+
+
+def get_bid_input(client: Client, product_id: Any, price: Any) -> BidInput:
+    try:
+        return BidInput(client=client, price=price, product_id=product_id)
+    except ValidationError:
+        raise CodeError.WRONG_BID_INPUT.exception
+
+
+def create_batch_bid(bid_input: BidInput, products: Dict[int, Product]) -> Bid:
+    """ ставка из пакета по заранее загруженным товарам """
+    product: Optional[Product] = products.get(bid_input.product_id)
+
+    if product is None:
+        raise CodeError.PRODUCT_NOT_FOUND.exception
+
+    try:
+        return create_bid(bid_input, product=product)
+    except ModelValidationError:
+        raise CodeError.WRONG_BID_INPUT.exception
+
+
+def create_bids(
+    client: Client, items: List[Tuple[Any, Any]]
+) -> List[BidResult]:
+    """
+    Пакет ставок клиента: пары (product_id, price)
+
+    каждая ставка принимается или отклоняется независимо от остальных,
+    как отдельный createBid, товары пакета загружаются одним запросом
+    """
+    if len(items) > settings.BIDS_BATCH_MAX_SIZE:
+        raise CodeError.TOO_MANY_BIDS.exception
+
+    bid_inputs: List[Union[BidInput, GenericException]] = []
+    for product_id, price in items:
+        try:
+            bid_inputs.append(get_bid_input(client, product_id, price))
+        except GenericException as e:
+            bid_inputs.append(e)
+
+    products: Dict[int, Product] = Product.objects.in_bulk(
+        {
+            bid_input.product_id
+            for bid_input in bid_inputs
+            if isinstance(bid_input, BidInput)
+        }
+    )
+
+    results: List[BidResult] = []
+    for (product_id, _), bid_input in zip(items, bid_inputs):
+        try:
+            if isinstance(bid_input, GenericException):
+                raise bid_input
+
+            bid: Bid = create_batch_bid(bid_input, products)
+            results.append(BidResult(product_id=product_id, bid=bid))
+        except GenericException as e:
+            results.append(BidResult(product_id=product_id, error=e))
+
+    return results
+
+
+def place_bid_in_order_book(bid: Bid) -> bool:
+    """
+    Ставка через order book, если он включен и лот в нем открыт.
+
+    Ставка записывается в базу отложенно (order_book_flush),
+    поэтому у возвращаемой ставки еще нет id.
+    False - ставку нужно вести обычным путем через базу.
+    """
+    order_book = OrderBookFactory.get_order_book()
+
+    if order_book is None:
+        return False
+
+    result: OrderBookResult = order_book.place_bid(
+        product_id=bid.product.id, client_id=bid.client.id, price=bid.price
+    )
+
+    if result == OrderBookResult.NOT_OPEN:
+        return False
+
+    if result == OrderBookResult.LOWER_PRICE:
+        raise CodeError.ALREADY_HAS_HIGHER_BID.exception
+
+    # в базу ставка попадет позже, а цена в order book уже новая
+    publish_price(bid.product.id, bid.price)
+
+    # покупная цена достигнута, закрываем сделку не дожидаясь записи
+    if bid.product.buy_price is not None and bid.price >= bid.product.buy_price:
+        bid.product.close_in_order_book()
+        bid.post_save()
+
+    return True
+
+
+def filter_products(filters: ProductFilterInput) -> "QuerySet[Product]":
+    """
+    товары по фильтрам листинга
+
+    выборки активных лотов идут по частичным индексам статуса ACTIVE
+    """
+    queryset: QuerySet[Product] = Product.objects.all()
+
+    if filters.status is not None:
+        queryset = queryset.filter(status=filters.status)
+
+    if filters.seller_id is not None:
+        queryset = queryset.filter(seller_id=filters.seller_id)
+
+    if filters.ending_before is not None:
+        queryset = queryset.filter(end_date__lt=filters.ending_before)
+
+    if filters.price_from is not None or filters.price_to is not None:
+        # цена лота - лидирующая ставка или стартовая цена
+        queryset = queryset.annotate(
+            price=Coalesce("current_price", "start_price")
+        )
+
+        if filters.price_from is not None:
+            queryset = queryset.filter(price__gte=filters.price_from)
+
+        if filters.price_to is not None:
+            queryset = queryset.filter(price__lte=filters.price_to)
+
+    return queryset
+
+
 def get_product_list(input: PageListInput) -> Page:
     """
     получаем список продуктов на аукционе
     """
-    products: Manager[Product] = Product.objects.all().order_by("id")
+    products: QuerySet[Product] = filter_products(input.filters).order_by("id")
     paginator: Paginator = Paginator(products, input.page_size)
     return paginator.page(input.page)
 
 
+PRODUCT_CURSOR_PREFIX: str = "product"
+SEARCH_CURSOR_PREFIX: str = "search"
+
+
+def encode_cursor(value: str) -> str:
+    """ непрозрачный курсор """
+    return base64.b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    """ значение непрозрачного курсора """
+    try:
+        return base64.b64decode(cursor.encode(), validate=True).decode()
+    except (binascii.Error, UnicodeError):
+        raise CodeError.WRONG_CURSOR.exception
+
+
+class ProductCursor(NamedTuple):
+    """ позиция товара в листинге по курсору """
+
+    id: int
+    # только для сортировки по end_date
+    end_date: Optional[datetime] = None
+
+
+class ProductKeysetPage(NamedTuple):
+    """ страница товаров по курсору """
+
+    products: List[Product]
+    has_next_page: bool
+    # выборка без курсора и лимита, для totalCount по запросу
+    queryset: "QuerySet[Product]"
+
+
+def encode_product_cursor(
+    product_id: int, end_date: Optional[datetime] = None
+) -> str:
+    """ непрозрачный курсор по id товара (и end_date) """
+    value: str = f"{PRODUCT_CURSOR_PREFIX}:{product_id}"
+
+    if end_date is not None:
+        value = f"{value}:{end_date.isoformat()}"
+
+    return encode_cursor(value)
+
+
+def decode_product_cursor(cursor: str) -> ProductCursor:
+    """ позиция товара из курсора """
+    prefix, _, rest = decode_cursor(cursor).partition(":")
+    product_id, _, end_date = rest.partition(":")
+
+    if prefix != PRODUCT_CURSOR_PREFIX or not product_id.isdigit():
+        raise CodeError.WRONG_CURSOR.exception
+
+    if not end_date:
+        return ProductCursor(id=int(product_id))
+
+    try:
+        return ProductCursor(
+            id=int(product_id), end_date=datetime.fromisoformat(end_date)
+        )
+    except ValueError:
+        raise CodeError.WRONG_CURSOR.exception
+
+
+def get_product_cursor(product: Product, order: ProductListOrder) -> str:
+    """ курсор товара для сортировки листинга """
+    if order == ProductListOrder.END_DATE:
+        return encode_product_cursor(product.id, product.end_date)
+
+    return encode_product_cursor(product.id)
+
+
+def get_product_keyset_page(input: CursorListInput) -> ProductKeysetPage:
+    """
+    получаем страницу продуктов по курсору
+
+    вместо OFFSET ищем по ключу сортировки после курсора,
+    запрашиваем на одну строку больше, чтобы узнать есть ли следующая
+    страница без COUNT(*)
+    """
+    queryset: QuerySet[Product] = filter_products(input.filters)
+
+    if input.order == ProductListOrder.END_DATE:
+        page: QuerySet[Product] = queryset.order_by("end_date", "id")
+    else:
+        page = queryset.order_by("id")
+
+    if input.after is not None:
+        cursor: ProductCursor = decode_product_cursor(input.after)
+
+        if input.order == ProductListOrder.END_DATE:
+            if cursor.end_date is None:
+                raise CodeError.WRONG_CURSOR.exception
+
+            page = page.filter(
+                Q(end_date__gt=cursor.end_date)
+                | Q(end_date=cursor.end_date, id__gt=cursor.id)
+            )
+        else:
+            page = page.filter(id__gt=cursor.id)
+
+    limit: int = input.first + 1
+    products: List[Product] = list(page[:limit])
+
+    return ProductKeysetPage(
+        products=products[: input.first],
+        has_next_page=len(products) > input.first,
+        queryset=queryset,
+    )
+
+
+class SearchCursor(NamedTuple):
+    """ позиция товара в результатах поиска """
+
+    rank: float
+    id: int
+
+
+def encode_search_cursor(rank: float, product_id: int) -> str:
+    """ курсор по рангу и id товара, ранг в repr без потери точности """
+    return encode_cursor(f"{SEARCH_CURSOR_PREFIX}:{rank!r}:{product_id}")
+
+
+def decode_search_cursor(cursor: str) -> SearchCursor:
+    """ позиция в поиске из курсора """
+    prefix, _, rest = decode_cursor(cursor).partition(":")
+    rank, _, product_id = rest.partition(":")
+
+    if prefix != SEARCH_CURSOR_PREFIX or not product_id.isdigit():
+        raise CodeError.WRONG_CURSOR.exception
+
+    try:
+        return SearchCursor(rank=float(rank), id=int(product_id))
+    except ValueError:
+        raise CodeError.WRONG_CURSOR.exception
+
+
+def get_search_cursor(product: Product) -> str:
+    """ курсор товара из результатов search_products """
+    return encode_search_cursor(product.rank, product.id)
+
+
+def search_products(input: SearchInput) -> ProductKeysetPage:
+    """
+    полнотекстовый поиск по name и description
+
+    совпадения ищем по GIN индексу search_vector, сортируем по рангу,
+    страницы по курсору (rank, id)
+    """
+    query = SearchQuery(
+        input.query, config="russian", search_type="websearch"
+    ) | SearchQuery(input.query, config="english", search_type="websearch")
+
+    queryset: QuerySet[Product] = filter_products(input.filters).filter(
+        search_vector=query
+    )
+
+    # float8 вместо real, чтобы ранг из курсора сравнивался точно
+    page: QuerySet[Product] = queryset.annotate(
+        rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    ).order_by("-rank", "id")
+
+    if input.after is not None:
+        cursor: SearchCursor = decode_search_cursor(input.after)
+        page = page.filter(
+            Q(rank__lt=cursor.rank) | Q(rank=cursor.rank, id__gt=cursor.id)
+        )
+
+    limit: int = input.first + 1
+    products: List[Product] = list(page[:limit])
+
+    return ProductKeysetPage(
+        products=products[: input.first],
+        has_next_page=len(products) > input.first,
+        queryset=queryset,
+    )
+
+
 @catch_product_not_found
 def get_product(input: IdInput) -> Product:
     """
-    получаем конкретный продукт
+    получаем конкретный продукт, через кэш
     """
-    return Product.objects.get(id=input.id)
+    return product_cache.get_or_load(
+        input.id,
+        product_cache.PRODUCT_DETAIL,
+        lambda: Product.objects.get(id=input.id),
+    )
 
 
 @catch_product_not_found
 def get_product_price(input: IdInput) -> Decimal:
     """
     получаем цену продукта
+
+    order book знает цену раньше базы, кэш - только для цены из базы
+    """
+    order_book = OrderBookFactory.get_order_book()
+
+    if order_book is not None:
+        price: Optional[Decimal] = order_book.get_price(input.id)
+        if price is not None:
+            return price
+
+    return product_cache.get_or_load(
+        input.id,
+        product_cache.PRODUCT_PRICE,
+        lambda: Product.objects.get(id=input.id).get_final_bid_price(),
+    )
+
+
+def observe_product_events(input: IdInput, event_type: str) -> Observable:
     """
-    return Product.objects.get(id=input.id).get_final_bid_price()
+    события товара для graphql подписки
+
+    поток завершается с закрытием лота,
+    слушатель снимается при отписке клиента
+    """
+    pubsub = PubSubFactory.get_pubsub()
+
+    if pubsub is None:
+        raise CodeError.SUBSCRIPTIONS_DISABLED.exception
+
+    if not Product.objects.filter(id=input.id).exists():
+        raise CodeError.PRODUCT_NOT_FOUND.exception
+
+    def subscribe(observer: Any) -> Callable[[], None]:
+        def listener(event: Event) -> None:
+            if event["type"] == event_type:
+                observer.on_next(event)
+
+            if event["type"] == EVENT_CLOSED:
+                observer.on_completed()
+
+        return pubsub.subscribe([input.id], listener)
+
+    return Observable.create(subscribe)
@@ -0,0 +1,88 @@
+"""
+DataLoader для связей в graphql типах
+
+Загрузчики живут один запрос (info.context), поэтому одинаковые ключи
+внутри запроса читаются из базы один раз, а разные - одной пачкой.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from django.db import models
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from auction.models import Bid, Client, Product
+
+
+class ModelLoader(DataLoader):
+    """ объекты модели по id """
+
+    def __init__(self, model: Type[models.Model]) -> None:
+        super().__init__()
+        self.model = model
+
+    def batch_load_fn(self, keys: Sequence[int]) -> Promise:
+        objects: Dict[int, models.Model] = self.model.objects.in_bulk(keys)
+        return Promise.resolve([objects.get(key) for key in keys])
+
+
+class RelatedListLoader(DataLoader):
+    """ списки объектов модели по значению внешнего ключа """
+
+    def __init__(
+        self,
+        model: Type[models.Model],
+        field: str,
+        ordering: Sequence[str] = ("id",),
+    ) -> None:
+        super().__init__()
+        self.model = model
+        self.field = field
+        self.ordering = ordering
+
+    def batch_load_fn(self, keys: Sequence[int]) -> Promise:
+        attname: str = self.model._meta.get_field(self.field).attname
+        objects: Dict[int, List[models.Model]] = defaultdict(list)
+
+        queryset = self.model.objects.filter(
+            **{f"{attname}__in": keys}
+        ).order_by(attname, *self.ordering)
+
+        for obj in queryset:
+            objects[getattr(obj, attname)].append(obj)
+
+        return Promise.resolve([objects[key] for key in keys])
+
+
+class Loaders:
+    """ набор загрузчиков одного запроса """
+
+    def __init__(self) -> None:
+        self.client = ModelLoader(Client)
+        self.product = ModelLoader(Product)
+        self.bid = ModelLoader(Bid)
+        # ставки лота от лидирующей, по индексу (product, -price)
+        self.product_bids = RelatedListLoader(Bid, "product", ("-price",))
+        self.client_products = RelatedListLoader(Product, "seller")
+        self.client_bids = RelatedListLoader(Bid, "client")
+
+
+def get_loaders(context: Optional[Any]) -> Loaders:
+    """ загрузчики текущего запроса, создаем при первом обращении """
+    if context is None:
+        return Loaders()
+
+    loaders: Optional[Loaders] = getattr(context, "loaders", None)
+
+    if loaders is None:
+        loaders = Loaders()
+        setattr(context, "loaders", loaders)
+
+    return loaders
+
+
+def load_optional(loader: DataLoader, key: Optional[int]) -> Optional[Promise]:
+    """ загрузка по необязательному внешнему ключу """
+    return None if key is None else loader.load(key)
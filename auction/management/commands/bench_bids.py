@@ -0,0 +1,278 @@
+"""
+Нагрузочный тест пути ставки
+
+Заводит клиентов и активные лоты, затем шлет ставки через схему GraphQL
+(createBid) и напрямую через auction.helpers.graphql.create_bid в
+--concurrency потоков. Доля --hot-ratio ставок идет в --hot-products
+горячих лотов, как в волну закрытия. Каждая ставка выше последней
+известной цены лота, поэтому отказы - гонки конкурирующих ставок.
+
+Пишет в базу: без DEBUG запускается только с --force,
+данные прогона удаляются в конце, если не указан --keep.
+"""
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Tuple
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+
+from auction.benchmark import cleanup, seed_clients, seed_products
+from auction.helpers import graphql as graphql_helper
+from auction.models import Client, Product
+from auction.models.product import ProductStatus
+from auction.order_book.order_book_factory import OrderBookFactory
+from auction.structures.graphql import BidInput
+from core.benchmark import (
+    BenchmarkStats,
+    QueryCounter,
+    check_benchmark_allowed,
+    format_summary,
+)
+from core.errors import CodeError, GenericException
+
+MODE_HELPER = "helper"
+MODE_GRAPHQL = "graphql"
+
+ACCEPTED = "accepted"
+REJECTED = "rejected"
+ERROR = "error"
+
+CREATE_BID = """
+mutation createBid($productId: ID!, $price: Decimal!) {
+    createBid(productId: $productId, price: $price) { price pending }
+}
+"""
+
+
+class PlannedBid(NamedTuple):
+    client: Client
+    product_id: int
+    step: Decimal
+
+
+class BidStorm:
+    """ один прогон ставок в одном режиме """
+
+    def __init__(
+        self, mode: str, plan: List[PlannedBid], prices: Dict[int, Decimal]
+    ) -> None:
+        self.mode = mode
+        self.plan = plan
+        self.stats = BenchmarkStats(f"createBid ({mode})")
+        # последняя известная цена лота, общая для прогонов, без блокировки
+        self.prices = prices
+        self.request_factory = RequestFactory()
+
+    def next_price(self, bid: PlannedBid) -> Decimal:
+        return self.prices.get(bid.product_id, Decimal(0)) + bid.step
+
+    def bid_helper(self, bid: PlannedBid, price: Decimal) -> str:
+        try:
+            graphql_helper.create_bid(
+                BidInput(
+                    client=bid.client, price=price, product_id=bid.product_id
+                )
+            )
+        except GenericException as e:
+            if e.message == CodeError.ALREADY_HAS_HIGHER_BID.message:
+                return REJECTED
+            return ERROR
+        return ACCEPTED
+
+    def bid_graphql(self, bid: PlannedBid, price: Decimal) -> str:
+        # импорт здесь: схема тянет все приложения проекта
+        from core.schema import schema
+        from core.views import graphql_backend
+
+        request = self.request_factory.post("/graphql/")
+        request.user = bid.client
+
+        result = schema.execute(
+            CREATE_BID,
+            variable_values={
+                "productId": bid.product_id,
+                "price": str(price),
+            },
+            context_value=request,
+            backend=graphql_backend,
+        )
+
+        if not result.errors:
+            return ACCEPTED
+        if str(result.errors[0]) == CodeError.ALREADY_HAS_HIGHER_BID.message:
+            return REJECTED
+        return ERROR
+
+    def place(self, bid: PlannedBid) -> None:
+        place_bid: Callable[[PlannedBid, Decimal], str] = (
+            self.bid_graphql if self.mode == MODE_GRAPHQL else self.bid_helper
+        )
+        price: Decimal = self.next_price(bid)
+
+        with QueryCounter() as counter:
+            started: float = time.perf_counter()
+            try:
+                outcome: str = place_bid(bid, price)
+            except Exception:
+                outcome = ERROR
+            latency: float = time.perf_counter() - started
+
+        if outcome == ACCEPTED:
+            self.prices[bid.product_id] = max(
+                price, self.prices.get(bid.product_id, price)
+            )
+
+        self.stats.add(latency, outcome, counter.queries, counter.rows_written)
+
+    def work(self, bids: List[PlannedBid]) -> None:
+        try:
+            for bid in bids:
+                self.place(bid)
+        finally:
+            # у каждого потока свое соединение
+            connection.close()
+
+    def run(self, concurrency: int) -> BenchmarkStats:
+        self.stats.start()
+
+        if concurrency == 1:
+            for bid in self.plan:
+                self.place(bid)
+        else:
+            threads: List[threading.Thread] = [
+                threading.Thread(
+                    target=self.work, args=(self.plan[index::concurrency],)
+                )
+                for index in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.stats.stop()
+        return self.stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест ставок: латентность, пропускная способность, отказы"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--products", type=int, default=100)
+        parser.add_argument(
+            "--bids", type=int, default=2000, help="Ставок на каждый режим"
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--hot-products", type=int, default=5)
+        parser.add_argument(
+            "--hot-ratio",
+            type=float,
+            default=0.8,
+            help="Доля ставок в горячие лоты",
+        )
+        parser.add_argument(
+            "--mode",
+            choices=[MODE_HELPER, MODE_GRAPHQL, "both"],
+            default="both",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true")
+        parser.add_argument(
+            "--keep", action="store_true", help="Не удалять данные прогона"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Запуск без DEBUG"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        check_benchmark_allowed(options["force"])
+
+        prefix: str = f"bench-{uuid.uuid4().hex[:8]}-"
+        clients, product_ids = self.seed(
+            prefix, options["clients"], options["products"]
+        )
+        rng = random.Random(options["seed"])
+        # первая ставка по лоту - выше стартовой цены
+        prices: Dict[int, Decimal] = dict(
+            Product.objects.filter(id__in=product_ids).values_list(
+                "id", "start_price"
+            )
+        )
+        modes: List[str] = (
+            [MODE_HELPER, MODE_GRAPHQL]
+            if options["mode"] == "both"
+            else [options["mode"]]
+        )
+
+        try:
+            for mode in modes:
+                plan: List[PlannedBid] = self.plan(
+                    rng,
+                    clients,
+                    product_ids,
+                    bids=options["bids"],
+                    hot_products=options["hot_products"],
+                    hot_ratio=options["hot_ratio"],
+                )
+                stats = BidStorm(mode, plan, prices).run(options["concurrency"])
+                self.stdout.write(
+                    format_summary(stats.summary(), as_json=options["json"])
+                )
+        finally:
+            if not options["keep"]:
+                cleanup(prefix, product_ids)
+
+    def seed(
+        self, prefix: str, clients_count: int, products_count: int
+    ) -> Tuple[List[Client], List[int]]:
+        """ клиенты и активные лоты без покупной цены """
+        seller, clients = seed_clients(prefix, clients_count)
+
+        now = timezone.now()
+        products: List[Product] = seed_products(
+            prefix,
+            seller,
+            products_count,
+            start_date=now,
+            end_date=now + timedelta(days=1),
+            status=ProductStatus.ACTIVE,
+        )
+
+        order_book = OrderBookFactory.get_order_book()
+        if order_book is not None:
+            for product in products:
+                order_book.open_lot(product)
+
+        return clients, [product.id for product in products]
+
+    def plan(
+        self,
+        rng: random.Random,
+        clients: List[Client],
+        product_ids: List[int],
+        bids: int,
+        hot_products: int,
+        hot_ratio: float,
+    ) -> List[PlannedBid]:
+        hot: List[int] = product_ids[: max(hot_products, 1)]
+
+        return [
+            PlannedBid(
+                client=rng.choice(clients),
+                product_id=rng.choice(
+                    hot if rng.random() < hot_ratio else product_ids
+                ),
+                step=Decimal(rng.randint(1, 100)) / 100,
+            )
+            for _ in range(bids)
+        ]
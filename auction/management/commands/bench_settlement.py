@@ -0,0 +1,292 @@
+"""
+Нагрузочный тест закрытия сделок
+
+Заводит --lots активных лотов с истекшим end_date и ставками и закрывает их:
+
+- per-deal: Product.make_a_deal и Deal.async_finalize на каждый лот,
+  дальше задачи deal_finalize (Deal.finalize, Deal.create_bills)
+  и bill_activate (BillStrategy.activate) на каждый счет;
+- bulk: пачками по --batch через Deal.bulk_settle, как close_due_products.
+
+--celery eager выполняет задачи в этом процессе, worker ставит их в брокер
+и ждет активации всех счетов прогона запущенным воркером. Запросы и
+записанные строки считаются только в этом процессе, созданные строки
+считаются по базе после прогона.
+
+Пишет в базу: без DEBUG запускается только с --force,
+данные прогона удаляются в конце, если не указан --keep.
+"""
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.utils import timezone
+
+from auction.benchmark import cleanup, seed_clients, seed_products
+from auction.models import Bid, Client, Deal, DealBill, Product
+from auction.models.product import BID_STATE_FIELDS, ProductStatus
+from billing.meta import BillStatus
+from billing.models import Transaction
+from core.benchmark import (
+    BenchmarkStats,
+    QueryCounter,
+    check_benchmark_allowed,
+    format_summary,
+)
+from core.celery import app
+
+PATH_PER_DEAL = "per-deal"
+PATH_BULK = "bulk"
+
+CELERY_EAGER = "eager"
+CELERY_WORKER = "worker"
+
+SETTLED = "settled"
+ERROR = "error"
+
+# счета сделки: продажа, выручка и комиссия
+BILLS_PER_DEAL = 3
+
+
+class Settlement:
+    """ один прогон закрытия лотов одним путем """
+
+    def __init__(self, path: str, celery: str, products: List[Product]):
+        self.path = path
+        self.celery = celery
+        self.products = products
+        self.stats = BenchmarkStats(f"settlement ({path}, {celery})")
+
+    def settle_deal(self, product: Product) -> None:
+        with QueryCounter() as counter:
+            started: float = time.perf_counter()
+            try:
+                product.close_in_order_book()
+                # make_a_deal сам в транзакции, лишний savepoint исказил бы
+                # число запросов на сделку
+                deal: Deal = product.make_a_deal()
+                # после коммита, задача должна увидеть сделку
+                deal.async_finalize()
+                outcome: str = SETTLED
+            except Exception:
+                outcome = ERROR
+            latency: float = time.perf_counter() - started
+
+        self.stats.add(latency, outcome, counter.queries, counter.rows_written)
+
+    def settle_batch(self, products: List[Product]) -> None:
+        with QueryCounter() as counter:
+            started: float = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    Deal.bulk_settle(products)
+                outcome: str = SETTLED
+            except Exception:
+                outcome = ERROR
+            latency: float = time.perf_counter() - started
+
+        self.stats.add(latency, outcome, counter.queries, counter.rows_written)
+
+    def wait_activated(self, timeout: float) -> None:
+        """ воркер активирует счета асинхронно, ждем все счета прогона """
+        expected: int = len(self.products) * BILLS_PER_DEAL
+        deal_bills = DealBill.objects.filter(
+            deal__product__in=self.products,
+            bill__status=BillStatus.ACTIVATED,
+        )
+        deadline: float = time.perf_counter() + timeout
+
+        while deal_bills.count() < expected:
+            if time.perf_counter() > deadline:
+                raise CommandError(
+                    f"bills were not activated in {timeout}s, is worker running?"
+                )
+            time.sleep(0.2)
+
+    def run(self, batch: int, timeout: float) -> BenchmarkStats:
+        self.stats.start()
+
+        if self.path == PATH_BULK:
+            for start in range(0, len(self.products), batch):
+                end: int = start + batch
+                self.settle_batch(self.products[start:end])
+        else:
+            for product in self.products:
+                self.settle_deal(product)
+
+            if self.celery == CELERY_WORKER:
+                self.wait_activated(timeout)
+
+        self.stats.stop()
+        return self.stats
+
+    def summary(self) -> Dict[str, Any]:
+        """ сводка прогона и строки, созданные закрытием, на одну сделку """
+        summary: Dict[str, Any] = self.stats.summary()
+        deals = Deal.objects.filter(product__in=self.products)
+        created: Dict[str, int] = {
+            "deals": deals.count(),
+            "bills": DealBill.objects.filter(deal__in=deals).count(),
+            "transactions": Transaction.objects.filter(
+                bill__deal__in=deals
+            ).count(),
+        }
+        count: int = created["deals"]
+
+        summary.update(
+            {
+                "rows_created": created,
+                "wall_time_per_deal_ms": round(
+                    self.stats.wall_time / count * 1000, 2
+                )
+                if count
+                else 0.0,
+                "queries_per_deal": round(self.stats.queries / count, 2)
+                if count
+                else 0.0,
+                "rows_written_per_deal": round(
+                    self.stats.rows_written / count, 2
+                )
+                if count
+                else 0.0,
+            }
+        )
+        return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный тест закрытия сделок: от make_a_deal до активации счетов"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--lots", type=int, default=2000, help="Лотов на каждый путь"
+        )
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--bids-per-lot", type=int, default=3)
+        parser.add_argument(
+            "--path",
+            choices=[PATH_PER_DEAL, PATH_BULK, "both"],
+            default="both",
+        )
+        parser.add_argument(
+            "--celery",
+            choices=[CELERY_EAGER, CELERY_WORKER],
+            default=CELERY_EAGER,
+            help="Задачи в этом процессе или через брокер и воркер",
+        )
+        parser.add_argument(
+            "--batch", type=int, default=settings.AUCTION_CLOSER_BATCH
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=600.0,
+            help="Ожидание воркера, секунды",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true")
+        parser.add_argument(
+            "--keep", action="store_true", help="Не удалять данные прогона"
+        )
+        parser.add_argument(
+            "--force", action="store_true", help="Запуск без DEBUG"
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        check_benchmark_allowed(options["force"])
+
+        prefix: str = f"bench-{uuid.uuid4().hex[:8]}-"
+        seller, clients = seed_clients(prefix, options["clients"])
+        rng = random.Random(options["seed"])
+        paths: List[str] = (
+            [PATH_PER_DEAL, PATH_BULK]
+            if options["path"] == "both"
+            else [options["path"]]
+        )
+        product_ids: List[int] = []
+        always_eager: bool = app.conf.task_always_eager
+        eager_propagates: bool = app.conf.task_eager_propagates
+
+        try:
+            app.conf.task_always_eager = options["celery"] == CELERY_EAGER
+            app.conf.task_eager_propagates = True
+
+            for path in paths:
+                products: List[Product] = self.seed(
+                    rng,
+                    f"{prefix}{path}-",
+                    seller,
+                    clients,
+                    lots=options["lots"],
+                    bids_per_lot=options["bids_per_lot"],
+                )
+                product_ids.extend(product.id for product in products)
+
+                settlement = Settlement(path, options["celery"], products)
+                settlement.run(options["batch"], options["timeout"])
+                self.stdout.write(
+                    format_summary(
+                        settlement.summary(), as_json=options["json"]
+                    )
+                )
+        finally:
+            app.conf.task_always_eager = always_eager
+            app.conf.task_eager_propagates = eager_propagates
+
+            if not options["keep"]:
+                cleanup(prefix, product_ids)
+
+    def seed(
+        self,
+        rng: random.Random,
+        name: str,
+        seller: Client,
+        clients: List[Client],
+        lots: int,
+        bids_per_lot: int,
+    ) -> List[Product]:
+        """ активные лоты с истекшим временем и ставками """
+        now = timezone.now()
+        products: List[Product] = seed_products(
+            name,
+            seller,
+            lots,
+            start_date=now - timedelta(days=1),
+            end_date=now - timedelta(minutes=1),
+            status=ProductStatus.ACTIVE,
+        )
+
+        bids: List[Bid] = Bid.objects.bulk_create(
+            [
+                Bid(
+                    client=rng.choice(clients),
+                    product=product,
+                    price=Decimal(1 + step),
+                )
+                for product in products
+                for step in range(max(bids_per_lot, 1))
+            ]
+        )
+
+        # последняя ставка лота - лидирующая
+        for bid in bids:
+            bid.product.current_price = bid.price
+            bid.product.leading_bid = bid
+            bid.product.bid_count += 1
+        Product.objects.bulk_update(products, BID_STATE_FIELDS)
+
+        return list(
+            Product.objects.select_related(
+                "seller__company", "leading_bid__client__company"
+            )
+            .filter(id__in=[product.id for product in products])
+            .order_by("id")
+        )
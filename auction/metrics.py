@@ -0,0 +1,79 @@
+"""
+Метрики аукциона: ставки, сделки и открытые лоты (см. core.metrics)
+"""
+import functools
+import time
+from datetime import datetime
+from typing import Any, Callable
+
+from django.apps import apps
+
+from core.errors import CodeError, GenericException
+from core.metrics import LAG_BUCKETS, CachedGauge, Counter, Histogram
+
+BID_ACCEPTED = "accepted"
+BID_REJECTED = "rejected"
+
+BIDS = Counter(
+    "auction_bids_total",
+    "Ставки по исходу и коду ошибки CodeError",
+    ("outcome", "code"),
+)
+BID_LATENCY = Histogram(
+    "auction_bid_latency_seconds", "Время выставления ставки"
+)
+DEALS = Counter("auction_deals_total", "Созданные сделки", ("path",))
+SETTLEMENT_LAG = Histogram(
+    "auction_settlement_lag_seconds",
+    "От окончания лота до создания сделки",
+    buckets=LAG_BUCKETS,
+)
+
+
+def count_active_lots() -> float:
+    # модели импортируют этот модуль
+    from auction.models.product import ProductStatus
+
+    product_model = apps.get_model("auction", "Product")
+    return product_model.objects.filter(status=ProductStatus.ACTIVE).count()
+
+
+# COUNT по таблице товаров считает refresh_metrics, а не каждый scrape
+ACTIVE_LOTS = CachedGauge(
+    "auction_active_lots", "Открытые лоты в статусе ACTIVE", count_active_lots
+)
+
+
+def observe_bid(func: Callable[..., Any]) -> Callable[..., Any]:
+    """ исход и время ставки, отказы по коду ошибки """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started: float = time.perf_counter()
+        try:
+            bid: Any = func(*args, **kwargs)
+        except GenericException as e:
+            code: str = (e.extensions or {}).get(
+                "code", CodeError.UNEXPECTED_ERROR.code
+            )
+            BIDS.labels(BID_REJECTED, code).inc()
+            raise
+        except Exception:
+            BIDS.labels(BID_REJECTED, CodeError.UNEXPECTED_ERROR.code).inc()
+            raise
+        finally:
+            BID_LATENCY.observe(time.perf_counter() - started)
+
+        BIDS.labels(BID_ACCEPTED, "").inc()
+        return bid
+
+    return wrapper
+
+
+def observe_deal(path: str, end_date: datetime, created: datetime) -> None:
+    """ сделка закрытия лота, по покупной цене лот закрывается до end_date """
+    DEALS.labels(path).inc()
+
+    lag: float = (created - end_date).total_seconds()
+    if lag >= 0:
+        SETTLEMENT_LAG.observe(lag)
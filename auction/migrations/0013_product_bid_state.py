@@ -0,0 +1,63 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# заполняем состояние ставок по уже существующим ставкам
+FILL_BID_STATE = """
+UPDATE auction_product AS product
+SET current_price = top.price,
+    leading_bid_id = top.bid_id,
+    bid_count = top.bid_count
+FROM (
+    SELECT DISTINCT ON (product_id)
+        product_id,
+        id AS bid_id,
+        price,
+        count(*) OVER (PARTITION BY product_id) AS bid_count
+    FROM auction_bid
+    ORDER BY product_id, price DESC
+) AS top
+WHERE product.id = top.product_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0012_auto_20210302_1412'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='bid_count',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Количество ставок'
+            ),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='current_price',
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=2,
+                max_digits=19,
+                null=True,
+                verbose_name='Текущая цена',
+            ),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='leading_bid',
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='+',
+                to='auction.bid',
+                verbose_name='Лидирующая ставка',
+            ),
+        ),
+        migrations.RunSQL(FILL_BID_STATE, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # индекс строим без блокировки записи в таблицу ставок
+    atomic = False
+
+    dependencies = [
+        ('auction', '0013_product_bid_state'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='bid',
+            index=models.Index(
+                fields=['product', '-price'],
+                name='auction_bid_product_b39cc1_idx',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='bid',
+            name='product',
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to='auction.product',
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name='bid',
+            name='auction_bid_price_9fa9b5_idx',
+        ),
+    ]
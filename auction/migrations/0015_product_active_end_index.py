@@ -0,0 +1,24 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:16
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('auction', '0014_bid_product_price_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(
+                condition=models.Q(status='active'),
+                fields=['end_date'],
+                name='auction_product_active_end_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:31
+
+from django.contrib.postgres.operations import (
+    AddIndexConcurrently,
+    RemoveIndexConcurrently,
+)
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # индексы строим и удаляем без блокировки записи в таблицу товаров
+    atomic = False
+
+    dependencies = [
+        ('auction', '0015_product_active_end_index'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(
+                condition=models.Q(status='active'),
+                fields=['end_date', 'id'],
+                name='auction_prod_active_end_id_idx',
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(
+                condition=models.Q(status='active'),
+                fields=['id'],
+                name='auction_product_active_id_idx',
+            ),
+        ),
+        RemoveIndexConcurrently(
+            model_name='product',
+            name='auction_product_active_end_idx',
+        ),
+    ]
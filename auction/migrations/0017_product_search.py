@@ -0,0 +1,71 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:33
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+# name весит больше description, стемминг и русский и английский
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION auction_product_search_vector(
+    name text, description text
+) RETURNS tsvector AS $$
+    SELECT
+        setweight(to_tsvector('pg_catalog.russian', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.russian', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(description, '')), 'B')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION auction_product_search_vector_update()
+RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := auction_product_search_vector(NEW.name, NEW.description);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER auction_product_search_vector_trigger
+BEFORE INSERT OR UPDATE OF name, description ON auction_product
+FOR EACH ROW EXECUTE FUNCTION auction_product_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS auction_product_search_vector_trigger ON auction_product;
+DROP FUNCTION IF EXISTS auction_product_search_vector_update();
+DROP FUNCTION IF EXISTS auction_product_search_vector(text, text);
+"""
+
+BACKFILL_SEARCH_VECTOR_SQL = """
+UPDATE auction_product
+SET search_vector = auction_product_search_vector(name, description)
+WHERE search_vector IS NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    # GIN индекс строим без блокировки записи в таблицу товаров
+    atomic = False
+
+    dependencies = [
+        ('auction', '0016_product_active_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, DROP_SEARCH_VECTOR_SQL),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR_SQL, migrations.RunSQL.noop),
+        AddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=['search_vector'], name='auction_product_search_idx'
+            ),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 3.1.6 on 2026-10-18 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0017_product_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProxyBid',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'max_price',
+                    models.DecimalField(decimal_places=2, max_digits=19),
+                ),
+                ('cdate', models.DateTimeField(auto_now_add=True)),
+                ('mdate', models.DateTimeField(auto_now=True)),
+                (
+                    'client',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    'product',
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='auction.product',
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='proxybid',
+            index=models.Index(
+                fields=['product', '-max_price'],
+                name='auction_pro_product_015490_idx',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='proxybid',
+            constraint=models.UniqueConstraint(
+                fields=('client', 'product'), name='unique_proxy_bid'
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.1.6 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0018_proxy_bid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='soft_close',
+            field=models.BooleanField(
+                default=False, verbose_name='Мягкое закрытие'
+            ),
+        ),
+    ]
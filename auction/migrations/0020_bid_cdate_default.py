@@ -0,0 +1,19 @@
+# Generated by Django 3.1.6 on 2026-10-18 13:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0019_product_soft_close'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bid',
+            name='cdate',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.6 on 2026-10-18 13:34
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # индекс строим без блокировки записи в таблицу товаров
+    atomic = False
+
+    dependencies = [
+        ('auction', '0020_bid_cdate_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='deal_attempts',
+            field=models.PositiveIntegerField(
+                default=0, verbose_name='Попыток закрытия'
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(
+                condition=models.Q(
+                    ('leading_bid__isnull', False), ('status', 'active')
+                ),
+                fields=['deal_attempts', 'end_date'],
+                name='auction_prod_due_end_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.1.6 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+FILL_HAS_PROXY_BIDS = """
+UPDATE auction_product AS product
+SET has_proxy_bids = true
+WHERE EXISTS (
+    SELECT 1 FROM auction_proxybid AS proxy
+    WHERE proxy.product_id = product.id
+)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auction', '0021_product_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='has_proxy_bids',
+            field=models.BooleanField(
+                default=False, verbose_name='Есть автоставки'
+            ),
+        ),
+        migrations.RunSQL(FILL_HAS_PROXY_BIDS, migrations.RunSQL.noop),
+    ]
@@ -5,3 +5,4 @@ from .company import Company as Company  # noqa
 from .deal import Deal as Deal  # noqa
 from .deal import DealBill as DealBill  # noqa
 from .product import Product as Product  # noqa
+from .proxy_bid import ProxyBid as ProxyBid  # noqa
@@ -1,13 +1,20 @@
+from __future__ import annotations
+
 import logging
 from decimal import Decimal
-from typing import Iterable, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
 
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
+from auction.cache import invalidate_products
 from auction.models.client import Client
 from auction.models.product import Product
 from core.errors import CodeError
 
+if TYPE_CHECKING:
+    from auction.order_book.order_book import PendingBid
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,8 +29,13 @@ class Bid(models.Model):
     client = models.ForeignKey(
         Client, on_delete=models.CASCADE, blank=False, null=False
     )
+    # отдельный индекс по product_id не нужен, его покрывает составной индекс
     product = models.ForeignKey(
-        Product, on_delete=models.CASCADE, blank=False, null=False
+        Product,
+        on_delete=models.CASCADE,
+        blank=False,
+        null=False,
+        db_index=False,
     )
     status = models.CharField(
         choices=BidStatus.choices,
@@ -31,11 +43,13 @@ class Bid(models.Model):
         max_length=32,
     )
     price = models.DecimalField(max_digits=19, decimal_places=2)
-    cdate = models.DateTimeField(auto_now=False, auto_now_add=True)
+    # не auto_now_add: ставки из order book пишутся со временем приема
+    cdate = models.DateTimeField(default=timezone.now)
     mdate = models.DateTimeField(auto_now=True, auto_now_add=False)
 
     class Meta:
-        indexes = [models.Index(fields=["price"])]
+        # все горячие запросы по ставкам: ставки товара по убыванию цены
+        indexes = [models.Index(fields=["product", "-price"])]
 
     def __str__(self) -> str:
         return f"{self.product.name}: {self.price}"
@@ -43,12 +57,55 @@ class Bid(models.Model):
     @classmethod
     def is_possible_to_place_bid(cls, product: Product, price: Decimal) -> bool:
         """ Проверки возможности установки ставки перед сохранением """
+        return product.current_price is None or price > product.current_price
 
-        where = models.Q(product=product, price__gte=price)
-
-        bid = cls.objects.filter(where).first()
-
-        return bid is None
+    @classmethod
+    def persist_pending(cls, pending_bids: List[PendingBid]) -> List[Bid]:
+        """
+        Записываем ставки, принятые в order book.
+
+        Время ставки - время приема в order book, а не записи.
+        Порядок ставок уже проверен order book,
+        поэтому вставляем их пачкой в обход Bid.save
+        и одним UPDATE на товар двигаем состояние ставок.
+        """
+        bids: List[Bid] = cls.objects.bulk_create(
+            [
+                cls(
+                    client_id=pending_bid.client_id,
+                    product_id=pending_bid.product_id,
+                    price=pending_bid.price,
+                    cdate=pending_bid.cdate,
+                )
+                for pending_bid in pending_bids
+            ]
+        )
+
+        bids_by_product: Dict[int, List[Bid]] = {}
+        for bid in bids:
+            bids_by_product.setdefault(bid.product_id, []).append(bid)
+
+        for product_id, product_bids in bids_by_product.items():
+            top_bid: Bid = max(product_bids, key=lambda bid: bid.price)
+            higher = models.Q(current_price__isnull=True) | models.Q(
+                current_price__lt=top_bid.price
+            )
+
+            Product.objects.filter(id=product_id).update(
+                current_price=models.Case(
+                    models.When(higher, then=models.Value(top_bid.price)),
+                    default=models.F("current_price"),
+                ),
+                leading_bid=models.Case(
+                    models.When(higher, then=models.Value(top_bid.id)),
+                    default=models.F("leading_bid"),
+                ),
+                bid_count=models.F("bid_count") + len(product_bids),
+            )
+
+        invalidate_products(bids_by_product)
+
+        return bids
 
     def clean(self) -> None:
         super().clean()
@@ -64,9 +121,23 @@ class Bid(models.Model):
         using: Optional[str] = None,
         update_fields: Optional[Iterable[str]] = None,
     ) -> None:
-        """ проверки перед сохранением ставки """
-        self.full_clean()
-        return super().save(force_insert, force_update, using, update_fields)
+        """
+        проверки перед сохранением ставки
+
+        clean отсекает заведомо низкие ставки по уже загруженному товару,
+        окончательное решение принимает Product.register_bid,
+        при отказе вставка ставки откатывается.
+        """
+        # внешние ключи проверит база, не тратим на них запросы
+        self.full_clean(exclude=["client", "product"])
+
+        adding: bool = self._state.adding
+
+        with transaction.atomic(using=using):
+            super().save(force_insert, force_update, using, update_fields)
+
+            if adding and not self.product.register_bid(self):
+                raise self.product.get_bid_rejection().exception
 
     def post_save(self) -> None:
         """ будем вызывать из хелпера отдельно """
@@ -1,14 +1,25 @@
+from __future__ import annotations
+
 from decimal import Decimal
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Tuple
 
+from django.apps import apps
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
+from auction.cache import invalidate_products
+from auction.metrics import observe_deal
 from auction.models import Client
 from auction.models.base import ModelAbstract
+from auction.models.product import ProductStatus
+from auction.pubsub import publish_closed
 from auction.tasks import deal_finalize
 from billing.meta import BillType
 from billing.models import Bill
+from core.errors import CodeError
+
+if TYPE_CHECKING:
+    from auction.models import Product
 
 
 class Deal(ModelAbstract):
@@ -52,9 +63,9 @@ class Deal(ModelAbstract):
         """Выручка, это цена продажи за вычетом коммиссионных"""
         return self.amount - self.get_commission()
 
-    def create_bills(self) -> List[Bill]:
+    def build_bills(self) -> List[Bill]:
         """
-        Проведение бизнес транзакций
+        Счета сделки без сохранения
 
         первый счет - списание у покупателя полной стоймости
         второй счет - начисление продавцу полной стоймости
@@ -63,37 +74,41 @@ class Deal(ModelAbstract):
         # TODO Возможно тут есть место для стратегии.
 
         # первый счет - списание у покупателя
-        bill_sell = Bill.objects.create(
+        bill_sell = Bill(
             client=self.buyer,
             bill_type=BillType.SELL,
             amount=self.amount,
             vat=self.buyer.vat,
         )
 
-        self.bills.add(bill_sell)
-
         # второй счет - начисление продавцу
-        bill_proceeds = Bill.objects.create(
+        bill_proceeds = Bill(
             client=self.product.seller,
             bill_type=BillType.PROCEEDS,
             amount=self.amount,
             vat=self.buyer.vat,
         )
 
-        self.bills.add(bill_proceeds)
-
         # третий счет - списание коммиссионых
-        bill_commission = Bill.objects.create(
+        bill_commission = Bill(
             client=self.product.seller,
             bill_type=BillType.COMMISSION,
             amount=self.get_commission(),
             vat=self.buyer.vat,
         )
 
-        self.bills.add(bill_commission)
-
         return [bill_sell, bill_proceeds, bill_commission]
 
+    def create_bills(self) -> List[Bill]:
+        """ Проведение бизнес транзакций, см. build_bills """
+        bills: List[Bill] = self.build_bills()
+
+        for bill in bills:
+            bill.save()
+            self.bills.add(bill)
+
+        return bills
+
     def finalize(self) -> None:
         """финализируем сделку"""
         # TODO send email
@@ -109,6 +124,68 @@ class Deal(ModelAbstract):
         """
         deal_finalize.delay(deal_id=self.id)
 
+    @classmethod
+    def bulk_settle(cls, products: List[Product]) -> List[Deal]:
+        """
+        Пакетное закрытие лотов: сделки, счета, связи и транзакции
+        создаются через bulk_create, счета активируются сразу,
+        без задач deal_finalize и bill_activate на каждую сделку.
+
+        Товары должны быть заблокированы и иметь актуальное состояние
+        ставок, seller__company и leading_bid__client__company
+        лучше подтянуть через select_related.
+        """
+        if not products:
+            return []
+
+        with transaction.atomic():
+            # лоты могли сменить статус после загрузки, продаем только активные
+            product_ids: List[int] = [product.id for product in products]
+            product_model = apps.get_model("auction", "Product")
+            sold: int = product_model.objects.filter(
+                id__in=product_ids, status=ProductStatus.ACTIVE
+            ).update(status=ProductStatus.SOLD)
+
+            if sold != len(product_ids):
+                raise CodeError.WRONG_STATUS.exception
+
+            deals: List[Deal] = cls.objects.bulk_create(
+                [
+                    cls(
+                        product=product,
+                        buyer=product.leading_bid.client,
+                        amount=product.current_price,
+                    )
+                    for product in products
+                ]
+            )
+
+            bills_by_deal: List[Tuple[Deal, List[Bill]]] = [
+                (deal, deal.build_bills()) for deal in deals
+            ]
+            bills: List[Bill] = Bill.objects.bulk_create(
+                [bill for _, deal_bills in bills_by_deal for bill in deal_bills]
+            )
+
+            DealBill.objects.bulk_create(
+                [
+                    DealBill(deal=deal, bill=bill)
+                    for deal, deal_bills in bills_by_deal
+                    for bill in deal_bills
+                ]
+            )
+
+            Bill.bulk_activate(bills)
+
+            invalidate_products(product_ids)
+
+            for product, deal in zip(products, deals):
+                product.status = ProductStatus.SOLD
+                publish_closed(product.id, ProductStatus.SOLD)
+                observe_deal("bulk", product.end_date, deal.cdate)
+
+        return deals
+
 
 class DealBill(ModelAbstract):
     """связь между сделками и счетами"""
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
 import logging
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import TYPE_CHECKING, Iterable, Optional
+from typing import TYPE_CHECKING, Iterable, List, Optional
 
 from django.apps import apps
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import DatabaseError, models, transaction
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
-from auction.tasks import product_send_email, product_try_to_make_a_deal
-from core.errors import CodeError
+from auction.cache import invalidate_products
+from auction.metrics import observe_deal
+from auction.order_book.order_book_factory import OrderBookFactory
+from auction.pubsub import publish_closed, publish_price
+from auction.tasks import product_send_email
+from core.errors import CodeError, GenericException
 
 from .client import Client
 
@@ -42,6 +51,15 @@ class ProductStatus(models.TextChoices):
     CANCELED = "canceled", "Отменен"
 
 
+# Поля которые поддерживаются только при вставке ставки (Product.register_bid)
+BID_STATE_FIELDS = ("current_price", "leading_bid", "bid_count")
+# Поля которые считает база (триггер поискового вектора), закрытие лотов
+# и автоставки
+DB_MAINTAINED_FIELDS = ("search_vector", "deal_attempts", "has_proxy_bids")
+# Поля товара, которые order book копирует при открытии лота
+ORDER_BOOK_FIELDS = ("start_price", "end_date")
+
+
 class Product(models.Model):
     """ Продукты или товары на аукционе """
 
@@ -63,9 +81,76 @@ class Product(models.Model):
         default=ProductStatus.INACTIVE,
         max_length=64,
     )
+    # Антиснайпинг: ставка незадолго до конца продлевает лот
+    soft_close = models.BooleanField("Мягкое закрытие", default=False)
+    # Денормализованное состояние ставок, обновляется вместе с вставкой Bid
+    current_price = models.DecimalField(
+        "Текущая цена", max_digits=19, decimal_places=2, null=True, blank=True
+    )
+    leading_bid = models.ForeignKey(
+        "auction.Bid",
+        verbose_name="Лидирующая ставка",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    bid_count = models.PositiveIntegerField("Количество ставок", default=0)
+    # ставит ProxyBid.place_bids, ставки без автоставок по лоту
+    # не делают лишний запрос к таблице автоставок
+    has_proxy_bids = models.BooleanField("Есть автоставки", default=False)
+    # неудачные попытки close_due_products закрыть лот по одному
+    deal_attempts = models.PositiveIntegerField(
+        "Попыток закрытия", default=0
+    )
+    # name (A) и description (B) на русском и английском, ведет триггер
+    # auction_product_search_vector_trigger, см. миграцию 0017
+    search_vector = SearchVectorField(null=True, editable=False)
     cdate = models.DateTimeField(auto_now=False, auto_now_add=True)
     mdate = models.DateTimeField(auto_now=True, auto_now_add=False)
 
+    class Meta:
+        indexes = [
+            # листинг "скоро закончатся" с курсором (end_date, id):
+            # только активные лоты по времени окончания
+            models.Index(
+                fields=["end_date", "id"],
+                name="auction_prod_active_end_id_idx",
+                condition=models.Q(status=ProductStatus.ACTIVE),
+            ),
+            # очередь закрытия: истекшие лоты без ставок остаются активными
+            # и не должны попадать в каждый проход close_due_products,
+            # лоты с неудачными попытками закрытия идут после остальных
+            models.Index(
+                fields=["deal_attempts", "end_date"],
+                name="auction_prod_due_end_idx",
+                condition=models.Q(
+                    status=ProductStatus.ACTIVE, leading_bid__isnull=False
+                ),
+            ),
+            # листинг активных лотов с курсором по id
+            models.Index(
+                fields=["id"],
+                name="auction_product_active_id_idx",
+                condition=models.Q(status=ProductStatus.ACTIVE),
+            ),
+            # полнотекстовый поиск
+            GinIndex(
+                fields=["search_vector"], name="auction_product_search_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values) -> Product:
+        instance: Product = super().from_db(db, field_names, values)
+        # end_date лота с мягким закрытием продлевает register_bid в базе,
+        # save пишет его, только если он изменен после загрузки
+        instance._loaded_end_date = instance.__dict__.get("end_date")
+        # статус переводит и закрытие лотов, save пишет его, только если
+        # он изменен после загрузки
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
     def __str__(self) -> str:
         return self.name
 
@@ -94,34 +179,200 @@ class Product(models.Model):
     ) -> None:
         """ проверки перед сохранением товара"""
         self.full_clean()
-        return super().save(force_insert, force_update, using, update_fields)
 
-    def get_final_bid(self) -> Optional[Bid]:
+        if self.pk is None:
+            # новый товар не может нести состояние ставок
+            self.current_price = None
+            self.leading_bid = None
+            self.bid_count = 0
+        elif (
+            update_fields is None
+            and not force_insert
+            and not self._state.adding
+        ):
+            # не перезаписываем состояние ставок устаревшим инстансом
+            # и поля, которые ведет база
+            update_fields = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in BID_STATE_FIELDS
+                and field.name not in DB_MAINTAINED_FIELDS
+            ]
+
+            if self.soft_close and self.end_date == getattr(
+                self, "_loaded_end_date", None
+            ):
+                # не откатываем продление, сделанное ставкой после загрузки
+                update_fields.remove("end_date")
+
+            if self.status == getattr(self, "_loaded_status", None):
+                # не возвращаем проданный после загрузки лот в старый статус
+                update_fields.remove("status")
+
+        super().save(force_insert, force_update, using, update_fields)
+        self._loaded_end_date = self.end_date
+        self._loaded_status = self.status
+        invalidate_products([self.id])
+
+    def register_bid(self, bid: Bid) -> bool:
         """
-        Получаем максимальный бид
+        Обновляем состояние ставок товара,
+        вызываем из Bid.save в одной транзакции со вставкой ставки
+
+        Условный UPDATE (compare-and-swap по текущей цене) берет блокировку
+        строки товара, поэтому из конкурирующих ставок пройдет только
+        одна, остальные получат False, причину отказа дает
+        get_bid_rejection.
+        Статус проверяется тем же UPDATE: ставка, ждавшая блокировку
+        закрытия лота, после SOLD не пройдет.
+
+        Лот с мягким закрытием принимает ставки только до end_date и
+        пока он ACTIVE: ставку, принятую до end_date по часам ставки,
+        но дождавшуюся блокировки после закрытия лота, отсекает статус.
+        Тот же UPDATE отодвигает end_date на SOFT_CLOSE_EXTENSION
+        от ставки. Закрытие по времени (close_due_products) берет
+        лоты по end_date, поэтому новых задач продление не требует.
         """
+        now: datetime = timezone.now()
+        extended_end_date: datetime = now + timedelta(
+            seconds=settings.SOFT_CLOSE_EXTENSION
+        )
 
-        where = models.Q(product=self)
+        where = (
+            models.Q(status=ProductStatus.ACTIVE)
+            & (
+                models.Q(current_price__isnull=True)
+                | models.Q(current_price__lt=bid.price)
+            )
+            & (models.Q(soft_close=False) | models.Q(end_date__gt=now))
+        )
 
-        final_bid = self.bid_set.filter(where).order_by("-price").first()
+        updated: int = (
+            Product.objects.filter(id=self.id)
+            .filter(where)
+            .update(
+                current_price=bid.price,
+                leading_bid=bid,
+                bid_count=models.F("bid_count") + 1,
+                end_date=models.Case(
+                    models.When(
+                        soft_close=True,
+                        then=Greatest(
+                            "end_date", models.Value(extended_end_date)
+                        ),
+                    ),
+                    default=models.F("end_date"),
+                ),
+            )
+        )
 
-        return final_bid
+        if not updated:
+            return False
 
-    def get_final_bid_price(self) -> Decimal:
+        if self.soft_close:
+            self.end_date = max(self.end_date, extended_end_date)
+            self._loaded_end_date = self.end_date
+
+        invalidate_products([self.id])
+        publish_price(self.id, bid.price)
+
+        self.current_price = bid.price
+        self.leading_bid = bid
+        self.bid_count += 1
+
+        return True
+
+    def get_bid_rejection(self) -> CodeError:
         """
-        Получаем максимальный бид или start_price этого продукта
+        Причина отказа register_bid: условный UPDATE не говорит,
+        какое условие не выполнено, поэтому перечитываем строку товара
         """
+        product: Product = Product.objects.only(
+            "status", "soft_close", "end_date"
+        ).get(id=self.id)
 
-        final_bid: Optional[Bid] = self.get_final_bid()
+        if product.status != ProductStatus.ACTIVE:
+            return CodeError.WRONG_STATUS
 
-        if final_bid is None:
+        if product.soft_close and product.end_date <= timezone.now():
+            return CodeError.LOT_CLOSED
+
+        return CodeError.ALREADY_HAS_HIGHER_BID
+
+    @transaction.atomic
+    def refresh_bid_state(self) -> None:
+        """
+        Пересчитываем состояние ставок по таблице ставок,
+        например после ручных правок ставок в админке
+        """
+        self.leading_bid = self.bid_set.order_by("-price").first()
+        self.current_price = (
+            None if self.leading_bid is None else self.leading_bid.price
+        )
+        self.bid_count = self.bid_set.count()
+
+        self.save(update_fields=BID_STATE_FIELDS)
+
+    def close_in_order_book(self) -> None:
+        """
+        Убираем лот из order book и дописываем его ставки в базу,
+        после этого состояние ставок в базе окончательное.
+        Вызываем вне транзакции, см. AbstractOrderBook.flush
+        """
+        order_book = OrderBookFactory.get_order_book()
+
+        if order_book is None:
+            return
+
+        order_book.close_lot(self.id)
+        order_book.flush()
+        self.refresh_from_db(fields=BID_STATE_FIELDS)
+
+    def reopen_in_order_book(self) -> None:
+        """
+        Открываем активный лот в order book заново после изменения
+        ORDER_BOOK_FIELDS, принятые ставки перед этим пишутся в базу.
+        Лоты с мягким закрытием и автоставками в order book не открываем
+        """
+        order_book = OrderBookFactory.get_order_book()
+
+        if order_book is None:
+            return
+
+        self.close_in_order_book()
+
+        if self.status != ProductStatus.ACTIVE or self.soft_close:
+            return
+
+        # ставки лота с автоставками должны идти через базу, см. set_proxy_bid
+        if self.has_proxy_bids:
+            return
+
+        order_book.open_lot(self)
+
+    def get_final_bid(self) -> Optional[Bid]:
+        """
+        Получаем максимальный бид
+        """
+        return self.leading_bid
+
+    def get_final_bid_price(self) -> Decimal:
+        """
+        Получаем максимальный бид или start_price этого продукта
+        """
+        if self.current_price is None:
             return self.start_price
 
-        return final_bid.price
+        return self.current_price
 
+    @transaction.atomic
     def make_a_deal(self) -> Deal:
         """
         Создание финализируещей сделки
+
+        лот уже должен быть убран из order book (close_in_order_book)
+        до транзакции сделки
         """
         final_bid: Optional[Bid] = self.get_final_bid()
 
@@ -130,13 +381,112 @@ class Product(models.Model):
 
         final_price: Decimal = final_bid.price
 
+        # лот мог сменить статус после загрузки, продаем только активный
+        if not Product.objects.filter(
+            id=self.id, status=ProductStatus.ACTIVE
+        ).update(status=ProductStatus.SOLD):
+            raise CodeError.WRONG_STATUS.exception
+
         deal_model = apps.get_model("auction", "Deal")
         deal: Deal = deal_model.objects.create(
             product=self, buyer=final_bid.client, amount=final_price
         )
 
+        invalidate_products([self.id])
+        publish_closed(self.id, ProductStatus.SOLD)
+        self.status = ProductStatus.SOLD
+        observe_deal("single", self.end_date, deal.cdate)
+
         return deal
 
+    @classmethod
+    def close_due_products(cls, now: Optional[datetime] = None) -> List[Deal]:
+        """
+        Закрываем сделки по всем активным лотам, время которых вышло.
+
+        Лоты выбираются пачкой по частичному индексу активных лотов
+        со ставками, уже заблокированные другим закрытием лоты пропускаются.
+        Лоты без ставок остаются активными до первой ставки.
+
+        Пачка закрывается одной транзакцией через Deal.bulk_settle,
+        если она падает - закрываем лоты по одному через make_a_deal.
+        Неудачная попытка по лоту увеличивает deal_attempts: такие лоты
+        выбираются после остальных и не занимают пачку в каждом проходе,
+        после AUCTION_CLOSER_MAX_ATTEMPTS попыток лот больше не выбирается.
+        """
+        now = now or timezone.now()
+        batch_size: int = settings.AUCTION_CLOSER_BATCH
+
+        max_attempts: int = settings.AUCTION_CLOSER_MAX_ATTEMPTS
+        ordering = ("deal_attempts", "end_date")
+
+        where = models.Q(
+            status=ProductStatus.ACTIVE,
+            end_date__lte=now,
+            leading_bid__isnull=False,
+            deal_attempts__lt=max_attempts,
+        )
+
+        order_book = OrderBookFactory.get_order_book()
+        if order_book is not None:
+            # ставки пишем до транзакции закрытия, см. AbstractOrderBook.flush
+            order_book.flush()
+            due_ids: List[int] = list(
+                cls.objects.filter(where)
+                .order_by(*ordering)
+                .values_list("id", flat=True)[:batch_size]
+            )
+
+            # закрываем лоты в order book и дописываем последние ставки
+            for product_id in due_ids:
+                order_book.close_lot(product_id)
+            order_book.flush()
+
+            where &= models.Q(id__in=due_ids)
+
+        queryset = cls.objects.select_related(
+            "seller__company", "leading_bid__client__company"
+        ).select_for_update(skip_locked=True, of=("self",))
+
+        deal_model = apps.get_model("auction", "Deal")
+
+        with transaction.atomic():
+            products: List[Product] = list(
+                queryset.filter(where).order_by(*ordering)[:batch_size]
+            )
+
+            # по одному закрываем, только если пачку не пустили данные лотов,
+            # ошибки в коде пробрасываем
+            try:
+                with transaction.atomic():
+                    return deal_model.bulk_settle(products)
+            except (DatabaseError, GenericException) as e:
+                logger.warning(f"failed bulk close: {e}")
+
+            deals: List[Deal] = []
+
+            for product in products:
+                try:
+                    with transaction.atomic():
+                        deal: Deal = product.make_a_deal()
+                except (DatabaseError, GenericException) as e:
+                    logger.warning(f"failed close {product}: {e}")
+                except Exception:
+                    # один лот не должен останавливать закрытие остальных
+                    logger.exception(f"failed close {product}")
+                else:
+                    transaction.on_commit(deal.async_finalize)
+                    deals.append(deal)
+                    continue
+
+                cls.objects.filter(id=product.id).update(
+                    deal_attempts=models.F("deal_attempts") + 1
+                )
+                if product.deal_attempts + 1 >= max_attempts:
+                    logger.error(f"gave up closing {product}")
+
+        return deals
+
     def is_buy_condition_meet(self) -> bool:
         """
         проверяем условия закрытия сделки по цене.
@@ -181,6 +531,7 @@ class Product(models.Model):
         logger.info(f"attemp make a deal for {self}")
 
         if self.is_ready_to_make_a_deal():
+            self.close_in_order_book()
             deal: Deal = self.make_a_deal()
             logger.info(f"make a deal {deal}")
             deal.async_finalize()
@@ -208,6 +559,8 @@ class Product(models.Model):
 
         self.status = ProductStatus.DELETED
         self.save()
+        self.close_in_order_book()
+        publish_closed(self.id, ProductStatus.DELETED)
 
     def activate(self) -> None:
         """ Выставление продукта на акцион """
@@ -217,7 +570,9 @@ class Product(models.Model):
         self.status = ProductStatus.ACTIVE
         self.save()
 
-        # Ставим задачу в будущие, чтобы закрыть сделку.
-        product_try_to_make_a_deal.apply_async(
-            args=[self.id], eta=self.end_date
-        )
+        order_book = OrderBookFactory.get_order_book()
+        # продление лота с мягким закрытием ведет register_bid в базе
+        if order_book is not None and not self.soft_close:
+            order_book.open_lot(self)
+
+        # сделку по времени закроет close_due_products
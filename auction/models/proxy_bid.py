@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import models, transaction
+
+from auction.models.bid import Bid
+from auction.models.client import Client
+from auction.models.product import Product, ProductStatus
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyEntry(NamedTuple):
+    """ максимум участника торгов по лоту """
+
+    client_id: int
+    max_price: Decimal
+
+
+def resolve_proxy_bids(
+    current_price: Optional[Decimal],
+    start_price: Decimal,
+    leader_id: Optional[int],
+    proxies: List[ProxyEntry],
+    increment: Decimal,
+) -> List[Tuple[int, Decimal]]:
+    """
+    Видимые ставки (client_id, price) после торгов автоставок за один проход
+
+    proxies - по убыванию максимума, при равенстве раньше заданная первой.
+    Лидер участвует с максимумом из своей автоставки или текущей ценой и
+    выигрывает при равенстве. Победитель платит максимум второго плюс шаг,
+    но не больше своего максимума, второй остается со ставкой на свой
+    максимум. Промежуточные ставки торгов не пишем.
+    """
+    leader_max: Optional[Decimal] = current_price
+    entries: List[ProxyEntry] = []
+
+    for proxy in proxies:
+        if proxy.client_id == leader_id:
+            leader_max = max(proxy.max_price, leader_max or proxy.max_price)
+        elif (
+            proxy.max_price > current_price
+            if current_price is not None
+            else proxy.max_price >= start_price
+        ):
+            entries.append(proxy)
+
+    if leader_id is not None and leader_max is not None:
+        # сортировка устойчивая, лидер останется впереди равных ему
+        entries.insert(0, ProxyEntry(leader_id, leader_max))
+
+    entries.sort(key=lambda entry: entry.max_price, reverse=True)
+
+    if len(entries) < 2:
+        if not entries or entries[0].client_id == leader_id:
+            return []
+        # первая ставка по лоту - по стартовой цене
+        return [(entries[0].client_id, start_price)]
+
+    winner, runner_up = entries[0], entries[1]
+    price: Decimal = min(winner.max_price, runner_up.max_price + increment)
+    bids: List[Tuple[int, Decimal]] = []
+
+    if runner_up.max_price < price and (
+        current_price is None or runner_up.max_price > current_price
+    ):
+        bids.append((runner_up.client_id, runner_up.max_price))
+
+    if current_price is None or price > current_price:
+        bids.append((winner.client_id, price))
+
+    return bids
+
+
+class ProxyBid(models.Model):
+    """ Автоставка: система перебивает ставки клиента до max_price """
+
+    client = models.ForeignKey(Client, on_delete=models.CASCADE)
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, db_index=False
+    )
+    max_price = models.DecimalField(max_digits=19, decimal_places=2)
+    cdate = models.DateTimeField(auto_now=False, auto_now_add=True)
+    mdate = models.DateTimeField(auto_now=True, auto_now_add=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["client", "product"], name="unique_proxy_bid"
+            )
+        ]
+        # автоставки лота по убыванию максимума
+        indexes = [models.Index(fields=["product", "-max_price"])]
+
+    def __str__(self) -> str:
+        return f"{self.product_id}: {self.client_id} up to {self.max_price}"
+
+    @classmethod
+    def resolve(cls, product: Product) -> List[Bid]:
+        """ Разрешаем автоставки лота после новой ставки или автоставки """
+        bids: List[Bid] = cls.place_bids(product)
+        cls.post_place_bids(product, bids)
+        return bids
+
+    @classmethod
+    def place_bids(cls, product: Product) -> List[Bid]:
+        """
+        Ставки автоставок лота одной транзакцией
+
+        блокировка строки товара на время расчета, новые ставки по лоту
+        ждут ее, поэтому условный UPDATE в Bid.save не откажет.
+        Можно вызывать внутри транзакции, post_place_bids - только после нее
+
+        Лоты без автоставок отсекаем по уже загруженному has_proxy_bids,
+        новую автоставку перед вызовом отмечает в товаре set_proxy_bid,
+        а в базу флаг пишем здесь
+        """
+        if not product.has_proxy_bids:
+            return []
+
+        bids: List[Bid] = []
+
+        with transaction.atomic():
+            product = Product.objects.select_for_update().get(id=product.id)
+
+            if product.status != ProductStatus.ACTIVE:
+                return []
+
+            if not product.has_proxy_bids:
+                Product.objects.filter(id=product.id).update(
+                    has_proxy_bids=True
+                )
+
+            leader_id: Optional[int] = None
+            if product.leading_bid_id is not None:
+                leader_id = Bid.objects.values_list("client_id", flat=True).get(
+                    id=product.leading_bid_id
+                )
+            proxies: List[ProxyEntry] = [
+                ProxyEntry(*values)
+                for values in cls.objects.filter(product=product)
+                .order_by("-max_price", "cdate", "id")
+                .values_list("client_id", "max_price")
+            ]
+
+            for client_id, price in resolve_proxy_bids(
+                current_price=product.current_price,
+                start_price=product.start_price,
+                leader_id=leader_id,
+                proxies=proxies,
+                increment=settings.PROXY_BID_INCREMENT,
+            ):
+                bid = Bid(client_id=client_id, product=product, price=price)
+                bid.save()
+                bids.append(bid)
+
+        return bids
+
+    @classmethod
+    def post_place_bids(cls, product: Product, bids: List[Bid]) -> None:
+        """ последняя ставка автоставок могла закрыть сделку """
+        if bids:
+            logger.info(f"proxy bids for {product.id}: {bids}")
+            bids[-1].post_save()
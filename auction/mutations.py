@@ -7,8 +7,9 @@ from .structures.graphql import (
     ProductActionInput,
     ProductInput,
     ProductUpdateInput,
+    ProxyBidInput,
 )
-from .types import BidType, ProductType
+from .types import BidItemInput, BidResultType, BidType, ProductType
 
 
 class CreateProduct(graphene.Mutation):
@@ -23,6 +24,7 @@ class CreateProduct(graphene.Mutation):
         buy_price = graphene.Decimal()
         start_date = graphene.DateTime(required=False)
         end_date = graphene.DateTime(required=True)
+        soft_close = graphene.Boolean(required=False)
 
     product = graphene.Field(ProductType)
 
@@ -36,6 +38,7 @@ class CreateProduct(graphene.Mutation):
         end_date,
         buy_price=None,
         start_date=None,
+        soft_close=False,
     ):
         client = info.context.user
 
@@ -47,6 +50,7 @@ class CreateProduct(graphene.Mutation):
             buy_price=buy_price,
             start_date=start_date,
             end_date=end_date,
+            soft_close=soft_close,
         )
 
         product = graphql_helper.create_new_product(product_input)
@@ -66,6 +70,7 @@ class UpdateProduct(graphene.Mutation):
         buy_price = graphene.Decimal(required=False)
         start_date = graphene.DateTime(required=False)
         end_date = graphene.DateTime(required=False)
+        soft_close = graphene.Boolean(required=False)
 
     product = graphene.Field(ProductType)
 
@@ -80,6 +85,7 @@ class UpdateProduct(graphene.Mutation):
         end_date=None,
         buy_price=None,
         start_date=None,
+        soft_close=None,
     ):
         client = info.context.user
 
@@ -92,6 +98,7 @@ class UpdateProduct(graphene.Mutation):
             buy_price=buy_price,
             start_date=start_date,
             end_date=end_date,
+            soft_close=soft_close,
         )
 
         product = graphql_helper.update_product(product_update_input)
@@ -153,7 +160,14 @@ class CreateBid(graphene.Mutation):
         price = graphene.Decimal(required=True)
         product_id = graphene.ID(required=True)
 
-    bid = graphene.Field(BidType)
+    bid = graphene.Field(
+        BidType, description="Записанная ставка, null пока ставка ждет записи"
+    )
+    price = graphene.Decimal(required=True)
+    pending = graphene.Boolean(
+        required=True,
+        description="Ставка принята order book и будет записана позже",
+    )
 
     @login_required
     def mutate(self, info, price, product_id):
@@ -165,4 +179,56 @@ class CreateBid(graphene.Mutation):
         )
 
         bid = graphql_helper.create_bid(bid_input)
-        return CreateBid(bid=bid)
+        pending = bid.pk is None
+        return CreateBid(
+            bid=None if pending else bid, price=bid.price, pending=pending
+        )
+
+
+class CreateBids(graphene.Mutation):
+    """
+    Пакет ставок на товары для автоматических клиентов,
+    результат по каждой ставке отдельно и в порядке запроса
+    """
+
+    class Arguments:
+        bids = graphene.List(graphene.NonNull(BidItemInput), required=True)
+
+    results = graphene.List(graphene.NonNull(BidResultType), required=True)
+
+    @login_required
+    def mutate(self, info, bids):
+        client = info.context.user
+
+        results = graphql_helper.create_bids(
+            client, [(bid.product_id, bid.price) for bid in bids]
+        )
+        return CreateBids(results=results)
+
+
+class SetProxyBid(graphene.Mutation):
+    """
+    Автоставка: система перебивает ставки конкурентов до max_price
+    """
+
+    class Arguments:
+        max_price = graphene.Decimal(required=True)
+        product_id = graphene.ID(required=True)
+
+    bids = graphene.List(
+        graphene.NonNull(BidType),
+        required=True,
+        description="Видимые ставки, выставленные автоставками",
+    )
+
+    @login_required
+    def mutate(self, info, max_price, product_id):
+        client = info.context.user
+        proxy_bid_input = ProxyBidInput(
+            client=client,
+            max_price=max_price,
+            product_id=product_id,
+        )
+
+        bids = graphql_helper.set_proxy_bid(proxy_bid_input)
+        return SetProxyBid(bids=bids)
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from decimal import Decimal
+from enum import IntEnum
+from typing import TYPE_CHECKING, ContextManager, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.transaction import TransactionManagementError
+
+if TYPE_CHECKING:
+    from auction.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class OrderBookResult(IntEnum):
+    """ результат установки ставки в order book """
+
+    ACCEPTED = 1
+    LOWER_PRICE = 0
+    # лота нет в order book или он уже завершен, ставку ведем через базу
+    NOT_OPEN = -1
+
+
+def to_cents(price: Decimal) -> int:
+    """ цены в order book храним целыми копейками """
+    return int(price.quantize(Decimal("0.01")) * 100)
+
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(cents) / 100).quantize(Decimal("0.01"))
+
+
+@dataclass
+class PendingBid:
+    """ принятая ставка, которая еще не записана в базу """
+
+    product_id: int
+    client_id: int
+    price: Decimal
+    cdate: datetime
+
+    def dumps(self) -> str:
+        data = asdict(self)
+        data["price"] = str(self.price)
+        data["cdate"] = self.cdate.isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def loads(cls, raw: str) -> PendingBid:
+        data = json.loads(raw)
+        return cls(
+            product_id=data["product_id"],
+            client_id=data["client_id"],
+            price=Decimal(data["price"]),
+            cdate=datetime.fromisoformat(data["cdate"]),
+        )
+
+
+class AbstractOrderBook(ABC):
+    """
+    Order book активных лотов
+
+    Держит лучшую ставку, количество ставок и время окончания лота,
+    принимает или отклоняет ставки атомарно, а принятые ставки
+    складывает в очередь для отложенной записи в базу (flush).
+    """
+
+    @abstractmethod
+    def open_lot(self, product: Product) -> None:
+        """ выставляем лот в order book """
+        ...
+
+    @abstractmethod
+    def close_lot(self, product_id: int) -> None:
+        """ убираем лот из order book, новые ставки пойдут через базу """
+        ...
+
+    @abstractmethod
+    def place_bid(
+        self, product_id: int, client_id: int, price: Decimal
+    ) -> OrderBookResult:
+        """ атомарно принимаем или отклоняем ставку """
+        ...
+
+    @abstractmethod
+    def get_price(self, product_id: int) -> Optional[Decimal]:
+        """
+        лучшая ставка или стартовая цена лота,
+        None если лота нет в order book
+        """
+        ...
+
+    @abstractmethod
+    def get_bid_count(self, product_id: int) -> Optional[int]:
+        """ количество ставок, None если лота нет в order book """
+        ...
+
+    @abstractmethod
+    def peek_pending_bids(self, limit: int) -> List[PendingBid]:
+        """ первые ставки из очереди записи, без удаления """
+        ...
+
+    @abstractmethod
+    def ack_pending_bids(self, count: int, lock: object) -> bool:
+        """
+        удаляем записанные ставки из начала очереди,
+        только если блокировка lock еще наша
+        """
+        ...
+
+    @abstractmethod
+    def flush_lock(self) -> ContextManager[object]:
+        """ блокировка на одну пачку, чтобы очередь записывал один процесс """
+        ...
+
+    def flush(self, batch_size: Optional[int] = None) -> int:
+        """
+        записываем отложенные ставки в базу, возвращаем количество
+
+        ставки удаляются из очереди сразу после коммита своей пачки,
+        поэтому внутри чужой транзакции запись запрещена: при ее откате
+        ставки пропали бы и из базы, и из очереди.
+
+        Блокировку берем на каждую пачку, чтобы длинная очередь
+        не переживала ее таймаут. Если блокировка все же истекла,
+        начало очереди мог забрать другой процесс, поэтому очередь
+        не трогаем и прекращаем запись
+        """
+        if connection.in_atomic_block:
+            raise TransactionManagementError(
+                "order book flush must run outside of transaction"
+            )
+
+        batch_size = batch_size or settings.AUCTION_ORDER_BOOK_FLUSH_BATCH
+        persisted: int = 0
+
+        while True:
+            with self.flush_lock() as lock:
+                pending_bids = self.peek_pending_bids(batch_size)
+
+                if not pending_bids:
+                    break
+
+                persisted += self.persist(pending_bids)
+
+                if not self.ack_pending_bids(len(pending_bids), lock):
+                    logger.error(
+                        "order book flush lock expired, "
+                        f"{len(pending_bids)} bids left in queue"
+                    )
+                    break
+
+        return persisted
+
+    def persist(self, pending_bids: List[PendingBid]) -> int:
+        """
+        пишем пачку ставок, если пачка нарушает ограничения базы - по одной,
+        чтобы одна битая ставка (например, товар уже удален)
+        не останавливала запись всей очереди.
+        Остальные ошибки базы пробрасываем, ставки остаются в очереди
+        """
+        bid_model = apps.get_model("auction", "Bid")
+
+        try:
+            with transaction.atomic():
+                bid_model.persist_pending(pending_bids)
+            return len(pending_bids)
+        except IntegrityError as e:
+            logger.warning(f"failed persist of pending bids: {e}")
+
+        persisted: int = 0
+
+        for pending_bid in pending_bids:
+            try:
+                with transaction.atomic():
+                    bid_model.persist_pending([pending_bid])
+                persisted += 1
+            except IntegrityError as e:
+                # ставку не записать, оставляем ее только в логе
+                logger.error(f"dropped pending bid {pending_bid.dumps()}: {e}")
+
+        return persisted
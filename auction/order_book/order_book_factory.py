@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from auction.order_book.order_book import AbstractOrderBook
+from auction.order_book.order_books import MemoryOrderBook, RedisOrderBook
+
+MEMORY: str = "memory"
+REDIS: str = "redis"
+
+
+class OrderBookFactory:
+    """ Фабрика order book, один инстанс на процесс для каждого типа """
+
+    instances: Dict[str, AbstractOrderBook] = {}
+
+    @classmethod
+    def create_order_book(cls, name: str) -> AbstractOrderBook:
+        depth: int = settings.AUCTION_ORDER_BOOK_DEPTH
+
+        if name == MEMORY:
+            return MemoryOrderBook(depth=depth)
+
+        if name == REDIS:
+            return RedisOrderBook(
+                url=settings.AUCTION_ORDER_BOOK_URL, depth=depth
+            )
+
+        raise ValueError(f"Unknown order book {name}")
+
+    @classmethod
+    def get_order_book(cls) -> Optional[AbstractOrderBook]:
+        """ order book из настроек, None если он выключен """
+        name: Optional[str] = settings.AUCTION_ORDER_BOOK
+
+        if not name:
+            return None
+
+        if name not in cls.instances:
+            cls.instances[name] = cls.create_order_book(name)
+
+        return cls.instances[name]
@@ -0,0 +1,2 @@
+from .memory import MemoryOrderBook as MemoryOrderBook  # noqa
+from .redis import RedisOrderBook as RedisOrderBook  # noqa
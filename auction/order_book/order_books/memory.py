@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import TYPE_CHECKING, ContextManager, Dict, List, Optional
+
+from django.utils import timezone
+
+from auction.order_book.order_book import (
+    AbstractOrderBook,
+    OrderBookResult,
+    PendingBid,
+)
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from auction.models import Product
+
+
+@dataclass
+class Lot:
+    end_date: datetime
+    start_price: Decimal
+    top_price: Optional[Decimal]
+    bid_count: int
+    bids: List[PendingBid] = field(default_factory=list)
+
+
+class MemoryOrderBook(AbstractOrderBook):
+    """
+    Order book внутри процесса
+
+    Для тестов и локального запуска в один процесс,
+    между процессами состояние не разделяется.
+    """
+
+    def __init__(self, depth: int) -> None:
+        self.depth: int = depth
+        self.lots: Dict[int, Lot] = {}
+        self.pending: List[PendingBid] = []
+        self.lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+
+    def open_lot(self, product: Product) -> None:
+        with self.lock:
+            self.lots[product.id] = Lot(
+                end_date=product.end_date,
+                start_price=product.start_price,
+                top_price=product.current_price,
+                bid_count=product.bid_count,
+            )
+
+    def close_lot(self, product_id: int) -> None:
+        with self.lock:
+            self.lots.pop(product_id, None)
+
+    def place_bid(
+        self, product_id: int, client_id: int, price: Decimal
+    ) -> OrderBookResult:
+        now = timezone.now()
+
+        with self.lock:
+            lot: Optional[Lot] = self.lots.get(product_id)
+
+            if lot is None or now >= lot.end_date:
+                return OrderBookResult.NOT_OPEN
+
+            if lot.top_price is not None and price <= lot.top_price:
+                return OrderBookResult.LOWER_PRICE
+
+            # первая ставка не ниже стартовой цены
+            if lot.top_price is None and price < lot.start_price:
+                return OrderBookResult.LOWER_PRICE
+
+            bid = PendingBid(
+                product_id=product_id,
+                client_id=client_id,
+                price=price,
+                cdate=now,
+            )
+
+            lot.top_price = price
+            lot.bid_count += 1
+            lot.bids = [bid, *lot.bids][: self.depth]
+            self.pending.append(bid)
+
+        return OrderBookResult.ACCEPTED
+
+    def get_price(self, product_id: int) -> Optional[Decimal]:
+        lot: Optional[Lot] = self.lots.get(product_id)
+
+        if lot is None:
+            return None
+
+        return lot.start_price if lot.top_price is None else lot.top_price
+
+    def get_bid_count(self, product_id: int) -> Optional[int]:
+        lot: Optional[Lot] = self.lots.get(product_id)
+        return None if lot is None else lot.bid_count
+
+    def peek_pending_bids(self, limit: int) -> List[PendingBid]:
+        with self.lock:
+            return self.pending[:limit]
+
+    def ack_pending_bids(self, count: int, lock: object) -> bool:
+        # threading.Lock не истекает, пока его держит flush
+        with self.lock:
+            del self.pending[:count]
+        return True
+
+    def flush_lock(self) -> ContextManager[object]:
+        return self.pending_lock
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import TYPE_CHECKING, Iterator, List, Optional
+
+from django.utils import timezone
+from redis import Redis
+from redis.exceptions import LockNotOwnedError
+from redis.lock import Lock
+
+from auction.order_book.order_book import (
+    AbstractOrderBook,
+    OrderBookResult,
+    PendingBid,
+    from_cents,
+    to_cents,
+)
+
+if TYPE_CHECKING:
+    from auction.models import Product
+
+logger = logging.getLogger(__name__)
+
+# KEYS: meta лота, sorted set ставок лота, очередь записи в базу
+# ARGV: цена в копейках, текущее время, ставка, глубина стакана
+PLACE_BID_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+
+local meta = redis.call('HMGET', KEYS[1], 'end', 'top', 'start')
+if tonumber(ARGV[2]) >= tonumber(meta[1]) then
+    return -1
+end
+
+local price = tonumber(ARGV[1])
+if meta[2] and price <= tonumber(meta[2]) then
+    return 0
+end
+-- первая ставка не ниже стартовой цены
+if not meta[2] and price < tonumber(meta[3]) then
+    return 0
+end
+
+redis.call('HSET', KEYS[1], 'top', ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'count', 1)
+redis.call('ZADD', KEYS[2], price, ARGV[3])
+redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -tonumber(ARGV[4]) - 1)
+redis.call('RPUSH', KEYS[3], ARGV[3])
+return 1
+"""
+
+# KEYS: блокировка записи, очередь записи в базу
+# ARGV: токен блокировки, количество записанных ставок
+ACK_PENDING_BIDS_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+
+redis.call('LTRIM', KEYS[2], tonumber(ARGV[2]), -1)
+return 1
+"""
+
+
+class RedisOrderBook(AbstractOrderBook):
+    """ Order book в Redis, общий для всех процессов """
+
+    prefix: str = "auction:order_book"
+    # секунды на запись одной пачки
+    flush_lock_timeout: float = 60
+
+    def __init__(self, url: str, depth: int) -> None:
+        self.redis: Redis = Redis.from_url(url, decode_responses=True)
+        self.depth: int = depth
+        self.place_bid_script = self.redis.register_script(PLACE_BID_SCRIPT)
+        self.ack_pending_bids_script = self.redis.register_script(
+            ACK_PENDING_BIDS_SCRIPT
+        )
+
+    def meta_key(self, product_id: int) -> str:
+        return f"{self.prefix}:lot:{product_id}"
+
+    def bids_key(self, product_id: int) -> str:
+        return f"{self.prefix}:lot:{product_id}:bids"
+
+    @property
+    def pending_key(self) -> str:
+        return f"{self.prefix}:pending"
+
+    @property
+    def flush_lock_key(self) -> str:
+        return f"{self.prefix}:flush"
+
+    def open_lot(self, product: Product) -> None:
+        meta = {
+            "end": product.end_date.timestamp(),
+            "start": to_cents(product.start_price),
+            "count": product.bid_count,
+        }
+
+        if product.current_price is not None:
+            meta["top"] = to_cents(product.current_price)
+
+        pipeline = self.redis.pipeline()
+        pipeline.delete(self.meta_key(product.id), self.bids_key(product.id))
+        pipeline.hset(self.meta_key(product.id), mapping=meta)
+        pipeline.execute()
+
+    def close_lot(self, product_id: int) -> None:
+        self.redis.delete(self.meta_key(product_id), self.bids_key(product_id))
+
+    def place_bid(
+        self, product_id: int, client_id: int, price: Decimal
+    ) -> OrderBookResult:
+        now = timezone.now()
+        bid = PendingBid(
+            product_id=product_id, client_id=client_id, price=price, cdate=now
+        )
+
+        result: int = self.place_bid_script(
+            keys=[
+                self.meta_key(product_id),
+                self.bids_key(product_id),
+                self.pending_key,
+            ],
+            args=[to_cents(price), now.timestamp(), bid.dumps(), self.depth],
+        )
+
+        return OrderBookResult(result)
+
+    def get_price(self, product_id: int) -> Optional[Decimal]:
+        start, top = self.redis.hmget(self.meta_key(product_id), "start", "top")
+
+        if start is None:
+            return None
+
+        return from_cents(int(start if top is None else top))
+
+    def get_bid_count(self, product_id: int) -> Optional[int]:
+        count = self.redis.hget(self.meta_key(product_id), "count")
+        return None if count is None else int(count)
+
+    def peek_pending_bids(self, limit: int) -> List[PendingBid]:
+        raw_bids: List[str] = self.redis.lrange(self.pending_key, 0, limit - 1)
+        return [PendingBid.loads(raw) for raw in raw_bids]
+
+    def ack_pending_bids(self, count: int, lock: object) -> bool:
+        assert isinstance(lock, Lock)
+        result: int = self.ack_pending_bids_script(
+            keys=[self.flush_lock_key, self.pending_key],
+            args=[lock.local.token, count],
+        )
+        return bool(result)
+
+    @contextmanager
+    def flush_lock(self) -> Iterator[Lock]:
+        lock: Lock = self.redis.lock(
+            self.flush_lock_key, timeout=self.flush_lock_timeout
+        )
+        lock.acquire()
+        try:
+            yield lock
+        finally:
+            try:
+                lock.release()
+            except LockNotOwnedError:
+                # истекла во время записи, ее уже мог взять другой процесс
+                logger.warning("order book flush lock expired before release")
@@ -0,0 +1,171 @@
+"""
+Pub/sub событий лотов: новая цена и закрытие лота
+
+События публикуются после коммита из путей ставок и сделок.
+Каждый процесс держит одну подписку на канал и раздает события
+локальным слушателям (graphql подписки, SSE) по id товара.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from redis import Redis
+
+logger = logging.getLogger(__name__)
+
+EVENT_PRICE: str = "price"
+EVENT_CLOSED: str = "closed"
+
+MEMORY: str = "memory"
+REDIS: str = "redis"
+
+Event = Dict[str, Any]
+Listener = Callable[[Event], None]
+
+
+class AbstractPubSub(ABC):
+    """ публикация событий и раздача их слушателям процесса """
+
+    def __init__(self) -> None:
+        self.listeners: Dict[int, Set[Listener]] = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def publish(self, event: Event) -> None:
+        """ отправляем событие всем процессам """
+
+    def start(self) -> None:
+        """ подписка процесса на канал, при первом слушателе """
+
+    def subscribe(
+        self, product_ids: Iterable[int], listener: Listener
+    ) -> Callable[[], None]:
+        """ слушаем события товаров, возвращаем функцию отписки """
+        product_ids = set(product_ids)
+
+        with self.lock:
+            for product_id in product_ids:
+                self.listeners[product_id].add(listener)
+
+        self.start()
+
+        def unsubscribe() -> None:
+            with self.lock:
+                for product_id in product_ids:
+                    self.listeners[product_id].discard(listener)
+                    if not self.listeners[product_id]:
+                        del self.listeners[product_id]
+
+        return unsubscribe
+
+    def dispatch(self, event: Event) -> None:
+        """ раздаем событие слушателям его товара """
+        with self.lock:
+            listeners = list(self.listeners.get(event["product_id"], ()))
+
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning(f"failed listener {listener}: {e}")
+
+
+class MemoryPubSub(AbstractPubSub):
+    """ события внутри одного процесса, для разработки и тестов """
+
+    def publish(self, event: Event) -> None:
+        self.dispatch(event)
+
+
+class RedisPubSub(AbstractPubSub):
+    """ события через канал Redis, общий для всех процессов """
+
+    channel: str = "auction:events"
+
+    def __init__(self, url: str) -> None:
+        super().__init__()
+        self.redis: Redis = Redis.from_url(url)
+        self.thread: Optional[threading.Thread] = None
+
+    def publish(self, event: Event) -> None:
+        self.redis.publish(self.channel, json.dumps(event))
+
+    def start(self) -> None:
+        with self.lock:
+            if self.thread is not None:
+                return
+
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: self.handle_message})
+            self.thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def handle_message(self, message: Dict[str, Any]) -> None:
+        self.dispatch(json.loads(message["data"]))
+
+
+class PubSubFactory:
+    """ Фабрика pub/sub, один инстанс на процесс для каждого типа """
+
+    instances: Dict[str, AbstractPubSub] = {}
+
+    @classmethod
+    def create_pubsub(cls, name: str) -> AbstractPubSub:
+        if name == MEMORY:
+            return MemoryPubSub()
+
+        if name == REDIS:
+            return RedisPubSub(url=settings.AUCTION_PUBSUB_URL)
+
+        raise ValueError(f"Unknown pubsub {name}")
+
+    @classmethod
+    def get_pubsub(cls) -> Optional[AbstractPubSub]:
+        """ pub/sub из настроек, None если он выключен """
+        name: Optional[str] = settings.AUCTION_PUBSUB
+
+        if not name:
+            return None
+
+        if name not in cls.instances:
+            cls.instances[name] = cls.create_pubsub(name)
+
+        return cls.instances[name]
+
+
+def publish(event: Event) -> None:
+    """
+    публикуем событие после коммита текущей транзакции,
+    ошибка брокера не должна ломать уже закоммиченную ставку
+    """
+    pubsub = PubSubFactory.get_pubsub()
+
+    if pubsub is None:
+        return
+
+    def send() -> None:
+        try:
+            pubsub.publish(event)
+        except Exception as e:
+            logger.warning(f"failed publish {event}: {e}")
+
+    transaction.on_commit(send)
+
+
+def publish_price(product_id: int, price: Decimal) -> None:
+    """ новая лидирующая цена лота """
+    publish(
+        {"type": EVENT_PRICE, "product_id": product_id, "price": str(price)}
+    )
+
+
+def publish_closed(product_id: int, status: str) -> None:
+    """ лот закрыт: продан или снят """
+    publish({"type": EVENT_CLOSED, "product_id": product_id, "status": status})
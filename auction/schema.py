@@ -1,20 +1,82 @@
+from typing import Callable
+
 import graphene
 
 from auction.helpers.graphql import (
+    ProductKeysetPage,
     get_product,
+    get_product_cursor,
+    get_product_keyset_page,
     get_product_list,
     get_product_price,
+    get_search_cursor,
+    observe_product_events,
+    search_products,
+)
+from auction.pubsub import EVENT_CLOSED, EVENT_PRICE
+from auction.structures.graphql import (
+    CursorListInput,
+    IdInput,
+    PageListInput,
+    ProductFilterInput,
+    ProductListOrder,
+    SearchInput,
 )
-from auction.structures.graphql import IdInput, PageListInput
 
+from .models import Product
 from .mutations import (
     ActivateProduct,
     CreateBid,
+    CreateBids,
     CreateProduct,
     DeleteProduct,
+    SetProxyBid,
     UpdateProduct,
 )
-from .types import ProductType
+from .types import (
+    LotClosedType,
+    PriceUpdateType,
+    ProductConnection,
+    ProductListOrderEnum,
+    ProductType,
+)
+
+
+def build_product_connection(
+    page: ProductKeysetPage,
+    get_cursor: Callable[[Product], str],
+    has_previous_page: bool,
+) -> ProductConnection:
+    """ relay connection из страницы товаров по курсору """
+    edges = [
+        ProductConnection.Edge(node=product, cursor=get_cursor(product))
+        for product in page.products
+    ]
+
+    connection = ProductConnection(
+        edges=edges,
+        page_info=graphene.relay.PageInfo(
+            has_next_page=page.has_next_page,
+            has_previous_page=has_previous_page,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
+    # для totalCount по запросу
+    connection.queryset = page.queryset
+
+    return connection
+
+
+def product_filter_arguments():
+    """ аргументы фильтров листинга товаров """
+    return dict(
+        status=graphene.String(),
+        seller_id=graphene.ID(),
+        price_from=graphene.Decimal(),
+        price_to=graphene.Decimal(),
+        ending_before=graphene.DateTime(),
+    )
 
 
 class Query(graphene.ObjectType):
@@ -22,9 +84,28 @@ class Query(graphene.ObjectType):
         ProductType,
         page=graphene.Int(),
         page_size=graphene.Int(),
+        **product_filter_arguments(),
         description="Получаем список продуктов на аукционе",
     )
 
+    product_list_connection = graphene.Field(
+        ProductConnection,
+        first=graphene.Int(),
+        after=graphene.String(),
+        order=ProductListOrderEnum(),
+        **product_filter_arguments(),
+        description="Получаем список продуктов по курсору (keyset)",
+    )
+
+    search_products = graphene.Field(
+        ProductConnection,
+        query=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+        **product_filter_arguments(),
+        description="Полнотекстовый поиск товаров по названию и описанию",
+    )
+
     product = graphene.Field(
         ProductType,
         id=graphene.ID(required=True),
@@ -40,13 +121,66 @@ class Query(graphene.ObjectType):
         info,
         page=1,
         page_size=10,
+        **filters,
     ):
         """
         Получаем список продуктов на аукционе
         """
-        input: PageListInput = PageListInput(page=page, page_size=page_size)
+        input: PageListInput = PageListInput(
+            page=page,
+            page_size=page_size,
+            filters=ProductFilterInput(**filters),
+        )
         return get_product_list(input=input)
 
+    def resolve_product_list_connection(
+        self,
+        info,
+        first=10,
+        after=None,
+        order=ProductListOrder.ID,
+        **filters,
+    ):
+        """
+        Получаем страницу продуктов по курсору
+        """
+        input: CursorListInput = CursorListInput(
+            first=first,
+            after=after,
+            order=order,
+            filters=ProductFilterInput(**filters),
+        )
+        page: ProductKeysetPage = get_product_keyset_page(input=input)
+
+        return build_product_connection(
+            page,
+            lambda product: get_product_cursor(product, input.order),
+            has_previous_page=after is not None,
+        )
+
+    def resolve_search_products(
+        self,
+        info,
+        query,
+        first=10,
+        after=None,
+        **filters,
+    ):
+        """
+        Полнотекстовый поиск товаров
+        """
+        input: SearchInput = SearchInput(
+            query=query,
+            first=first,
+            after=after,
+            filters=ProductFilterInput(**filters),
+        )
+        page: ProductKeysetPage = search_products(input=input)
+
+        return build_product_connection(
+            page, get_search_cursor, has_previous_page=after is not None
+        )
+
     def resolve_product(self, info, id):
         """
         Получаем конкретный продукт
@@ -65,9 +199,40 @@ class Query(graphene.ObjectType):
 class Mutation(graphene.ObjectType):
     create_product = CreateProduct.Field()
     create_bid = CreateBid.Field()
+    create_bids = CreateBids.Field()
+    set_proxy_bid = SetProxyBid.Field()
     delete_product = DeleteProduct.Field()
     update_product = UpdateProduct.Field()
     activate_product = ActivateProduct.Field()
 
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+class Subscription(graphene.ObjectType):
+    price_updated = graphene.Field(
+        PriceUpdateType,
+        product_id=graphene.ID(required=True),
+        description="Новые цены лота, поток завершается с закрытием лота",
+    )
+    lot_closed = graphene.Field(
+        LotClosedType,
+        product_id=graphene.ID(required=True),
+        description="Закрытие лота",
+    )
+
+    def resolve_price_updated(self, info, product_id):
+        """
+        Подписка на цену лота
+        """
+        input: IdInput = IdInput(id=product_id)
+        return observe_product_events(input=input, event_type=EVENT_PRICE)
+
+    def resolve_lot_closed(self, info, product_id):
+        """
+        Подписка на закрытие лота
+        """
+        input: IdInput = IdInput(id=product_id)
+        return observe_product_events(input=input, event_type=EVENT_CLOSED)
+
+
+schema = graphene.Schema(
+    query=Query, mutation=Mutation, subscription=Subscription
+)
@@ -0,0 +1,260 @@
+"""
+Server-Sent Events для наблюдателей лотов: цена и закрытие
+
+Под ASGI поток держит само соединение, в базу ходим один раз на снимок
+при подключении, дальше события приходят из общей подписки pub/sub
+процесса. Медленному клиенту копим только последнее событие каждого
+вида по каждому лоту, поэтому память соединения ограничена числом лотов.
+
+Без ASGI (WSGI) отдаем только снимок и retry, клиент переподключится.
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.http import HttpRequest, HttpResponse, QueryDict
+
+from auction.models import Product
+from auction.models.product import ProductStatus
+from auction.pubsub import EVENT_CLOSED, EVENT_PRICE, Event, PubSubFactory
+
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+CONTENT_TYPE: str = "text/event-stream"
+HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"content-type", CONTENT_TYPE.encode()),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),  # nginx не буферизует поток
+]
+
+ACTIVE_STATUSES = (ProductStatus.ACTIVE, ProductStatus.INACTIVE)
+
+
+def parse_product_ids(query: QueryDict) -> Optional[List[int]]:
+    """ id лотов из ?product=1&product=2, None - неверный запрос """
+    values: List[str] = query.getlist("product")
+
+    if not values or len(values) > settings.SSE_MAX_PRODUCTS:
+        return None
+
+    if not all(value.isdigit() for value in values):
+        return None
+
+    return sorted({int(value) for value in values})
+
+
+def get_snapshot(product_ids: List[int]) -> List[Event]:
+    """ текущая цена и закрытие лотов одним запросом """
+    events: List[Event] = []
+
+    for product in Product.objects.filter(id__in=product_ids).only(
+        "id", "status", "start_price", "current_price"
+    ):
+        events.append(
+            {
+                "type": EVENT_PRICE,
+                "product_id": product.id,
+                "price": str(product.get_final_bid_price()),
+            }
+        )
+
+        if product.status not in ACTIVE_STATUSES:
+            events.append(
+                {
+                    "type": EVENT_CLOSED,
+                    "product_id": product.id,
+                    "status": product.status,
+                }
+            )
+
+    return events
+
+
+def format_event(event: Event) -> bytes:
+    data: Dict[str, Any] = {
+        key: value for key, value in event.items() if key != "type"
+    }
+    return f"event: {event['type']}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+def format_retry() -> bytes:
+    return f"retry: {settings.SSE_RETRY_MS}\n\n".encode()
+
+
+class ProductEventsStream:
+    """
+    события лотов одного соединения
+
+    новое событие заменяет неотправленное событие того же вида по лоту,
+    поэтому при медленном клиенте он получит только последнюю цену
+    """
+
+    def __init__(self, product_ids: List[int]) -> None:
+        self.product_ids = product_ids
+        self.loop = asyncio.get_event_loop()
+        self.pending: Dict[Tuple[int, str], Event] = {}
+        self.ready = asyncio.Event()
+        self.closed: Set[int] = set()
+
+    def listener(self, event: Event) -> None:
+        """ вызывается из потока pub/sub """
+        self.loop.call_soon_threadsafe(self.push, event)
+
+    def push(self, event: Event, replace: bool = True) -> None:
+        key: Tuple[int, str] = (event["product_id"], event["type"])
+
+        if not replace and key in self.pending:
+            return
+
+        self.pending[key] = event
+        self.ready.set()
+
+    def take(self) -> List[Event]:
+        events: List[Event] = list(self.pending.values())
+        self.pending.clear()
+        self.ready.clear()
+
+        for event in events:
+            if event["type"] == EVENT_CLOSED:
+                self.closed.add(event["product_id"])
+
+        return events
+
+    @property
+    def finished(self) -> bool:
+        """ все лоты закрыты, больше событий не будет """
+        return self.closed.issuperset(self.product_ids)
+
+
+async def send_response(send: Send, status: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def wait_disconnect(receive: Receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+def load_snapshot(product_ids: List[int]) -> List[Event]:
+    """
+    снимок для ASGI потока, который идет мимо обработчика django:
+    сигналы цикла запроса закрывают протухшие соединения с базой
+    """
+    request_started.send(sender=product_events_asgi)
+    try:
+        return get_snapshot(product_ids)
+    finally:
+        request_finished.send(sender=product_events_asgi)
+
+
+async def product_events_asgi(
+    scope: Message, receive: Receive, send: Send
+) -> None:
+    """ ASGI поток событий лотов """
+    if scope["method"] != "GET":
+        await send_response(send, 405, b"Method not allowed")
+        return
+
+    product_ids = parse_product_ids(
+        QueryDict(scope.get("query_string", b"").decode())
+    )
+    pubsub = PubSubFactory.get_pubsub()
+
+    if product_ids is None:
+        await send_response(send, 400, b"Wrong product")
+        return
+
+    if pubsub is None:
+        await send_response(send, 503, b"Events are disabled")
+        return
+
+    stream = ProductEventsStream(product_ids)
+    # подписываемся до снимка, чтобы не потерять события между ними
+    unsubscribe = pubsub.subscribe(product_ids, stream.listener)
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+
+    try:
+        snapshot: List[Event] = await sync_to_async(load_snapshot)(product_ids)
+        for event in snapshot:
+            # события из pub/sub новее снимка
+            stream.push(event, replace=False)
+
+        await send(
+            {"type": "http.response.start", "status": 200, "headers": HEADERS}
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": format_retry(),
+                "more_body": True,
+            }
+        )
+
+        while not disconnect.done() and not stream.finished:
+            ready = asyncio.ensure_future(stream.ready.wait())
+            await asyncio.wait(
+                [ready, disconnect],
+                timeout=settings.SSE_KEEPALIVE,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            ready.cancel()
+
+            if disconnect.done():
+                break
+
+            body: bytes = b"".join(
+                format_event(event) for event in stream.take()
+            )
+            # комментарий держит соединение живым через прокси
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": body or b": keepalive\n\n",
+                    "more_body": True,
+                }
+            )
+
+        if not disconnect.done():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        unsubscribe()
+        disconnect.cancel()
+
+
+def product_events(request: HttpRequest) -> HttpResponse:
+    """
+    События лотов (SSE): ?product=1&product=2
+
+    под ASGI запрос обрабатывает product_events_asgi,
+    здесь - только снимок для WSGI
+    """
+    if request.method != "GET":
+        return HttpResponse("Method not allowed", status=405)
+
+    product_ids = parse_product_ids(request.GET)
+
+    if product_ids is None:
+        return HttpResponse("Wrong product", status=400)
+
+    body: bytes = format_retry() + b"".join(
+        format_event(event) for event in get_snapshot(product_ids)
+    )
+    response = HttpResponse(body, content_type=CONTENT_TYPE)
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+# core.asgi отдает запрос этому приложению в обход Django
+product_events.asgi = product_events_asgi  # type: ignore
@@ -1,10 +1,13 @@
 from datetime import datetime
 from decimal import Decimal
+from enum import Enum
 from typing import Any, Dict, Optional
 
+from django.conf import settings
 from pydantic import BaseModel, validator
 
 from auction.models import Client
+from auction.models.product import ProductStatus
 
 
 def _is_positive(v: Decimal, msg: str) -> Decimal:
@@ -38,6 +41,20 @@ class BidInput(Structure):
         return _is_id(v, "id must be positive")
 
 
+class ProxyBidInput(Structure):
+    client: Client
+    max_price: Decimal
+    product_id: int
+
+    @validator("max_price")
+    def check_max_price(cls, v: Decimal) -> Decimal:
+        return _is_positive(v, "max_price must be greater than 0")
+
+    @validator("product_id")
+    def check_product_id(cls, v: int) -> int:
+        return _is_id(v, "id must be positive")
+
+
 class ProductInput(Structure):
     seller: Client
     name: str
@@ -46,6 +63,7 @@ class ProductInput(Structure):
     buy_price: Optional[Decimal]
     end_date: datetime
     start_date: datetime
+    soft_close: bool = False
 
     @validator("start_price")
     def check_start_price(cls, v: Decimal) -> Decimal:
@@ -82,6 +100,7 @@ class ProductUpdateInput(Structure):
     buy_price: Optional[Decimal]
     end_date: Optional[datetime]
     start_date: Optional[datetime]
+    soft_close: Optional[bool]
 
     # TODO check name and desc
     @validator("product_id")
@@ -128,11 +147,72 @@ class ProductActionInput(Structure):
     product_id: int
 
 
+class ProductFilterInput(Structure):
+    """ Фильтры листинга товаров """
+
+    status: Optional[str]
+    seller_id: Optional[int]
+    price_from: Optional[Decimal]
+    price_to: Optional[Decimal]
+    ending_before: Optional[datetime]
+
+    @validator("status")
+    def check_status(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and v not in ProductStatus.values:
+            raise ValueError("unknown status")
+        return v
+
+
+class ProductListOrder(str, Enum):
+    """ Сортировка листинга товаров по курсору """
+
+    ID = "id"
+    END_DATE = "end_date"
+
+
 class PageListInput(Structure):
     """ Тип для для листинга с паджинацией, без авторизации """
 
     page: int
     page_size: int
+    filters: ProductFilterInput = ProductFilterInput()
+
+
+class CursorInput(Structure):
+    """ Базовый тип для страниц по курсору (keyset) """
+
+    first: int
+    after: Optional[str]
+    filters: ProductFilterInput = ProductFilterInput()
+
+    @validator("first")
+    def check_first(cls, v: int) -> int:
+        if not 0 < v <= settings.PRODUCT_LIST_MAX_FIRST:
+            raise ValueError(
+                f"first must be from 1 to {settings.PRODUCT_LIST_MAX_FIRST}"
+            )
+        return v
+
+
+class CursorListInput(CursorInput):
+    """ Тип для листинга по курсору (keyset), без авторизации """
+
+    order: ProductListOrder = ProductListOrder.ID
+
+
+class SearchInput(CursorInput):
+    """ Тип для полнотекстового поиска товаров, без авторизации """
+
+    query: str
+
+    @validator("query")
+    def check_query(cls, v: str) -> str:
+        v = v.strip()
+        if not v:
+            raise ValueError("query must not be empty")
+        if len(v) > settings.PRODUCT_SEARCH_MAX_LENGTH:
+            raise ValueError("query is too long")
+        return v
 
 
 class IdInput(Structure):
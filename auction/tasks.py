@@ -2,8 +2,11 @@ import logging
 from typing import TYPE_CHECKING
 
 from django.apps import apps
+from django.conf import settings
 
+from auction.order_book.order_book_factory import OrderBookFactory
 from core.celery import app
+from core.metrics import refresh_gauges
 
 if TYPE_CHECKING:
     from auction.models import Product
@@ -33,15 +36,35 @@ def deal_finalize(deal_id):
     return deal.finalize()
 
 
-@app.task(bind=True, max_retries=1200)
-def product_try_to_make_a_deal(self, product_id):
-    try:
-        product_model = apps.get_model("auction", "Product")
-        product: Product = product_model.objects.get(id=product_id)
-        if product.is_ready_to_make_a_deal():
-            product.make_a_deal()
-        else:
-            raise Exception("Product not ready yet")
-    except Exception as exc:
-        logger.warning(f"Failed make a deal: {exc}")
-        raise self.retry(exc=exc, countdown=5)
+@app.task()
+def close_due_products():
+    """
+    закрываем все лоты, время которых вышло,
+    запускается по расписанию раз в AUCTION_CLOSER_TICK
+    """
+    product_model = apps.get_model("auction", "Product")
+    closed: int = 0
+
+    while True:
+        deals = product_model.close_due_products()
+        closed += len(deals)
+
+        if len(deals) < settings.AUCTION_CLOSER_BATCH:
+            return closed
+
+
+@app.task()
+def order_book_flush():
+    """ записываем в базу ставки, принятые в order book """
+    order_book = OrderBookFactory.get_order_book()
+    if order_book is not None:
+        return order_book.flush()
+
+
+@app.task()
+def refresh_metrics():
+    """
+    считаем метрики с запросами к базе для /metrics,
+    запускается по расписанию раз в METRICS_REFRESH_INTERVAL
+    """
+    refresh_gauges()
@@ -3,6 +3,8 @@ from decimal import Decimal
 
 from django.utils import timezone
 
+from auction.models.product import ProductStatus
+
 email = "emailfortest@test.ru"
 password = "password"
 email_seller = "seller@test.ru"
@@ -17,3 +19,5 @@ product_params = {
     "start_date": timezone.now(),
     "end_date": timezone.now() + timedelta(7),
 }
+# ставки принимаются только по активным лотам
+active_product_params = {**product_params, "status": ProductStatus.ACTIVE}
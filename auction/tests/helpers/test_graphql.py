@@ -3,20 +3,30 @@ from decimal import Decimal
 from unittest import mock
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 
 from auction.helpers import graphql as graphql_helper
-from auction.models import Bid, Client, Product
+from auction.models import Bid, Client, Product, ProxyBid
 from auction.models.product import ProductStatus
+from auction.order_book.order_book_factory import OrderBookFactory
 from auction.structures.graphql import (
     BidInput,
+    CursorListInput,
+    IdInput,
+    PageListInput,
     ProductActionInput,
+    ProductFilterInput,
     ProductInput,
+    ProductListOrder,
     ProductUpdateInput,
+    ProxyBidInput,
+    SearchInput,
 )
 from auction.tests.fixtures import (
+    active_product_params,
     amount,
+    amount_100,
     email,
     email_seller,
     password,
@@ -24,6 +34,7 @@ from auction.tests.fixtures import (
     product_params,
 )
 from core.errors import CodeError, GenericException
+from core.metrics import sample_value
 
 
 class HelperGraphqlCreateBidTestCase(TestCase):
@@ -32,7 +43,7 @@ class HelperGraphqlCreateBidTestCase(TestCase):
     def setUp(self):
         self.client = Client.objects.create_user(email, password)
         self.seller = Client.objects.create_user(email_seller, password_seller)
-        self.product_params = {"seller": self.seller, **product_params}
+        self.product_params = {"seller": self.seller, **active_product_params}
         self.product = Product.objects.create(**self.product_params)
 
     @mock.patch("auction.models.Bid.post_save", return_value=True)
@@ -49,6 +60,37 @@ class HelperGraphqlCreateBidTestCase(TestCase):
         self.assertEqual(bid.price, amount)
         mock_post_save.assert_called_once_with()
 
+    @mock.patch("auction.models.Bid.post_save")
+    @mock.patch("auction.models.ProxyBid.resolve")
+    def test_create_bid_proxy_bids_error(self, mock_resolve, mock_post_save):
+        """ accepted bid should be returned if proxy bids failed """
+        mock_resolve.side_effect = Exception("Test Exception")
+        bid_input = BidInput(
+            client=self.client, price=amount, product_id=self.product.id
+        )
+
+        with self.assertLogs("auction.helpers.graphql", "WARNING"):
+            bid = graphql_helper.create_bid(bid_input=bid_input)
+
+        self.assertEqual(Bid.objects.get(), bid)
+
+    @mock.patch("auction.models.Bid.post_save")
+    def test_create_bid_lower_price(self, mock_post_save):
+        """ should reject bid lower than current price """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+        bid_input = BidInput(
+            client=self.client, price=amount - 1, product_id=self.product.id
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.ALREADY_HAS_HIGHER_BID.message
+        ):
+            graphql_helper.create_bid(bid_input=bid_input)
+
+        mock_post_save.assert_not_called()
+
     def test_create_bid_product_not_found(self):
         """ should raise product not found """
         bid_input = BidInput(client=self.client, price=amount, product_id=42)
@@ -58,6 +100,346 @@ class HelperGraphqlCreateBidTestCase(TestCase):
         ):
             graphql_helper.create_bid(bid_input=bid_input)
 
+    @mock.patch("auction.models.Bid.post_save")
+    def test_create_bid_metrics(self, mock_post_save):
+        """ should count accepted and rejected by code bids """
+        accepted = {"outcome": "accepted", "code": ""}
+        rejected = {"outcome": "rejected", "code": "ALREADY_HAS_HIGHER_BID"}
+        accepted_before = sample_value("auction_bids_total", accepted)
+        rejected_before = sample_value("auction_bids_total", rejected)
+        latency_before = sample_value("auction_bid_latency_seconds_count")
+        bid_input = BidInput(
+            client=self.client, price=amount, product_id=self.product.id
+        )
+
+        graphql_helper.create_bid(bid_input=bid_input)
+        with self.assertRaises(GenericException):
+            graphql_helper.create_bid(bid_input=bid_input)
+
+        self.assertEqual(
+            sample_value("auction_bids_total", accepted) - accepted_before, 1
+        )
+        self.assertEqual(
+            sample_value("auction_bids_total", rejected) - rejected_before, 1
+        )
+        self.assertEqual(
+            sample_value("auction_bid_latency_seconds_count") - latency_before,
+            2,
+        )
+
+
+@mock.patch("auction.models.Bid.post_save")
+class HelperGraphqlSetProxyBidTestCase(TransactionTestCase):
+    """Set proxy bid, order book is flushed outside of transaction"""
+
+    serialized_rollback = True
+
+    def setUp(self):
+        OrderBookFactory.instances.clear()
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.rival = Client.objects.create_user("rival@test.ru", password)
+        self.product = Product.objects.create(
+            seller=self.seller, **product_params
+        )
+        self.product.activate()
+
+    def set_proxy_bid(self, max_price):
+        return graphql_helper.set_proxy_bid(
+            ProxyBidInput(
+                client=self.client,
+                max_price=max_price,
+                product_id=self.product.id,
+            )
+        )
+
+    def create_bid(self, price):
+        return graphql_helper.create_bid(
+            BidInput(client=self.rival, price=price, product_id=self.product.id)
+        )
+
+    def test_set_proxy_bid(self, mock_post_save):
+        """ proxy should outbid leader and defend against new bids """
+        self.create_bid(amount)
+
+        bids = self.set_proxy_bid(Decimal(18))
+
+        self.assertEqual(
+            [(bid.client, bid.price) for bid in bids],
+            [(self.client, amount + 1)],
+        )
+
+        self.create_bid(Decimal(15))
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(product.current_price, Decimal(16))
+        self.assertEqual(product.leading_bid.client, self.client)
+        self.assertEqual(product.bid_count, 4)
+
+        self.create_bid(Decimal(19))
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(product.current_price, Decimal(19))
+        self.assertEqual(product.leading_bid.client, self.rival)
+
+    def test_set_proxy_bid_update(self, mock_post_save):
+        """ should replace maximum of client """
+        self.set_proxy_bid(Decimal(15))
+        self.set_proxy_bid(Decimal(18))
+
+        self.assertEqual(
+            list(ProxyBid.objects.values_list("client", "max_price")),
+            [(self.client.id, Decimal(18))],
+        )
+        self.assertEqual(Bid.objects.count(), 1)
+
+    def test_set_proxy_bid_lower_price(self, mock_post_save):
+        """ should reject maximum not higher than current price """
+        self.create_bid(amount)
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.ALREADY_HAS_HIGHER_BID.message
+        ):
+            self.set_proxy_bid(amount)
+
+    def test_set_proxy_bid_lower_than_start_price(self, mock_post_save):
+        """ should reject maximum lower than start price of lot """
+        with self.assertRaisesMessage(
+            GenericException, CodeError.LOWER_THAN_START_PRICE.message
+        ):
+            self.set_proxy_bid(product_params["start_price"] - 1)
+
+        self.assertFalse(ProxyBid.objects.exists())
+        self.assertFalse(Bid.objects.exists())
+
+    def test_set_proxy_bid_wrong_status(self, mock_post_save):
+        """ should accept proxy bids only for active lots """
+        Product.objects.filter(id=self.product.id).update(
+            status=ProductStatus.SOLD
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_STATUS.message
+        ):
+            self.set_proxy_bid(Decimal(18))
+
+    def test_set_proxy_bid_resolve_error(self, mock_post_save):
+        """ should not keep proxy bid if it could not be resolved """
+        Product.objects.filter(id=self.product.id).update(
+            soft_close=True, end_date=timezone.now() - timedelta(seconds=1)
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.LOT_CLOSED.message
+        ):
+            self.set_proxy_bid(Decimal(18))
+
+        self.assertFalse(ProxyBid.objects.exists())
+        self.assertFalse(Bid.objects.exists())
+
+    @override_settings(AUCTION_ORDER_BOOK="memory")
+    def test_set_proxy_bid_order_book(self, mock_post_save):
+        """ should move lot out of order book to the database path """
+        order_book = OrderBookFactory.get_order_book()
+        order_book.open_lot(self.product)
+        self.create_bid(amount)
+
+        self.set_proxy_bid(Decimal(18))
+
+        self.assertIsNone(order_book.get_price(self.product.id))
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(product.current_price, amount + 1)
+        self.assertEqual(product.leading_bid.client, self.client)
+
+
+class HelperGraphqlCreateBidsTestCase(TestCase):
+    """Create bids batch"""
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.product_params = {"seller": self.seller, **active_product_params}
+        self.product = Product.objects.create(**self.product_params)
+        self.other_product = Product.objects.create(**self.product_params)
+
+    @mock.patch("auction.models.Bid.post_save")
+    def test_create_bids(self, mock_post_save):
+        """ should place every bid independently with per item results """
+        results = graphql_helper.create_bids(
+            self.client,
+            [
+                (self.product.id, amount),
+                (self.product.id, amount - 1),
+                (self.other_product.id, amount_100),
+                (42, amount),
+                (self.product.id, Decimal(-1)),
+            ],
+        )
+
+        self.assertEqual(
+            [result.product_id for result in results],
+            [self.product.id, self.product.id, self.other_product.id, 42]
+            + [self.product.id],
+        )
+        self.assertEqual(results[0].bid.price, amount)
+        self.assertEqual(results[2].bid.price, amount_100)
+        self.assertEqual(
+            [result.error and result.error.message for result in results],
+            [
+                None,
+                CodeError.ALREADY_HAS_HIGHER_BID.message,
+                None,
+                CodeError.PRODUCT_NOT_FOUND.message,
+                CodeError.WRONG_BID_INPUT.message,
+            ],
+        )
+        self.assertEqual(Bid.objects.count(), 2)
+        self.assertEqual(mock_post_save.call_count, 2)
+
+    def test_create_bids_products_query(self):
+        """ should load products of batch with one query """
+        items = [(self.product.id, amount), (self.other_product.id, amount)]
+
+        with mock.patch(
+            "auction.helpers.graphql.create_bid"
+        ) as mock_create_bid, self.assertNumQueries(1):
+            graphql_helper.create_bids(self.client, items)
+
+        self.assertEqual(
+            [call.kwargs["product"] for call in mock_create_bid.call_args_list],
+            [self.product, self.other_product],
+        )
+
+    @override_settings(BIDS_BATCH_MAX_SIZE=1)
+    def test_create_bids_too_many(self):
+        """ should reject batch over the limit """
+        with self.assertRaisesMessage(
+            GenericException, CodeError.TOO_MANY_BIDS.message
+        ):
+            graphql_helper.create_bids(
+                self.client, [(self.product.id, amount)] * 2
+            )
+
+
+@override_settings(AUCTION_ORDER_BOOK="memory")
+class HelperGraphqlCreateBidOrderBookTestCase(TransactionTestCase):
+    """Create bid through order book, flushed outside of transaction"""
+
+    serialized_rollback = True
+
+    def setUp(self):
+        OrderBookFactory.instances.clear()
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.product_params = {"seller": self.seller, **product_params}
+        self.product = Product.objects.create(**self.product_params)
+        self.product.activate()
+
+    def create_bid(self, price):
+        bid_input = BidInput(
+            client=self.client, price=price, product_id=self.product.id
+        )
+        return graphql_helper.create_bid(bid_input=bid_input)
+
+    def test_create_bid_write_behind(self):
+        """ bid should be persisted only after flush """
+        bid = self.create_bid(amount)
+
+        self.assertIsNone(bid.id)
+        self.assertEqual(Bid.objects.count(), 0)
+        self.assertEqual(
+            graphql_helper.get_product_price(IdInput(id=self.product.id)),
+            amount,
+        )
+
+        OrderBookFactory.get_order_book().flush()
+
+        self.assertEqual(Bid.objects.filter(price=amount).count(), 1)
+
+    def test_create_bid_lower_price(self):
+        """ should reject bid lower than current price """
+        self.create_bid(amount)
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.ALREADY_HAS_HIGHER_BID.message
+        ):
+            self.create_bid(amount - 1)
+
+    @mock.patch("auction.models.Bid.post_save")
+    def test_create_bid_buy_price(self, mock_post_save):
+        """ should close lot when buy price is reached """
+        self.create_bid(product_params["buy_price"])
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(product.current_price, product_params["buy_price"])
+        self.assertIsNone(
+            OrderBookFactory.get_order_book().get_price(self.product.id)
+        )
+        mock_post_save.assert_called_once_with()
+
+    def test_create_bid_not_open(self):
+        """ should save bid directly if lot is not in order book """
+        OrderBookFactory.get_order_book().close_lot(self.product.id)
+
+        bid = self.create_bid(amount)
+
+        self.assertIsNotNone(bid.id)
+
+    def test_update_product_end_date(self):
+        """ should reopen lot with new end date after flush of its bids """
+        self.create_bid(amount)
+        end_date = timezone.now() + timedelta(days=2)
+
+        graphql_helper.update_product(
+            ProductUpdateInput(
+                product_id=self.product.id,
+                seller=self.seller,
+                end_date=end_date,
+            )
+        )
+
+        order_book = OrderBookFactory.get_order_book()
+        self.assertEqual(Bid.objects.filter(price=amount).count(), 1)
+        self.assertEqual(order_book.lots[self.product.id].end_date, end_date)
+        self.assertEqual(order_book.get_price(self.product.id), amount)
+        self.assertEqual(order_book.get_bid_count(self.product.id), 1)
+
+    def test_update_product_proxy_bid(self):
+        """ should keep lot with proxy bids out of order book """
+        ProxyBid.objects.create(
+            client=self.client, product=self.product, max_price=amount
+        )
+        Product.objects.filter(id=self.product.id).update(has_proxy_bids=True)
+
+        graphql_helper.update_product(
+            ProductUpdateInput(
+                product_id=self.product.id,
+                seller=self.seller,
+                end_date=timezone.now() + timedelta(days=2),
+            )
+        )
+
+        self.assertIsNone(
+            OrderBookFactory.get_order_book().get_price(self.product.id)
+        )
+
+    def test_update_product_description(self):
+        """ should keep lot and pending bids if order book fields unchanged """
+        self.create_bid(amount)
+
+        graphql_helper.update_product(
+            ProductUpdateInput(
+                product_id=self.product.id,
+                seller=self.seller,
+                description="new product desc",
+            )
+        )
+
+        self.assertEqual(Bid.objects.count(), 0)
+        self.assertEqual(
+            OrderBookFactory.get_order_book().get_price(self.product.id), amount
+        )
+
 
 class HelperGraphqlCreateProductTestCase(TestCase):
     """Create product"""
@@ -143,8 +525,7 @@ class HelperGraphqlActivateProductTestCase(TestCase):
         self.product_params = {"seller": self.seller, **product_params}
         self.product = Product.objects.create(**self.product_params)
 
-    @mock.patch("auction.models.product.product_try_to_make_a_deal.apply_async")
-    def test_activate_product_success(self, mock_apply_async):
+    def test_activate_product_success(self):
         """ should change status to deleted """
         product_action_input = ProductActionInput(
             product_id=self.product.id, seller=self.seller
@@ -285,6 +666,261 @@ class HelperGraphqlUpdateProductTestCase(TestCase):
             graphql_helper.update_product(product_update_input)
 
 
+class HelperGraphqlProductKeysetPageTestCase(TestCase):
+    """Keyset page of products"""
+
+    def setUp(self):
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.products = [
+            Product.objects.create(seller=self.seller, **product_params)
+            for _ in range(5)
+        ]
+
+    def test_get_product_keyset_page(self):
+        """ should seek after cursor without count """
+        cursor = graphql_helper.encode_product_cursor(self.products[1].id)
+        input = CursorListInput(first=2, after=cursor)
+
+        with self.assertNumQueries(1):
+            page = graphql_helper.get_product_keyset_page(input=input)
+
+        self.assertEqual(page.products, self.products[2:4])
+        self.assertTrue(page.has_next_page)
+        self.assertEqual(page.queryset.count(), 5)
+
+    def test_get_product_keyset_page_last(self):
+        """ should not have next page at the end """
+        input = CursorListInput(first=5)
+        page = graphql_helper.get_product_keyset_page(input=input)
+
+        self.assertEqual(page.products, self.products)
+        self.assertFalse(page.has_next_page)
+
+    def test_decode_product_cursor(self):
+        """ should decode encoded cursor """
+        cursor = graphql_helper.encode_product_cursor(42)
+        self.assertEqual(
+            graphql_helper.decode_product_cursor(cursor),
+            graphql_helper.ProductCursor(id=42),
+        )
+
+        end_date = timezone.now()
+        cursor = graphql_helper.encode_product_cursor(42, end_date)
+        self.assertEqual(
+            graphql_helper.decode_product_cursor(cursor),
+            graphql_helper.ProductCursor(id=42, end_date=end_date),
+        )
+
+    def test_decode_product_cursor_wrong(self):
+        """ should raise on foreign or broken cursor """
+        # мусор, "bid:42", "product:x", "product:42:x"
+        for cursor in ["!!!", "YmlkOjQy", "cHJvZHVjdDp4", "cHJvZHVjdDo0Mjp4"]:
+            with self.assertRaisesMessage(
+                GenericException, CodeError.WRONG_CURSOR.message
+            ):
+                graphql_helper.decode_product_cursor(cursor)
+
+    def test_cursor_list_input_first(self):
+        """ should limit size of page """
+        with self.assertRaises(ValueError):
+            CursorListInput(first=0)
+
+        with self.assertRaises(ValueError):
+            CursorListInput(first=1000)
+
+
+class HelperGraphqlProductFilterTestCase(TestCase):
+    """Product list filters"""
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        now = timezone.now()
+
+        self.active = Product.objects.create(
+            seller=self.seller,
+            **{
+                **product_params,
+                "status": ProductStatus.ACTIVE,
+                "end_date": now + timedelta(hours=1),
+            },
+        )
+        self.active_later = Product.objects.create(
+            seller=self.seller,
+            **{
+                **product_params,
+                "status": ProductStatus.ACTIVE,
+                "end_date": now + timedelta(hours=2),
+            },
+        )
+        self.sold = Product.objects.create(
+            seller=self.client,
+            **{**product_params, "status": ProductStatus.SOLD},
+        )
+        Bid.objects.create(
+            client=self.client, product=self.active_later, price=amount_100
+        )
+
+    def filter_products(self, **filters):
+        return list(
+            graphql_helper.filter_products(
+                ProductFilterInput(**filters)
+            ).order_by("id")
+        )
+
+    def test_filter_status(self):
+        """ should filter by status """
+        self.assertEqual(
+            self.filter_products(status=ProductStatus.ACTIVE),
+            [self.active, self.active_later],
+        )
+
+        with self.assertRaises(ValueError):
+            ProductFilterInput(status="unknown")
+
+    def test_filter_seller(self):
+        """ should filter by seller """
+        self.assertEqual(
+            self.filter_products(seller_id=self.client.id), [self.sold]
+        )
+
+    def test_filter_price(self):
+        """ should filter by current price or start price """
+        self.assertEqual(
+            self.filter_products(price_from=Decimal(50)), [self.active_later]
+        )
+        self.assertEqual(
+            self.filter_products(price_to=Decimal(50)),
+            [self.active, self.sold],
+        )
+
+    def test_filter_ending_before(self):
+        """ should filter by end date """
+        self.assertEqual(
+            self.filter_products(
+                status=ProductStatus.ACTIVE,
+                ending_before=timezone.now() + timedelta(minutes=90),
+            ),
+            [self.active],
+        )
+
+    def test_get_product_list_filters(self):
+        """ should apply filters to page list """
+        input = PageListInput(
+            page=1,
+            page_size=10,
+            filters=ProductFilterInput(status=ProductStatus.SOLD),
+        )
+        page = graphql_helper.get_product_list(input=input)
+        self.assertEqual(list(page), [self.sold])
+
+    def test_get_product_keyset_page_end_date(self):
+        """ should walk active lots by end date """
+        input = CursorListInput(
+            first=1,
+            order=ProductListOrder.END_DATE,
+            filters=ProductFilterInput(status=ProductStatus.ACTIVE),
+        )
+        page = graphql_helper.get_product_keyset_page(input=input)
+
+        self.assertEqual(page.products, [self.active])
+        self.assertTrue(page.has_next_page)
+
+        input.after = graphql_helper.get_product_cursor(
+            self.active, ProductListOrder.END_DATE
+        )
+        page = graphql_helper.get_product_keyset_page(input=input)
+
+        self.assertEqual(page.products, [self.active_later])
+        self.assertFalse(page.has_next_page)
+
+    def test_get_product_keyset_page_end_date_wrong_cursor(self):
+        """ should not accept id cursor for end date order """
+        input = CursorListInput(
+            first=1,
+            after=graphql_helper.encode_product_cursor(self.active.id),
+            order=ProductListOrder.END_DATE,
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_CURSOR.message
+        ):
+            graphql_helper.get_product_keyset_page(input=input)
+
+
+class HelperGraphqlSearchProductsTestCase(TestCase):
+    """Full text search"""
+
+    def setUp(self):
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+
+        def create(name, description):
+            return Product.objects.create(
+                seller=self.seller,
+                **{**product_params, "name": name, "description": description},
+            )
+
+        self.by_description = create("Лот", "Старинные часы с кукушкой")
+        self.by_name = create("Часы настенные", "Механизм в порядке")
+        self.english = create("Vintage watches", "Swiss watch collection")
+        self.other = create("Картина", "Масло, холст")
+
+    def search(self, query, **params):
+        input = SearchInput(query=query, **{"first": 10, **params})
+        return graphql_helper.search_products(input=input)
+
+    def test_search_russian(self):
+        """ should find by russian stems and rank name higher """
+        page = self.search("часов")
+        self.assertEqual(page.products, [self.by_name, self.by_description])
+
+    def test_search_english(self):
+        """ should find by english stems """
+        page = self.search("watch")
+        self.assertEqual(page.products, [self.english])
+
+    def test_search_pagination(self):
+        """ should walk results by cursor """
+        page = self.search("часы", first=1)
+        self.assertEqual(page.products, [self.by_name])
+        self.assertTrue(page.has_next_page)
+
+        cursor = graphql_helper.get_search_cursor(page.products[0])
+        page = self.search("часы", first=1, after=cursor)
+        self.assertEqual(page.products, [self.by_description])
+        self.assertFalse(page.has_next_page)
+        self.assertEqual(page.queryset.count(), 2)
+
+    def test_search_filters(self):
+        """ should apply product filters """
+        Product.objects.filter(id=self.by_name.id).update(
+            status=ProductStatus.ACTIVE
+        )
+        page = self.search(
+            "часы", filters=ProductFilterInput(status=ProductStatus.ACTIVE)
+        )
+        self.assertEqual(page.products, [self.by_name])
+
+    def test_search_vector_follows_changes(self):
+        """ trigger should update vector on name change """
+        self.other.name = "Настенные часы"
+        self.other.save()
+
+        self.assertIn(self.other, self.search("часы").products)
+
+    def test_search_wrong_cursor(self):
+        """ should not accept product cursor """
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_CURSOR.message
+        ):
+            self.search("часы", after=graphql_helper.encode_product_cursor(1))
+
+    def test_search_input(self):
+        """ should not accept empty query """
+        with self.assertRaises(ValueError):
+            SearchInput(query="  ", first=10)
+
+
 class DecoratorCatchProductNotFoundTestCase(TestCase):
     """ catch excepton """
 
@@ -1,15 +1,18 @@
+import threading
 from unittest import mock
 
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
 
 from auction.models import Bid, Client, Product
+from auction.models.product import ProductStatus
 from auction.tests.fixtures import (
+    active_product_params,
     amount,
     email,
     email_seller,
     password,
     password_seller,
-    product_params,
 )
 from core.errors import CodeError, GenericException
 
@@ -20,7 +23,7 @@ class ModelsBidTestCase(TestCase):
     def setUp(self):
         self.client = Client.objects.create_user(email, password)
         self.seller = Client.objects.create_user(email_seller, password_seller)
-        self.product_params = {"seller": self.seller, **product_params}
+        self.product_params = {"seller": self.seller, **active_product_params}
         self.product = Product.objects.create(**self.product_params)
         self.first_bid = Bid.objects.create(
             client=self.client, product=self.product, price=amount
@@ -80,6 +83,94 @@ class ModelsBidTestCase(TestCase):
                 client=self.client, product=self.product, price=amount
             )
 
+    def test_save_exception_keeps_bid_state(self):
+        """ rejected bid should not change bid state of product """
+        with self.assertRaises(GenericException):
+            Bid.objects.create(
+                client=self.client, product=self.product, price=amount
+            )
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(product.current_price, amount)
+        self.assertEqual(product.leading_bid, self.first_bid)
+        self.assertEqual(product.bid_count, 1)
+
+    def test_save_stale_product_exception(self):
+        """ should reject bid checked against stale product """
+        stale_product = Product.objects.get(id=self.product.id)
+        stale_product.current_price = None
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.ALREADY_HAS_HIGHER_BID.message
+        ):
+            Bid.objects.create(
+                client=self.client, product=stale_product, price=amount
+            )
+
+        self.assertEqual(Bid.objects.filter(product=self.product).count(), 1)
+
+    def test_save_sold_product_exception(self):
+        """ should reject and roll back bid on lot closed meanwhile """
+        # закрытие лота закоммичено, пока ставка ждала блокировку строки
+        Product.objects.filter(id=self.product.id).update(
+            status=ProductStatus.SOLD
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_STATUS.message
+        ):
+            Bid.objects.create(
+                client=self.client, product=self.product, price=amount + 1
+            )
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(Bid.objects.filter(product=product).count(), 1)
+        self.assertEqual(product.current_price, amount)
+        self.assertEqual(product.leading_bid, self.first_bid)
+        self.assertEqual(product.bid_count, 1)
+
+    def test_save_not_active_product_exception(self):
+        """ should reject bid on inactive and deleted lots by status """
+        for status in (ProductStatus.INACTIVE, ProductStatus.DELETED):
+            with self.subTest(status=status):
+                Product.objects.filter(id=self.product.id).update(
+                    status=status
+                )
+
+                with self.assertRaisesMessage(
+                    GenericException, CodeError.WRONG_STATUS.message
+                ):
+                    Bid.objects.create(
+                        client=self.client,
+                        product=self.product,
+                        price=amount + 1,
+                    )
+
+    def test_save_outbid_meanwhile_exception(self):
+        """ should reject bid outbid after product was loaded by price """
+        # более высокая ставка закоммичена, пока ставка ждала блокировку
+        Product.objects.filter(id=self.product.id).update(
+            current_price=amount + 2
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.ALREADY_HAS_HIGHER_BID.message
+        ):
+            Bid.objects.create(
+                client=self.client, product=self.product, price=amount + 1
+            )
+
+    def test_save_constant_number_of_queries(self):
+        """ checks of product should not query bids """
+        bid = Bid(client=self.client, product=self.product, price=amount + 1)
+
+        # savepoint, insert, update, release
+        with self.assertNumQueries(4):
+            bid.save()
+            self.assertFalse(self.product.is_buy_condition_meet())
+            self.assertEqual(self.product.get_final_bid(), bid)
+            self.assertEqual(self.product.get_final_bid_price(), amount + 1)
+
     @mock.patch("auction.models.Product.bid_posthook", return_value=True)
     def test_post_save(self, mock_bid_posthook):
         """ should call bid posthook from product """
@@ -96,3 +187,53 @@ class ModelsBidTestCase(TestCase):
         with self.assertLogs("auction.models.bid") as mock_log:
             self.first_bid.post_save()
             self.assertEqual(mock_log.output, [log_msg])
+
+
+class ModelsBidConcurrencyTestCase(TransactionTestCase):
+    """concurrent bids"""
+
+    # данные миграций (компания по умолчанию) восстанавливаются
+    serialized_rollback = True
+
+    threads = 8
+
+    def setUp(self):
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+        self.clients = [
+            Client.objects.create_user(f"bidder{i}@test.ru", password)
+            for i in range(self.threads)
+        ]
+
+    def test_only_one_of_equal_bids_accepted(self):
+        """ only one of concurrent equal bids should be placed """
+        barrier = threading.Barrier(self.threads)
+        results = []
+
+        def place(client):
+            product = Product.objects.get(id=self.product.id)
+            barrier.wait()
+            try:
+                Bid.objects.create(client=client, product=product, price=amount)
+                results.append(True)
+            except GenericException:
+                results.append(False)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=place, args=(client,))
+            for client in self.clients
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Bid.objects.filter(product=product).count(), 1)
+        self.assertEqual(product.bid_count, 1)
+        self.assertEqual(product.current_price, amount)
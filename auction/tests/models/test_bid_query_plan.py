@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+
+from auction.models import Bid, Client, Product
+from auction.tests.fixtures import (
+    email,
+    email_seller,
+    password,
+    password_seller,
+    product_params,
+)
+
+
+class BidQueryPlanTestCase(TestCase):
+    """
+    Планы горячих запросов по ставкам.
+
+    Таблица заполняется так, чтобы у планировщика был выбор,
+    и полный проход по таблице ставок считается регрессией.
+    """
+
+    products_count = 200
+    bids_per_product = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create_user(email, password)
+        seller = Client.objects.create_user(email_seller, password_seller)
+
+        Product.objects.bulk_create(
+            [
+                Product(seller=seller, **product_params)
+                for _ in range(cls.products_count)
+            ]
+        )
+        cls.products = list(Product.objects.all())
+
+        Bid.objects.bulk_create(
+            [
+                Bid(client=client, product=product, price=Decimal(price))
+                for product in cls.products
+                for price in range(1, cls.bids_per_product + 1)
+            ],
+            batch_size=5000,
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {Bid._meta.db_table}")
+
+        cls.product = cls.products[cls.products_count // 2]
+        cls.index_name = Bid._meta.indexes[0].name
+
+    def assertUsesBidIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotIn(f"Seq Scan on {Bid._meta.db_table}", plan)
+        self.assertIn(self.index_name, plan)
+
+    def test_top_bid(self):
+        """ top bid of product should use composite index """
+        queryset = self.product.bid_set.order_by("-price")[:1]
+        self.assertUsesBidIndex(queryset)
+
+    def test_higher_bids(self):
+        """ bids higher than price should use composite index """
+        queryset = Bid.objects.filter(
+            product=self.product, price__gte=Decimal(90)
+        )
+        self.assertUsesBidIndex(queryset)
+
+    def test_bids_of_product(self):
+        """ bid history of product should use composite index """
+        queryset = self.product.bid_set.order_by("-price")
+        self.assertUsesBidIndex(queryset)
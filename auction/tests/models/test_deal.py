@@ -3,8 +3,10 @@ from unittest.mock import Mock, patch
 
 from django.test import TestCase
 
-from auction.models import Client, Deal, Product
+from auction.models import Bid, Client, Deal, Product
+from auction.models.product import ProductStatus
 from auction.tests.fixtures import (
+    amount,
     amount_100,
     email,
     email_seller,
@@ -12,7 +14,9 @@ from auction.tests.fixtures import (
     password_seller,
     product_params,
 )
-from billing.models import Bill
+from billing.meta import BillStatus
+from billing.models import Balance, Bill, Transaction
+from core.errors import CodeError, GenericException
 
 
 class ModelDealTestCase(TestCase):
@@ -108,3 +112,94 @@ class ModelDealTestCase(TestCase):
         value = self.deal.async_finalize()
         self.assertEqual(value, None)
         mock_deal_finalize_delay.assert_called_once_with(deal_id=self.deal.id)
+
+
+class ModelDealBulkSettleTestCase(TestCase):
+    """Deal.bulk_settle"""
+
+    def setUp(self):
+        self.buyer = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.products = []
+
+        for _ in range(3):
+            product = Product.objects.create(
+                seller=self.seller,
+                **{**product_params, "status": ProductStatus.ACTIVE},
+            )
+            Bid.objects.create(client=self.buyer, product=product, price=amount)
+            self.products.append(product)
+
+    def get_products(self):
+        return list(
+            Product.objects.filter(
+                id__in=[product.id for product in self.products]
+            ).select_related("seller__company", "leading_bid__client__company")
+        )
+
+    def test_bulk_settle(self):
+        """ should create deals, bills and transactions in batch """
+        products = self.get_products()
+        Balance.objects.create(client=self.buyer)
+        Balance.objects.create(client=self.seller)
+
+        # savepoint, статус товаров, вставки сделок, счетов, связей,
+        # транзакций, балансы покупателя и продавца, статус счетов,
+        # release savepoint
+        with self.assertNumQueries(10):
+            deals = Deal.bulk_settle(products)
+
+        self.assertEqual(len(deals), 3)
+        self.assertEqual(
+            Product.objects.filter(status=ProductStatus.SOLD).count(), 3
+        )
+        self.assertEqual(Bill.objects.count(), 9)
+        self.assertEqual(
+            Bill.objects.filter(status=BillStatus.ACTIVATED).count(), 9
+        )
+        self.assertEqual(Transaction.objects.count(), 9)
+
+        deal = Deal.objects.get(product=self.products[0])
+        self.assertEqual(deal.buyer, self.buyer)
+        self.assertEqual(deal.amount, amount)
+        self.assertEqual(
+            [bill.bill_type for bill in deal.bills.order_by("id")],
+            ["sell", "proceeds", "commission"],
+        )
+        self.assertEqual(Transaction.balance(self.buyer), -amount * 3)
+
+    def test_bulk_settle_empty(self):
+        """ should do nothing without products """
+        with self.assertNumQueries(0):
+            self.assertEqual(Deal.bulk_settle([]), [])
+
+    @patch("billing.models.Bill.bulk_activate")
+    def test_bulk_settle_rollback(self, mock_bulk_activate):
+        """ should not leave partial settlement """
+        mock_bulk_activate.side_effect = Exception("Test Exception")
+
+        with self.assertRaises(Exception):
+            Deal.bulk_settle(self.get_products())
+
+        self.assertEqual(Deal.objects.count(), 0)
+        self.assertEqual(Bill.objects.count(), 0)
+        self.assertEqual(
+            Product.objects.filter(status=ProductStatus.ACTIVE).count(), 3
+        )
+
+    def test_bulk_settle_not_active(self):
+        """ should not sell lots which changed status after load """
+        products = self.get_products()
+        Product.objects.filter(id=self.products[0].id).update(
+            status=ProductStatus.DELETED
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_STATUS.message
+        ):
+            Deal.bulk_settle(products)
+
+        self.assertEqual(Deal.objects.count(), 0)
+        self.assertEqual(
+            Product.objects.filter(status=ProductStatus.ACTIVE).count(), 2
+        )
@@ -4,12 +4,15 @@ from typing import Dict
 from unittest import mock
 
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.utils import timezone
 
 from auction.models import Bid, Client, Deal, Product
 from auction.models.product import ProductStatus
+from auction.order_book.order_book_factory import OrderBookFactory
 from auction.tests.fixtures import (
+    active_product_params,
     amount,
     email,
     email_seller,
@@ -17,6 +20,7 @@ from auction.tests.fixtures import (
     password_seller,
     product_params,
 )
+from billing.models import Balance
 from core.errors import CodeError, GenericException
 
 
@@ -28,7 +32,10 @@ class ModelsProductTestCase(TestCase):
         self.seller: Client = Client.objects.create_user(
             email_seller, password_seller
         )
-        self.product_params: Dict = {"seller": self.seller, **product_params}
+        self.product_params: Dict = {
+            "seller": self.seller,
+            **active_product_params,
+        }
         self.product: Product = Product.objects.create(**self.product_params)
 
     def test_get_final_bid_price_should_return_start_price(self):
@@ -68,6 +75,92 @@ class ModelsProductTestCase(TestCase):
 
         self.assertIsNone(final_bid)
 
+    def test_register_bid(self):
+        """ should keep bid state in instance and in db """
+        bid = Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+        product_from_db = Product.objects.get(id=self.product.id)
+
+        for product in [self.product, product_from_db]:
+            self.assertEqual(product.current_price, amount)
+            self.assertEqual(product.leading_bid, bid)
+            self.assertEqual(product.bid_count, 1)
+
+    def test_save_should_not_overwrite_bid_state(self):
+        """ stale instance should not reset bid state """
+        stale_product = Product.objects.get(id=self.product.id)
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+
+        stale_product.name = "new name"
+        stale_product.save()
+
+        product_from_db = Product.objects.get(id=self.product.id)
+        self.assertEqual(product_from_db.name, "new name")
+        self.assertEqual(product_from_db.current_price, amount)
+        self.assertEqual(product_from_db.bid_count, 1)
+
+    def test_save_should_not_overwrite_status(self):
+        """ stale instance should not return sold lot to active """
+        stale_product = Product.objects.get(id=self.product.id)
+        Product.objects.filter(id=self.product.id).update(
+            status=ProductStatus.SOLD
+        )
+
+        stale_product.name = "new name"
+        stale_product.save()
+
+        product_from_db = Product.objects.get(id=self.product.id)
+        self.assertEqual(product_from_db.name, "new name")
+        self.assertEqual(product_from_db.status, ProductStatus.SOLD)
+
+    def test_save_new_product_without_bid_state(self):
+        """ copy of product should not carry bid state """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+
+        self.product.id = None
+        self.product.save()
+
+        self.assertIsNone(self.product.current_price)
+        self.assertIsNone(self.product.leading_bid)
+        self.assertEqual(self.product.bid_count, 0)
+
+    def test_save_new_product_with_id(self):
+        """ new instance with explicit id should be inserted """
+        product = Product(
+            id=self.product.id + 1000,
+            seller=self.seller,
+            **active_product_params,
+        )
+
+        product.save()
+
+        self.assertTrue(Product.objects.filter(id=product.id).exists())
+
+    def test_refresh_bid_state(self):
+        """ should recalculate bid state from bids """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+        bid2 = Bid.objects.create(
+            client=self.client, product=self.product, price=amount + 1
+        )
+        Product.objects.filter(id=self.product.id).update(
+            current_price=None, leading_bid=None, bid_count=0
+        )
+
+        product = Product.objects.get(id=self.product.id)
+        product.refresh_bid_state()
+
+        product_from_db = Product.objects.get(id=self.product.id)
+        self.assertEqual(product_from_db.current_price, amount + 1)
+        self.assertEqual(product_from_db.leading_bid, bid2)
+        self.assertEqual(product_from_db.bid_count, 2)
+
     def test_make_a_deal_exception(self):
         """ product should raise exception when bid is None """
         with self.assertRaisesMessage(
@@ -88,6 +181,30 @@ class ModelsProductTestCase(TestCase):
 
         self.assertIsInstance(deal, Deal)
         self.assertEqual(deal.id, deal_from_db.id)
+        self.assertEqual(self.product.status, ProductStatus.SOLD)
+        self.assertEqual(
+            Product.objects.get(id=self.product.id).status, ProductStatus.SOLD
+        )
+
+    def test_make_a_deal_not_active(self):
+        """ should not sell lot which changed status after load """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+        Product.objects.filter(id=self.product.id).update(
+            status=ProductStatus.DELETED
+        )
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_STATUS.message
+        ):
+            self.product.make_a_deal()
+
+        self.assertFalse(Deal.objects.exists())
+        self.assertEqual(
+            Product.objects.get(id=self.product.id).status,
+            ProductStatus.DELETED,
+        )
 
     def test_is_buy_condition_meet_true(self):
         """ should return true """
@@ -132,6 +249,7 @@ class ModelsProductTestCase(TestCase):
 
     def test_is_ready_to_make_a_deal_status_false(self):
         """ should return false if status not Actve """
+        self.product.status = ProductStatus.INACTIVE
         self.assertFalse(self.product.is_ready_to_make_a_deal())
 
     @mock.patch("auction.models.Product.get_final_bid", return_value=None)
@@ -301,14 +419,11 @@ class ModelsProductTestCase(TestCase):
         ):
             self.product.delete_product()
 
-    @mock.patch("auction.models.product.product_try_to_make_a_deal.apply_async")
-    def test_activate(self, mock_apply_deal):
-        """ should activate """
+    def test_activate(self):
+        """ should activate, deal by time is made by close_due_products """
+        self.product.status = ProductStatus.INACTIVE
         self.product.activate()
         self.assertEqual(self.product.status, ProductStatus.ACTIVE)
-        mock_apply_deal.assert_called_once_with(
-            args=[self.product.id], eta=self.product.end_date
-        )
 
     def test_activate_raise(self):
         """ should raise exception """
@@ -327,3 +442,352 @@ class ModelsProductTestCase(TestCase):
         mock_delay.assert_called_once_with(
             product_id=self.product.id, type=type
         )
+
+
+class ModelsProductCloseDueTestCase(TestCase):
+    """closing of due products"""
+
+    def setUp(self):
+        self.client: Client = Client.objects.create_user(email, password)
+        self.seller: Client = Client.objects.create_user(
+            email_seller, password_seller
+        )
+        self.product_params: Dict = {
+            **product_params,
+            "seller": self.seller,
+            "status": ProductStatus.ACTIVE,
+            "end_date": timezone.now() - timedelta(seconds=1),
+        }
+
+    def create_product(
+        self, with_bid=True, status=ProductStatus.ACTIVE, **params
+    ):
+        product = Product.objects.create(**{**self.product_params, **params})
+        if with_bid:
+            Bid.objects.create(
+                client=self.client, product=product, price=amount
+            )
+        # ставки принимаются только активным лотом
+        Product.objects.filter(id=product.id).update(status=status)
+        return product
+
+    def test_close_due_products(self):
+        """ should make deals only for active due products with bids """
+        due = [self.create_product() for _ in range(3)]
+        self.create_product(end_date=timezone.now() + timedelta(1))
+        self.create_product(status=ProductStatus.INACTIVE)
+        self.create_product(with_bid=False)
+
+        Balance.objects.create(client=self.client)
+        Balance.objects.create(client=self.seller)
+
+        # выборка лотов и пакетное закрытие не зависят от количества лотов
+        with self.assertNumQueries(15):
+            deals = Product.close_due_products()
+
+        self.assertEqual(
+            sorted(deal.product_id for deal in deals),
+            [product.id for product in due],
+        )
+        self.assertEqual(
+            Product.objects.filter(status=ProductStatus.SOLD).count(), 3
+        )
+        self.assertEqual(Product.close_due_products(), [])
+
+    @mock.patch("auction.models.Deal.async_finalize")
+    @mock.patch("auction.models.Deal.bulk_settle")
+    def test_close_due_products_fallback(
+        self, mock_bulk_settle, mock_async_finalize
+    ):
+        """ should close products one by one if batch failed """
+        product = self.create_product()
+        mock_bulk_settle.side_effect = DatabaseError("Test Exception")
+
+        with self.assertLogs("auction.models.product") as mock_log:
+            deals = Product.close_due_products()
+
+        self.assertEqual([deal.product_id for deal in deals], [product.id])
+        self.assertEqual(
+            mock_log.output,
+            [
+                "WARNING:auction.models.product:failed bulk close: Test Exception"
+            ],
+        )
+
+    @mock.patch("auction.models.Product.make_a_deal")
+    @mock.patch("auction.models.Deal.bulk_settle")
+    def test_close_due_products_failed(
+        self, mock_bulk_settle, mock_make_a_deal
+    ):
+        """ should skip product which failed to close """
+        product = self.create_product()
+        mock_bulk_settle.side_effect = DatabaseError("Test Exception")
+        mock_make_a_deal.side_effect = DatabaseError("Test Exception")
+
+        with self.assertLogs("auction.models.product") as mock_log:
+            self.assertEqual(Product.close_due_products(), [])
+
+        self.assertEqual(
+            mock_log.output,
+            [
+                "WARNING:auction.models.product:failed bulk close: Test Exception",
+                "WARNING:auction.models.product:"
+                f"failed close {product}: Test Exception",
+            ],
+        )
+        self.assertEqual(Product.objects.get(id=product.id).deal_attempts, 1)
+
+    @mock.patch("auction.models.Deal.bulk_settle")
+    def test_close_due_products_bulk_bug(self, mock_bulk_settle):
+        """ should not hide bug of batch behind closing one by one """
+        self.create_product()
+        mock_bulk_settle.side_effect = ValueError("Test Exception")
+
+        with self.assertRaises(ValueError):
+            Product.close_due_products()
+
+        self.assertEqual(
+            Product.objects.filter(status=ProductStatus.SOLD).count(), 0
+        )
+
+    @mock.patch("auction.models.Product.make_a_deal")
+    @mock.patch("auction.models.Deal.bulk_settle")
+    def test_close_due_products_bug(self, mock_bulk_settle, mock_make_a_deal):
+        """ should log bug of one product with traceback and go on """
+        product = self.create_product()
+        mock_bulk_settle.side_effect = DatabaseError("Test Exception")
+        mock_make_a_deal.side_effect = ValueError("Test Exception")
+
+        with self.assertLogs("auction.models.product", "ERROR") as mock_log:
+            self.assertEqual(Product.close_due_products(), [])
+
+        self.assertIn("Traceback", mock_log.output[0])
+        self.assertEqual(Product.objects.get(id=product.id).deal_attempts, 1)
+
+    @override_settings(AUCTION_CLOSER_BATCH=1, AUCTION_CLOSER_MAX_ATTEMPTS=2)
+    @mock.patch("auction.models.Deal.async_finalize")
+    @mock.patch("auction.models.Deal.bulk_settle")
+    def test_close_due_products_stuck(
+        self, mock_bulk_settle, mock_async_finalize
+    ):
+        """ stuck product should not take the batch from other products """
+        stuck = self.create_product(end_date=timezone.now() - timedelta(1))
+        healthy = self.create_product()
+        mock_bulk_settle.side_effect = DatabaseError("Test Exception")
+
+        with mock.patch(
+            "auction.models.Product.make_a_deal",
+            side_effect=DatabaseError("Test Exception"),
+        ):
+            with self.assertLogs("auction.models.product"):
+                self.assertEqual(Product.close_due_products(), [])
+
+        with self.assertLogs("auction.models.product"):
+            deals = Product.close_due_products()
+
+        self.assertEqual([deal.product_id for deal in deals], [healthy.id])
+
+        with mock.patch(
+            "auction.models.Product.make_a_deal",
+            side_effect=DatabaseError("Test Exception"),
+        ):
+            with self.assertLogs("auction.models.product", "ERROR"):
+                self.assertEqual(Product.close_due_products(), [])
+
+        self.assertEqual(Product.close_due_products(), [])
+        self.assertEqual(Product.objects.get(id=stuck.id).deal_attempts, 2)
+
+
+@override_settings(SOFT_CLOSE_EXTENSION=120)
+@override_settings(AUCTION_ORDER_BOOK="memory")
+@mock.patch("auction.models.Deal.async_finalize")
+class ModelsProductCloseDueOrderBookTestCase(TransactionTestCase):
+    """closing of due products in order book, flushed outside of transaction"""
+
+    serialized_rollback = True
+
+    def setUp(self):
+        OrderBookFactory.instances.clear()
+        self.order_book = OrderBookFactory.get_order_book()
+        self.client: Client = Client.objects.create_user(email, password)
+        self.seller: Client = Client.objects.create_user(
+            email_seller, password_seller
+        )
+        self.product: Product = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+        self.order_book.open_lot(self.product)
+
+    def tearDown(self):
+        OrderBookFactory.instances.clear()
+
+    def expire(self):
+        Product.objects.filter(id=self.product.id).update(
+            end_date=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_close_due_products_order_book(self, mock_async_finalize):
+        """ should settle with bids which are still in order book """
+        self.order_book.place_bid(self.product.id, self.client.id, amount + 1)
+        self.expire()
+
+        deals = Product.close_due_products()
+
+        self.assertEqual([deal.amount for deal in deals], [amount + 1])
+        self.assertIsNone(self.order_book.get_price(self.product.id))
+
+    def test_close_due_products_broken_bid(self, mock_async_finalize):
+        """ should keep closing lots when pending bid can not be persisted """
+        deleted = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+        self.order_book.open_lot(deleted)
+        self.order_book.place_bid(deleted.id, self.client.id, amount)
+        deleted.delete()
+        self.order_book.place_bid(self.product.id, self.client.id, amount)
+        self.expire()
+
+        with self.assertLogs("auction.order_book.order_book", "ERROR"):
+            deals = Product.close_due_products()
+
+        self.assertEqual([deal.product for deal in deals], [self.product])
+        self.assertEqual(self.order_book.peek_pending_bids(10), [])
+
+
+class ModelsProductSoftCloseTestCase(TestCase):
+    """soft close of lots"""
+
+    def setUp(self):
+        self.client: Client = Client.objects.create_user(email, password)
+        self.seller: Client = Client.objects.create_user(
+            email_seller, password_seller
+        )
+
+    def create_product(self, seconds_left, soft_close=True):
+        return Product.objects.create(
+            **{
+                **product_params,
+                "seller": self.seller,
+                "status": ProductStatus.ACTIVE,
+                "soft_close": soft_close,
+                "end_date": timezone.now() + timedelta(seconds=seconds_left),
+            }
+        )
+
+    def bid(self, product, price=amount):
+        return Bid.objects.create(
+            client=self.client, product=product, price=price
+        )
+
+    def test_extend_end_date(self):
+        """ last seconds bid should move end_date with the same update """
+        product = self.create_product(seconds_left=10)
+        before = timezone.now()
+
+        # вставка и UPDATE товара внутри savepoint
+        with self.assertNumQueries(4):
+            self.bid(product)
+
+        end_date = Product.objects.get(id=product.id).end_date
+        self.assertEqual(product.end_date, end_date)
+        self.assertGreaterEqual(end_date, before + timedelta(seconds=120))
+        self.assertLessEqual(end_date, timezone.now() + timedelta(seconds=120))
+
+    def test_keep_far_end_date(self):
+        """ bid long before the end should not change end_date """
+        product = self.create_product(seconds_left=600)
+        end_date = product.end_date
+
+        self.bid(product)
+
+        self.assertEqual(Product.objects.get(id=product.id).end_date, end_date)
+
+    def test_keep_end_date_without_soft_close(self):
+        """ lots without soft close should keep end_date """
+        product = self.create_product(seconds_left=10, soft_close=False)
+        end_date = product.end_date
+
+        self.bid(product)
+
+        self.assertEqual(Product.objects.get(id=product.id).end_date, end_date)
+
+    def test_reject_after_end(self):
+        """ soft close lot should not accept bids after end_date """
+        product = self.create_product(seconds_left=-1)
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.LOT_CLOSED.message
+        ):
+            self.bid(product)
+
+    def test_reject_after_close(self):
+        """ soft close lot closed before end_date race should reject bid """
+        product = self.create_product(seconds_left=10)
+        end_date = product.end_date
+        # закрытие закоммичено, пока ставка ждала блокировку строки
+        Product.objects.filter(id=product.id).update(status=ProductStatus.SOLD)
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.WRONG_STATUS.message
+        ):
+            self.bid(product)
+
+        product = Product.objects.get(id=product.id)
+        self.assertEqual(product.end_date, end_date)
+        self.assertIsNone(product.leading_bid)
+        self.assertFalse(Bid.objects.filter(product=product).exists())
+
+    def test_stale_save_keeps_extension(self):
+        """ stale instance should not roll back extension made by bid """
+        product = self.create_product(seconds_left=10)
+        stale_product = Product.objects.get(id=product.id)
+        self.bid(product)
+        end_date = Product.objects.get(id=product.id).end_date
+
+        stale_product.name = "new name"
+        stale_product.save()
+
+        product = Product.objects.get(id=product.id)
+        self.assertEqual(product.name, "new name")
+        self.assertEqual(product.end_date, end_date)
+
+    def test_save_changed_end_date(self):
+        """ explicitly changed end_date should be saved """
+        product = self.create_product(seconds_left=10)
+        stale_product = Product.objects.get(id=product.id)
+        self.bid(product)
+        end_date = timezone.now() + timedelta(days=1)
+
+        stale_product.end_date = end_date
+        stale_product.save()
+
+        self.assertEqual(Product.objects.get(id=product.id).end_date, end_date)
+
+    def test_close_after_extension(self):
+        """ closer should not settle extended lot """
+        product = self.create_product(seconds_left=10)
+        self.bid(product)
+
+        self.assertEqual(
+            Product.close_due_products(
+                now=timezone.now() + timedelta(seconds=30)
+            ),
+            [],
+        )
+        self.assertEqual(
+            Product.objects.get(id=product.id).status, ProductStatus.ACTIVE
+        )
+
+    @override_settings(AUCTION_ORDER_BOOK="memory")
+    def test_activate_without_order_book(self):
+        """ soft close lots should not be opened in order book """
+        OrderBookFactory.instances.clear()
+        product = Product.objects.create(
+            **product_params, seller=self.seller, soft_close=True
+        )
+
+        product.activate()
+
+        self.assertIsNone(
+            OrderBookFactory.get_order_book().get_price(product.id)
+        )
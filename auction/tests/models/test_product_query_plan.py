@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from auction.models import Client, Product
+from auction.models.product import ProductStatus
+from auction.tests.fixtures import email_seller, password_seller, product_params
+
+
+class ProductQueryPlanTestCase(TestCase):
+    """
+    Планы листингов активных лотов.
+
+    Активные лоты - малая часть таблицы, выборки по ним должны идти
+    по частичным индексам, а не по всей истории товаров.
+    """
+
+    sold_count = 20000
+    active_count = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        seller = Client.objects.create_user(email_seller, password_seller)
+        now = timezone.now()
+
+        Product.objects.bulk_create(
+            [
+                Product(
+                    seller=seller,
+                    **{
+                        **product_params,
+                        "status": ProductStatus.SOLD,
+                        "end_date": now - timedelta(minutes=i),
+                    },
+                )
+                for i in range(cls.sold_count)
+            ]
+            + [
+                Product(
+                    seller=seller,
+                    **{
+                        **product_params,
+                        "status": ProductStatus.ACTIVE,
+                        "end_date": now + timedelta(minutes=i),
+                    },
+                )
+                for i in range(cls.active_count)
+            ],
+            batch_size=5000,
+        )
+
+        Product.objects.create(
+            seller=seller, **{**product_params, "name": "Старинные часы"}
+        )
+
+        with connection.cursor() as cursor:
+            # вставки копятся в pending list GIN индекса, VACUUM в
+            # транзакции теста недоступен
+            cursor.execute(
+                "SELECT gin_clean_pending_list('auction_product_search_idx')"
+            )
+            cursor.execute(f"ANALYZE {Product._meta.db_table}")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertNotIn(f"Seq Scan on {Product._meta.db_table}", plan)
+        self.assertIn(index_name, plan)
+
+    def test_ending_soon(self):
+        """ ending soon listing should scan only active lots """
+        queryset = Product.objects.filter(
+            status=ProductStatus.ACTIVE,
+            end_date__lt=timezone.now() + timedelta(minutes=30),
+        ).order_by("end_date", "id")[:10]
+        self.assertUsesIndex(queryset, "auction_prod_active_end_id_idx")
+
+    def test_close_due(self):
+        """ closer should skip expired active lots without bids """
+        queryset = Product.objects.filter(
+            status=ProductStatus.ACTIVE,
+            end_date__lte=timezone.now(),
+            leading_bid__isnull=False,
+            deal_attempts__lt=settings.AUCTION_CLOSER_MAX_ATTEMPTS,
+        ).order_by("deal_attempts", "end_date")[:10]
+        self.assertUsesIndex(queryset, "auction_prod_due_end_idx")
+
+    def test_active_by_id(self):
+        """ active listing by cursor should scan only active lots """
+        queryset = Product.objects.filter(
+            status=ProductStatus.ACTIVE, id__gt=self.sold_count
+        ).order_by("id")[:10]
+        self.assertUsesIndex(queryset, "auction_product_active_id_idx")
+
+    def test_search(self):
+        """ full text search should use GIN index """
+        queryset = Product.objects.filter(
+            search_vector=SearchQuery("часы", config="russian")
+        )
+        self.assertUsesIndex(queryset, "auction_product_search_idx")
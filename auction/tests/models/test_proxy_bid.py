@@ -0,0 +1,136 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from auction.models import Bid, Client, Product, ProxyBid
+from auction.models.proxy_bid import ProxyEntry, resolve_proxy_bids
+from auction.tests.fixtures import (
+    email,
+    email_seller,
+    password,
+    password_seller,
+    product_params,
+)
+
+START = Decimal(10)
+STEP = Decimal(1)
+
+
+class ResolveProxyBidsTestCase(SimpleTestCase):
+    """ proxy bids resolution """
+
+    def resolve(self, current_price, leader_id, proxies):
+        return resolve_proxy_bids(
+            current_price=current_price,
+            start_price=START,
+            leader_id=leader_id,
+            proxies=[ProxyEntry(*proxy) for proxy in proxies],
+            increment=STEP,
+        )
+
+    def test_first_bid(self):
+        """ single proxy should bid start price on lot without bids """
+        self.assertEqual(
+            self.resolve(None, None, [(1, Decimal(50))]), [(1, START)]
+        )
+
+    def test_outbid_leader(self):
+        """ proxy should outbid manual leader by one step """
+        self.assertEqual(
+            self.resolve(Decimal(15), 2, [(1, Decimal(50))]),
+            [(1, Decimal(16))],
+        )
+
+    def test_proxy_war(self):
+        """ should write only runner up maximum and winner price """
+        self.assertEqual(
+            self.resolve(Decimal(15), 3, [(1, Decimal(50)), (2, Decimal(30))]),
+            [(2, Decimal(30)), (1, Decimal(31))],
+        )
+
+    def test_winner_capped(self):
+        """ winner should not pay more than its maximum """
+        self.assertEqual(
+            self.resolve(
+                Decimal(15), 3, [(1, Decimal("30.50")), (2, Decimal(30))]
+            ),
+            [(2, Decimal(30)), (1, Decimal("30.50"))],
+        )
+
+    def test_tie(self):
+        """ earlier proxy should win tie at its maximum """
+        self.assertEqual(
+            self.resolve(Decimal(15), 3, [(1, Decimal(30)), (2, Decimal(30))]),
+            [(1, Decimal(30))],
+        )
+
+    def test_leader_defends(self):
+        """ leader proxy should outbid challenger and win ties """
+        self.assertEqual(
+            self.resolve(Decimal(15), 1, [(1, Decimal(50)), (2, Decimal(30))]),
+            [(2, Decimal(30)), (1, Decimal(31))],
+        )
+        self.assertEqual(
+            self.resolve(Decimal(15), 1, [(2, Decimal(50)), (1, Decimal(50))]),
+            [(1, Decimal(50))],
+        )
+
+    def test_nothing_to_do(self):
+        """ should not bid for leader or exhausted proxies """
+        self.assertEqual(self.resolve(Decimal(15), 1, [(1, Decimal(50))]), [])
+        self.assertEqual(self.resolve(Decimal(40), 1, [(2, Decimal(30))]), [])
+        self.assertEqual(self.resolve(None, None, [(2, Decimal(5))]), [])
+
+
+@mock.patch("auction.models.Bid.post_save")
+class ModelsProxyBidTestCase(TestCase):
+    """ proxy bids engine """
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.rival = Client.objects.create_user("rival@test.ru", password)
+        self.product = Product.objects.create(
+            seller=self.seller, **product_params
+        )
+        self.product.activate()
+
+    def test_resolve(self, mock_post_save):
+        """ should write resulting visible bids of proxy war """
+        ProxyBid.objects.create(
+            client=self.client, product=self.product, max_price=Decimal(15)
+        )
+        ProxyBid.objects.create(
+            client=self.rival, product=self.product, max_price=Decimal(18)
+        )
+        self.product.has_proxy_bids = True
+
+        bids = ProxyBid.resolve(self.product)
+
+        self.assertEqual(
+            [(bid.client_id, bid.price) for bid in bids],
+            [(self.client.id, Decimal(15)), (self.rival.id, Decimal(16))],
+        )
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(product.current_price, Decimal(16))
+        self.assertEqual(product.leading_bid, bids[-1])
+        self.assertEqual(product.bid_count, 2)
+        self.assertTrue(product.has_proxy_bids)
+        mock_post_save.assert_called_once_with()
+
+    def test_resolve_without_proxies(self, mock_post_save):
+        """ should cost no queries for lots without proxy bids """
+        with self.assertNumQueries(0):
+            self.assertEqual(ProxyBid.resolve(self.product), [])
+
+    def test_resolve_inactive(self, mock_post_save):
+        """ should not bid on closed lots """
+        ProxyBid.objects.create(
+            client=self.client, product=self.product, max_price=Decimal(15)
+        )
+        Product.objects.filter(id=self.product.id).update(status="sold")
+        self.product.has_proxy_bids = True
+
+        self.assertEqual(ProxyBid.resolve(self.product), [])
+        self.assertEqual(Bid.objects.count(), 0)
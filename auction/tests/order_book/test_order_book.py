@@ -0,0 +1,250 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import transaction
+from django.db.transaction import TransactionManagementError
+from django.test import TransactionTestCase
+from django.utils import timezone
+from redis import Redis, RedisError
+
+from auction.models import Bid, Client, Product
+from auction.order_book.order_book import OrderBookResult
+from auction.order_book.order_books import MemoryOrderBook, RedisOrderBook
+from auction.tests.fixtures import (
+    active_product_params,
+    amount,
+    email,
+    email_seller,
+    password,
+    password_seller,
+    product_params,
+)
+
+
+def is_redis_available() -> bool:
+    if not settings.AUCTION_ORDER_BOOK_URL:
+        return False
+    try:
+        return Redis.from_url(settings.AUCTION_ORDER_BOOK_URL).ping()
+    except RedisError:
+        return False
+
+
+class IsolatedRedisOrderBook(RedisOrderBook):
+    prefix = "test:auction:order_book"
+
+    def clear(self):
+        keys = self.redis.keys(f"{self.prefix}:*")
+        if keys:
+            self.redis.delete(*keys)
+
+
+class OrderBookMixin:
+    """
+    общие проверки для всех order book
+
+    flush пишет только вне транзакции, поэтому TransactionTestCase
+    """
+
+    def create_order_book(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+        self.order_book = self.create_order_book()
+        self.order_book.open_lot(self.product)
+
+    def place_bid(self, price, product_id=None):
+        return self.order_book.place_bid(
+            product_id=product_id or self.product.id,
+            client_id=self.client.id,
+            price=price,
+        )
+
+    def test_place_bid(self):
+        """ should accept higher bids and reject lower or equal """
+        self.assertEqual(self.place_bid(amount), OrderBookResult.ACCEPTED)
+        self.assertEqual(self.place_bid(amount), OrderBookResult.LOWER_PRICE)
+        self.assertEqual(
+            self.place_bid(amount - 1), OrderBookResult.LOWER_PRICE
+        )
+        self.assertEqual(self.place_bid(amount + 1), OrderBookResult.ACCEPTED)
+
+        self.assertEqual(self.order_book.get_price(self.product.id), amount + 1)
+        self.assertEqual(self.order_book.get_bid_count(self.product.id), 2)
+
+    def test_place_bid_lower_than_start_price(self):
+        """ should accept first bid only from start price """
+        start_price = product_params["start_price"]
+
+        self.assertEqual(
+            self.place_bid(start_price - 1), OrderBookResult.LOWER_PRICE
+        )
+        self.assertEqual(self.order_book.get_bid_count(self.product.id), 0)
+        self.assertEqual(self.place_bid(start_price), OrderBookResult.ACCEPTED)
+
+    def test_place_bid_not_open(self):
+        """ should not accept bids for unknown or closed lots """
+        self.assertEqual(
+            self.place_bid(amount, product_id=42), OrderBookResult.NOT_OPEN
+        )
+
+        self.order_book.close_lot(self.product.id)
+
+        self.assertEqual(self.place_bid(amount), OrderBookResult.NOT_OPEN)
+        self.assertIsNone(self.order_book.get_price(self.product.id))
+        self.assertIsNone(self.order_book.get_bid_count(self.product.id))
+
+    def test_place_bid_after_end_date(self):
+        """ should not accept bids after end of lot """
+        self.product.end_date = timezone.now() - timedelta(seconds=1)
+        self.order_book.open_lot(self.product)
+
+        self.assertEqual(self.place_bid(amount), OrderBookResult.NOT_OPEN)
+
+    def test_open_lot_with_bids(self):
+        """ should continue from current state of product """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+        self.order_book.open_lot(self.product)
+
+        self.assertEqual(self.order_book.get_price(self.product.id), amount)
+        self.assertEqual(self.order_book.get_bid_count(self.product.id), 1)
+        self.assertEqual(self.place_bid(amount), OrderBookResult.LOWER_PRICE)
+
+    def test_get_price_start_price(self):
+        """ should return start price if there are no bids """
+        self.assertEqual(
+            self.order_book.get_price(self.product.id),
+            product_params["start_price"],
+        )
+
+    def test_flush(self):
+        """ should persist pending bids and bid state of product """
+        self.place_bid(amount)
+        self.place_bid(amount + 1)
+
+        self.assertEqual(Bid.objects.count(), 0)
+        self.assertEqual(self.order_book.flush(batch_size=1), 2)
+        self.assertEqual(self.order_book.peek_pending_bids(10), [])
+
+        product = Product.objects.get(id=self.product.id)
+        self.assertEqual(Bid.objects.filter(product=product).count(), 2)
+        self.assertEqual(product.current_price, amount + 1)
+        self.assertEqual(product.leading_bid.price, amount + 1)
+        self.assertEqual(product.leading_bid.client, self.client)
+        self.assertEqual(product.bid_count, 2)
+
+    def test_flush_cdate(self):
+        """ should persist bid with time of acceptance, not of flush """
+        self.place_bid(amount)
+        (pending_bid,) = self.order_book.peek_pending_bids(10)
+
+        self.order_book.flush()
+
+        self.assertEqual(Bid.objects.get().cdate, pending_bid.cdate)
+
+    def test_flush_deleted_product(self):
+        """ should drop bid of deleted product and persist the rest """
+        other = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+        self.order_book.open_lot(other)
+        self.place_bid(amount)
+        self.place_bid(amount, product_id=other.id)
+        Product.objects.filter(id=self.product.id).delete()
+
+        with self.assertLogs("auction.order_book.order_book", "ERROR"):
+            self.assertEqual(self.order_book.flush(), 1)
+
+        self.assertEqual(self.order_book.peek_pending_bids(10), [])
+        self.assertEqual(Bid.objects.get().product, other)
+
+    def test_flush_in_transaction(self):
+        """ should keep pending bids when outer transaction rolls back """
+        self.place_bid(amount)
+
+        with self.assertRaises(TransactionManagementError):
+            with transaction.atomic():
+                self.order_book.flush()
+
+        self.assertEqual(Bid.objects.count(), 0)
+        self.assertEqual(len(self.order_book.peek_pending_bids(10)), 1)
+
+        self.assertEqual(self.order_book.flush(), 1)
+        self.assertEqual(Bid.objects.count(), 1)
+
+
+class MemoryOrderBookTestCase(OrderBookMixin, TransactionTestCase):
+    """ order book in process """
+
+    serialized_rollback = True
+
+    def create_order_book(self):
+        return MemoryOrderBook(depth=settings.AUCTION_ORDER_BOOK_DEPTH)
+
+
+@skipUnless(is_redis_available(), "redis is not available")
+class RedisOrderBookTestCase(OrderBookMixin, TransactionTestCase):
+    """ order book in redis """
+
+    serialized_rollback = True
+
+    def create_order_book(self):
+        order_book = IsolatedRedisOrderBook(
+            url=settings.AUCTION_ORDER_BOOK_URL, depth=2
+        )
+        order_book.clear()
+        return order_book
+
+    def tearDown(self):
+        self.order_book.clear()
+
+    def test_depth(self):
+        """ should keep only top bids of lot """
+        for price in range(1, 5):
+            self.place_bid(amount + price)
+
+        bids = self.order_book.redis.zrange(
+            self.order_book.bids_key(self.product.id), 0, -1
+        )
+        self.assertEqual(len(bids), 2)
+        self.assertEqual(self.order_book.get_bid_count(self.product.id), 4)
+
+    def test_flush_expired_lock(self):
+        """ should not ack bids of another flusher after lock expired """
+        self.place_bid(amount)
+        other_order_book = IsolatedRedisOrderBook(
+            url=settings.AUCTION_ORDER_BOOK_URL, depth=2
+        )
+        persist = self.order_book.persist
+
+        def persist_with_expired_lock(pending_bids):
+            persisted = persist(pending_bids)
+            # блокировка истекла, очередь записал другой процесс,
+            # а после него пришла еще одна ставка
+            self.order_book.redis.delete(self.order_book.flush_lock_key)
+            self.place_bid(amount + 1)
+            other_order_book.flush()
+            self.place_bid(amount + 2)
+            return persisted
+
+        self.order_book.persist = persist_with_expired_lock
+
+        with self.assertLogs("auction.order_book.order_book", "ERROR"):
+            self.order_book.flush()
+
+        (pending_bid,) = self.order_book.peek_pending_bids(10)
+        self.assertEqual(pending_bid.price, amount + 2)
+
+        del self.order_book.persist
+        self.assertEqual(self.order_book.flush(), 1)
+        self.assertEqual(
+            Product.objects.get(id=self.product.id).current_price, amount + 2
+        )
@@ -0,0 +1,48 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from auction.models import Bid, Client, Product
+
+
+class BenchBidsCommandTestCase(TestCase):
+    """ createBid benchmark command """
+
+    def test_bench_bids(self):
+        """ should report every mode and remove its data """
+        out = StringIO()
+
+        call_command(
+            "bench_bids",
+            "--clients=3",
+            "--products=4",
+            "--bids=20",
+            "--hot-products=1",
+            "--concurrency=1",
+            "--json",
+            "--force",
+            stdout=out,
+        )
+
+        reports = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            [report["name"] for report in reports],
+            ["createBid (helper)", "createBid (graphql)"],
+        )
+        for report in reports:
+            self.assertEqual(report["operations"], 20)
+            self.assertEqual(report["outcomes"], {"accepted": 20})
+            self.assertGreater(report["queries_per_op"], 0)
+            self.assertGreater(report["p99_ms"], 0)
+
+        self.assertEqual(Client.objects.count(), 0)
+        self.assertEqual(Product.objects.count(), 0)
+        self.assertEqual(Bid.objects.count(), 0)
+
+    def test_bench_bids_without_force(self):
+        """ should not write to database without DEBUG or --force """
+        with self.assertRaises(CommandError):
+            call_command("bench_bids", stdout=StringIO())
@@ -0,0 +1,56 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from auction.models import Client, Deal, Product
+from billing.models import Bill, Transaction
+from core.celery import app
+
+
+class BenchSettlementCommandTestCase(TestCase):
+    """ settlement benchmark command """
+
+    def test_bench_settlement(self):
+        """ should settle every lot on both paths and remove its data """
+        out = StringIO()
+
+        call_command(
+            "bench_settlement",
+            "--lots=4",
+            "--clients=3",
+            "--batch=3",
+            "--json",
+            "--force",
+            stdout=out,
+        )
+
+        reports = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(
+            [report["name"] for report in reports],
+            ["settlement (per-deal, eager)", "settlement (bulk, eager)"],
+        )
+        self.assertEqual([report["operations"] for report in reports], [4, 2])
+        for report in reports:
+            self.assertEqual(list(report["outcomes"]), ["settled"])
+            self.assertEqual(
+                report["rows_created"],
+                {"deals": 4, "bills": 12, "transactions": 12},
+            )
+            self.assertGreater(report["queries_per_deal"], 0)
+            self.assertGreater(report["rows_written_per_deal"], 0)
+            self.assertGreater(report["wall_time_per_deal_ms"], 0)
+
+        self.assertFalse(app.conf.task_always_eager)
+        self.assertEqual(Client.objects.count(), 0)
+        self.assertEqual(Product.objects.count(), 0)
+        self.assertEqual(Deal.objects.count(), 0)
+        self.assertEqual(Bill.objects.count(), 0)
+        self.assertEqual(Transaction.objects.count(), 0)
+
+    def test_bench_settlement_without_force(self):
+        """ should not write to database without DEBUG or --force """
+        with self.assertRaises(CommandError):
+            call_command("bench_settlement", stdout=StringIO())
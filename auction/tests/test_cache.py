@@ -0,0 +1,128 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from auction.helpers import graphql as graphql_helper
+from auction.models import Bid, Client, Deal, Product
+from auction.models.product import ProductStatus
+from auction.structures.graphql import IdInput
+from auction.tests.fixtures import (
+    amount,
+    amount_100,
+    email,
+    email_seller,
+    password,
+    password_seller,
+    product_params,
+)
+from core.errors import CodeError, GenericException
+
+
+class ProductCacheTestCase(TestCase):
+    """ product read-through cache """
+
+    def setUp(self):
+        # транзакция теста не коммитится, инвалидацию выполняем сразу
+        patcher = mock.patch(
+            "auction.cache.transaction.on_commit", lambda func: func()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        cache.clear()
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(
+            seller=self.seller, **product_params
+        )
+        self.input = IdInput(id=self.product.id)
+
+    def test_product_cached(self):
+        """ second read should not hit database """
+        with self.assertNumQueries(1):
+            graphql_helper.get_product(self.input)
+
+        with self.assertNumQueries(0):
+            product = graphql_helper.get_product(self.input)
+
+        self.assertEqual(product, self.product)
+
+    def test_price_cached(self):
+        """ second price read should not hit database """
+        with self.assertNumQueries(1):
+            graphql_helper.get_product_price(self.input)
+
+        with self.assertNumQueries(0):
+            price = graphql_helper.get_product_price(self.input)
+
+        self.assertEqual(price, product_params["start_price"])
+
+    def test_bid_invalidates(self):
+        """ accepted bid should drop cached price and detail """
+        self.product.activate()
+        graphql_helper.get_product(self.input)
+        graphql_helper.get_product_price(self.input)
+
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+
+        self.assertEqual(graphql_helper.get_product_price(self.input), amount)
+        self.assertEqual(
+            graphql_helper.get_product(self.input).current_price, amount
+        )
+
+    def test_rejected_bid_keeps_cache(self):
+        """ rejected bid should not invalidate cache """
+        self.product.activate()
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount_100
+        )
+        graphql_helper.get_product_price(self.input)
+
+        with self.assertRaisesMessage(
+            GenericException, CodeError.ALREADY_HAS_HIGHER_BID.message
+        ):
+            Bid(client=self.client, product=self.product, price=amount).save()
+
+        with self.assertNumQueries(0):
+            graphql_helper.get_product_price(self.input)
+
+    def test_status_change_invalidates(self):
+        """ activation should drop cached detail """
+        graphql_helper.get_product(self.input)
+
+        self.product.activate()
+
+        self.assertEqual(
+            graphql_helper.get_product(self.input).status,
+            ProductStatus.ACTIVE,
+        )
+
+    def test_bulk_settle_invalidates(self):
+        """ settled products should drop cached detail """
+        self.product.activate()
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+        graphql_helper.get_product(self.input)
+
+        Deal.bulk_settle(
+            list(
+                Product.objects.select_related(
+                    "seller__company", "leading_bid__client__company"
+                ).filter(id=self.product.id)
+            )
+        )
+
+        self.assertEqual(
+            graphql_helper.get_product(self.input).status, ProductStatus.SOLD
+        )
+
+    def test_not_found_not_cached(self):
+        """ missing product should raise and not be cached """
+        with self.assertRaisesMessage(
+            GenericException, CodeError.PRODUCT_NOT_FOUND.message
+        ):
+            graphql_helper.get_product(IdInput(id=self.product.id + 1000))
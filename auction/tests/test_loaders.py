@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+from django.test import TestCase
+from promise import Promise
+
+from auction.loaders import get_loaders
+from auction.models import Bid, Client, Product
+from auction.tests.fixtures import (
+    active_product_params,
+    amount,
+    email,
+    email_seller,
+    password,
+    password_seller,
+)
+
+
+def resolve(load):
+    """ загрузки внутри цепочки промисов батчатся, как в executor """
+    return Promise.resolve(None).then(lambda _: load()).get()
+
+
+class LoadersTestCase(TestCase):
+    """ dataloaders """
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.products = [
+            Product.objects.create(seller=self.seller, **active_product_params)
+            for _ in range(2)
+        ]
+        for product in self.products:
+            Bid.objects.create(
+                client=self.client, product=product, price=amount
+            )
+
+    def test_get_loaders(self):
+        """ should keep loaders in context """
+        context = SimpleNamespace()
+        self.assertIs(get_loaders(context), get_loaders(context))
+        self.assertIsNot(get_loaders(None), get_loaders(None))
+
+    def test_related_list_loader(self):
+        """ should load lists for all keys with one query """
+        loaders = get_loaders(None)
+
+        with self.assertNumQueries(1):
+            products, empty = resolve(
+                lambda: loaders.client_products.load_many(
+                    [self.seller.id, self.client.id]
+                )
+            )
+
+        self.assertEqual(products, self.products)
+        self.assertEqual(empty, [])
+
+    def test_model_loader(self):
+        """ should load objects by id with one query and cache them """
+        loaders = get_loaders(None)
+
+        with self.assertNumQueries(1):
+            clients = resolve(
+                lambda: loaders.client.load_many(
+                    [self.seller.id, self.client.id, 0]
+                )
+            )
+            resolve(lambda: loaders.client.load(self.client.id))
+
+        self.assertEqual(clients, [self.seller, self.client, None])
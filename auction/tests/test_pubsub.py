@@ -0,0 +1,166 @@
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from auction import pubsub
+from auction.models import Bid, Client, Product
+from auction.models.product import ProductStatus
+from auction.pubsub import (
+    EVENT_CLOSED,
+    EVENT_PRICE,
+    MemoryPubSub,
+    PubSubFactory,
+    RedisPubSub,
+)
+from auction.tests.fixtures import (
+    active_product_params,
+    amount,
+    email,
+    email_seller,
+    password,
+    password_seller,
+)
+from auction.tests.order_book.test_order_book import is_redis_available
+
+
+class MemoryPubSubTestCase(SimpleTestCase):
+    """ in-process pub/sub """
+
+    def setUp(self):
+        self.pubsub = MemoryPubSub()
+        self.events = []
+
+    def test_dispatch_by_product(self):
+        """ should deliver events only for subscribed products """
+        unsubscribe = self.pubsub.subscribe([1, 2], self.events.append)
+
+        self.pubsub.publish({"type": EVENT_PRICE, "product_id": 1})
+        self.pubsub.publish({"type": EVENT_PRICE, "product_id": 3})
+
+        self.assertEqual(self.events, [{"type": EVENT_PRICE, "product_id": 1}])
+
+        unsubscribe()
+        self.pubsub.publish({"type": EVENT_PRICE, "product_id": 1})
+
+        self.assertEqual(len(self.events), 1)
+        self.assertEqual(dict(self.pubsub.listeners), {})
+
+    def test_failed_listener(self):
+        """ failed listener should not break others """
+
+        def fail(event):
+            raise ValueError("boom")
+
+        self.pubsub.subscribe([1], fail)
+        self.pubsub.subscribe([1], self.events.append)
+
+        self.pubsub.publish({"type": EVENT_PRICE, "product_id": 1})
+
+        self.assertEqual(len(self.events), 1)
+
+
+@skipUnless(is_redis_available(), "redis is not available")
+class RedisPubSubTestCase(SimpleTestCase):
+    """ redis pub/sub """
+
+    def test_publish_subscribe(self):
+        """ should deliver event through redis channel """
+        redis_pubsub = RedisPubSub(url=settings.AUCTION_PUBSUB_URL)
+        redis_pubsub.channel = "test:auction:events"
+        received = []
+
+        with mock.patch.object(
+            redis_pubsub, "dispatch", side_effect=received.append
+        ):
+            redis_pubsub.start()
+            self.addCleanup(redis_pubsub.thread.stop)
+            redis_pubsub.publish({"type": EVENT_PRICE, "product_id": 1})
+
+            for _ in range(50):
+                if received:
+                    break
+                redis_pubsub.thread.join(0.1)
+
+        self.assertEqual(received, [{"type": EVENT_PRICE, "product_id": 1}])
+
+
+@override_settings(AUCTION_PUBSUB="memory")
+class PublishTestCase(TestCase):
+    """ events from bid and deal paths """
+
+    def setUp(self):
+        # транзакция теста не коммитится, публикуем сразу
+        patcher = mock.patch.object(
+            pubsub.transaction, "on_commit", lambda func: func()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = Client.objects.create_user(email, password)
+        self.seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+        self.events = []
+        self.addCleanup(
+            PubSubFactory.get_pubsub().subscribe(
+                [self.product.id], self.events.append
+            )
+        )
+
+    def test_bid_publishes_price(self):
+        """ accepted bid should publish new price """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+
+        self.assertEqual(
+            self.events,
+            [
+                {
+                    "type": EVENT_PRICE,
+                    "product_id": self.product.id,
+                    "price": str(amount),
+                }
+            ],
+        )
+        self.assertEqual(Decimal(self.events[0]["price"]), amount)
+
+    def test_deal_publishes_closed(self):
+        """ deal should publish lot close """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+
+        self.product.make_a_deal()
+
+        self.assertEqual(
+            self.events[-1],
+            {
+                "type": EVENT_CLOSED,
+                "product_id": self.product.id,
+                "status": ProductStatus.SOLD,
+            },
+        )
+
+    def test_broker_failure(self):
+        """ broker failure should not break bid """
+        with mock.patch.object(
+            MemoryPubSub, "publish", side_effect=ConnectionError
+        ):
+            Bid.objects.create(
+                client=self.client, product=self.product, price=amount
+            )
+
+        self.assertEqual(Bid.objects.count(), 1)
+
+    @override_settings(AUCTION_PUBSUB=None)
+    def test_disabled(self):
+        """ should not publish when pub/sub is disabled """
+        Bid.objects.create(
+            client=self.client, product=self.product, price=amount
+        )
+
+        self.assertEqual(self.events, [])
@@ -1,11 +1,24 @@
 import json
+from datetime import timedelta
 from decimal import Decimal
 from typing import Dict
 
+from django.test import override_settings
+from django.utils import timezone
 from graphene_django.utils.testing import GraphQLTestCase
+from graphql_jwt.shortcuts import get_token
 
-from auction.models import Client, Product
-from auction.tests.fixtures import email_seller, product_params
+from auction.models import Bid, Client, Product
+from auction.models.product import ProductStatus
+from auction.order_book.order_book_factory import OrderBookFactory
+from auction.tests.fixtures import (
+    active_product_params,
+    amount,
+    email,
+    email_seller,
+    password,
+    product_params,
+)
 
 
 class QueriesProductListTestCase(GraphQLTestCase):
@@ -86,3 +99,391 @@ class QueriesProductListTestCase(GraphQLTestCase):
         self.assertEqual(
             Decimal(content["data"]["productPrice"]), self.product.start_price
         )
+
+
+class QueriesProductListBatchingTestCase(GraphQLTestCase):
+    """ relations of product list are loaded in batches """
+
+    query_product_list = """
+        query productList($pageSize: Int){
+            productList(pageSize: $pageSize) {
+                id
+                currentPrice
+                seller { email }
+                leadingBid { price client { email } }
+                bidSet { price client { email } product { id } }
+            }
+        }
+        """
+
+    def setUp(self):
+        self.buyer: Client = Client.objects.create_user(email, password)
+
+    def create_products(self, count):
+        for i in range(count):
+            seller = Client.objects.create_user(f"{i}{email_seller}", password)
+            product = Product.objects.create(
+                seller=seller, **active_product_params
+            )
+            Bid.objects.create(client=self.buyer, product=product, price=amount)
+            Bid.objects.create(client=seller, product=product, price=amount + 1)
+
+    def query_product_list_count(self, count):
+        self.create_products(count)
+
+        # count и страница товаров, затем по одному запросу на уровень связи:
+        # продавцы, лидирующие ставки, ставки товаров, товары и клиенты ставок
+        with self.assertNumQueries(7):
+            response = self.query(
+                self.query_product_list,
+                op_name="productList",
+                variables={"pageSize": count},
+            )
+
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)["data"]["productList"]
+
+    def test_product_list_constant_queries(self):
+        """ should not depend on size of page """
+        data = self.query_product_list_count(10)
+
+        self.assertEqual(len(data), 10)
+        product = data[0]
+        self.assertEqual(Decimal(product["currentPrice"]), amount + 1)
+        self.assertEqual(product["seller"]["email"], f"0{email_seller}")
+        self.assertEqual(
+            product["leadingBid"]["client"]["email"], f"0{email_seller}"
+        )
+        self.assertEqual(
+            [bid["client"]["email"] for bid in product["bidSet"]],
+            [f"0{email_seller}", email],
+        )
+        self.assertEqual(product["bidSet"][0]["product"]["id"], product["id"])
+
+    def test_product_list_single(self):
+        """ should use the same number of queries for one product """
+        self.query_product_list_count(1)
+
+
+class QueriesProductListConnectionTestCase(GraphQLTestCase):
+    """ keyset pagination of products """
+
+    query_connection = """
+        query productListConnection($first: Int, $after: String){
+            productListConnection(first: $first, after: $after) {
+                %s
+                pageInfo { hasNextPage endCursor }
+                edges { cursor node { id } }
+            }
+        }
+        """
+
+    def setUp(self):
+        self.seller: Client = Client.objects.create_user(email_seller, password)
+        self.products = [
+            Product.objects.create(seller=self.seller, **product_params)
+            for _ in range(3)
+        ]
+
+    def query_page(self, after=None, total_count=False):
+        response = self.query(
+            self.query_connection % ("totalCount" if total_count else ""),
+            op_name="productListConnection",
+            variables={"first": 2, "after": after},
+        )
+        self.assertResponseNoErrors(response)
+        return json.loads(response.content)["data"]["productListConnection"]
+
+    def test_product_list_connection(self):
+        """ should walk through all products by cursor """
+        with self.assertNumQueries(1):
+            page = self.query_page()
+
+        self.assertTrue(page["pageInfo"]["hasNextPage"])
+        self.assertEqual(
+            [edge["node"]["id"] for edge in page["edges"]],
+            [str(product.id) for product in self.products[:2]],
+        )
+
+        page = self.query_page(after=page["pageInfo"]["endCursor"])
+
+        self.assertFalse(page["pageInfo"]["hasNextPage"])
+        self.assertEqual(
+            [edge["node"]["id"] for edge in page["edges"]],
+            [str(self.products[2].id)],
+        )
+
+    def test_product_list_connection_total_count(self):
+        """ should count products only if requested """
+        with self.assertNumQueries(2):
+            page = self.query_page(total_count=True)
+
+        self.assertEqual(page["totalCount"], 3)
+
+    def test_product_list_connection_wrong_cursor(self):
+        """ should return error for wrong cursor """
+        response = self.query(
+            self.query_connection % "",
+            op_name="productListConnection",
+            variables={"first": 2, "after": "wrong"},
+        )
+
+        self.assertResponseHasErrors(response)
+
+
+class QueriesProductListFiltersTestCase(GraphQLTestCase):
+    """ filters of product list """
+
+    def setUp(self):
+        self.seller: Client = Client.objects.create_user(email_seller, password)
+        self.products = [
+            Product.objects.create(
+                seller=self.seller,
+                **{
+                    **product_params,
+                    "status": status,
+                    "end_date": timezone.now() + timedelta(hours=hours),
+                },
+            )
+            for status, hours in [
+                (ProductStatus.ACTIVE, 2),
+                (ProductStatus.SOLD, 1),
+                (ProductStatus.ACTIVE, 1),
+            ]
+        ]
+
+    def test_product_list_status(self):
+        """ should return only products with status """
+        response = self.query(
+            """
+            query {
+                productList(status: "sold") { id }
+            }
+            """
+        )
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["data"]["productList"],
+            [{"id": str(self.products[1].id)}],
+        )
+
+    def test_product_list_connection_ending_soon(self):
+        """ should order active products by end date """
+        response = self.query(
+            """
+            query {
+                productListConnection(status: "active", order: END_DATE) {
+                    edges { node { id } }
+                }
+            }
+            """
+        )
+
+        self.assertResponseNoErrors(response)
+        edges = json.loads(response.content)["data"]["productListConnection"][
+            "edges"
+        ]
+        self.assertEqual(
+            [edge["node"]["id"] for edge in edges],
+            [str(self.products[2].id), str(self.products[0].id)],
+        )
+
+
+class QueriesSearchProductsTestCase(GraphQLTestCase):
+    """ full text search """
+
+    def setUp(self):
+        self.seller: Client = Client.objects.create_user(email_seller, password)
+        self.product = Product.objects.create(
+            seller=self.seller, **{**product_params, "name": "Старинные часы"}
+        )
+        Product.objects.create(seller=self.seller, **product_params)
+
+    def test_search_products(self):
+        """ should find products by text """
+        response = self.query(
+            """
+            query {
+                searchProducts(query: "часы") {
+                    totalCount
+                    edges { cursor node { id name } }
+                }
+            }
+            """
+        )
+
+        self.assertResponseNoErrors(response)
+        data = json.loads(response.content)["data"]["searchProducts"]
+        self.assertEqual(data["totalCount"], 1)
+        self.assertEqual(
+            data["edges"][0]["node"],
+            {"id": str(self.product.id), "name": "Старинные часы"},
+        )
+
+
+@override_settings(AUCTION_ORDER_BOOK="memory")
+class MutationCreateBidOrderBookTestCase(GraphQLTestCase):
+    def setUp(self):
+        OrderBookFactory.instances.clear()
+        self.seller: Client = Client.objects.create_user(
+            email_seller, "password"
+        )
+        self.bidder: Client = Client.objects.create_user(email, password)
+        self.product: Product = Product.objects.create(
+            seller=self.seller, **product_params
+        )
+        self.product.activate()
+
+    def create_bid(self, price: Decimal):
+        return self.query(
+            """
+            mutation createBid($productId: ID!, $price: Decimal!) {
+                createBid(productId: $productId, price: $price) {
+                    bid { id } price pending
+                }
+            }
+            """,
+            op_name="createBid",
+            variables={"productId": self.product.id, "price": str(price)},
+            headers={"HTTP_AUTHORIZATION": f"JWT {get_token(self.bidder)}"},
+        )
+
+    def test_create_bid_pending(self):
+        """ should return pending payload without unsaved bid """
+        response = self.create_bid(amount)
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["data"]["createBid"],
+            {"bid": None, "price": str(amount), "pending": True},
+        )
+        self.assertEqual(Bid.objects.count(), 0)
+        self.assertEqual(
+            len(OrderBookFactory.get_order_book().peek_pending_bids(10)), 1
+        )
+
+    def test_create_bid_not_open(self):
+        """ should return saved bid if lot is not in order book """
+        OrderBookFactory.get_order_book().close_lot(self.product.id)
+
+        response = self.create_bid(amount)
+
+        self.assertResponseNoErrors(response)
+        data = json.loads(response.content)["data"]["createBid"]
+        self.assertEqual(data["bid"], {"id": str(Bid.objects.get().id)})
+        self.assertFalse(data["pending"])
+
+    def test_create_bids_pending(self):
+        """ should return pending result for batch bid """
+        response = self.query(
+            """
+            mutation createBids($bids: [BidItemInput!]!) {
+                createBids(bids: $bids) {
+                    results { productId bid { id } price pending error }
+                }
+            }
+            """,
+            op_name="createBids",
+            variables={
+                "bids": [{"productId": self.product.id, "price": str(amount)}]
+            },
+            headers={"HTTP_AUTHORIZATION": f"JWT {get_token(self.bidder)}"},
+        )
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["data"]["createBids"]["results"],
+            [
+                {
+                    "productId": str(self.product.id),
+                    "bid": None,
+                    "price": str(amount),
+                    "pending": True,
+                    "error": None,
+                }
+            ],
+        )
+
+
+class MutationCreateBidsTestCase(GraphQLTestCase):
+    def setUp(self):
+        self.seller: Client = Client.objects.create_user(
+            email_seller, "password"
+        )
+        self.bidder: Client = Client.objects.create_user(email, password)
+        self.product: Product = Product.objects.create(
+            seller=self.seller, **active_product_params
+        )
+
+    def test_create_bids(self):
+        """ should return result for every bid of batch """
+        response = self.query(
+            """
+            mutation createBids($bids: [BidItemInput!]!) {
+                createBids(bids: $bids) {
+                    results { productId bid { price } error code }
+                }
+            }
+            """,
+            op_name="createBids",
+            variables={
+                "bids": [
+                    {"productId": self.product.id, "price": str(amount)},
+                    {"productId": 0, "price": str(amount)},
+                ]
+            },
+            headers={"HTTP_AUTHORIZATION": f"JWT {get_token(self.bidder)}"},
+        )
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["data"]["createBids"]["results"],
+            [
+                {
+                    "productId": str(self.product.id),
+                    "bid": {"price": str(amount)},
+                    "error": None,
+                    "code": None,
+                },
+                {
+                    "productId": "0",
+                    "bid": None,
+                    "error": "Wrong bid params",
+                    "code": "WRONG_BID_INPUT",
+                },
+            ],
+        )
+
+
+class MutationSetProxyBidTestCase(GraphQLTestCase):
+    def setUp(self):
+        self.seller: Client = Client.objects.create_user(
+            email_seller, "password"
+        )
+        self.bidder: Client = Client.objects.create_user(email, password)
+        self.product: Product = Product.objects.create(
+            seller=self.seller, **product_params
+        )
+        self.product.activate()
+
+    def test_set_proxy_bid(self):
+        """ should return visible bids placed by proxy """
+        response = self.query(
+            """
+            mutation setProxyBid($productId: ID!, $maxPrice: Decimal!) {
+                setProxyBid(productId: $productId, maxPrice: $maxPrice) {
+                    bids { price client { email } }
+                }
+            }
+            """,
+            op_name="setProxyBid",
+            variables={"productId": self.product.id, "maxPrice": "15"},
+            headers={"HTTP_AUTHORIZATION": f"JWT {get_token(self.bidder)}"},
+        )
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["data"]["setProxyBid"]["bids"],
+            [{"price": "10.00", "client": {"email": email}}],
+        )
@@ -0,0 +1,233 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from auction.models import Client, Product
+from auction.models.product import ProductStatus
+from auction.pubsub import EVENT_CLOSED, EVENT_PRICE, PubSubFactory
+from auction.sse import ProductEventsStream, load_snapshot, product_events_asgi
+from auction.tests.fixtures import email_seller, password_seller, product_params
+from core.asgi import get_asgi_view
+
+
+def parse_events(body):
+    """ события из тела SSE, без retry и комментариев """
+    events = []
+
+    for block in body.decode().split("\n\n"):
+        lines = dict(
+            line.split(": ", 1) for line in block.splitlines() if ": " in line
+        )
+        if "event" in lines:
+            events.append((lines["event"], json.loads(lines["data"])))
+
+    return events
+
+
+class ProductEventsStreamTestCase(SimpleTestCase):
+    """ per connection coalescing """
+
+    def test_coalesce(self):
+        """ should keep only last event of a kind per product """
+
+        async def run():
+            stream = ProductEventsStream([1, 2])
+            stream.push({"type": EVENT_PRICE, "product_id": 1, "price": "1"})
+            stream.push({"type": EVENT_PRICE, "product_id": 1, "price": "2"})
+            stream.push({"type": EVENT_PRICE, "product_id": 2, "price": "3"})
+            stream.push(
+                {"type": EVENT_PRICE, "product_id": 2, "price": "0"},
+                replace=False,
+            )
+
+            self.assertTrue(stream.ready.is_set())
+            self.assertEqual(
+                [event["price"] for event in stream.take()], ["2", "3"]
+            )
+            self.assertFalse(stream.ready.is_set())
+            self.assertFalse(stream.finished)
+
+            stream.push({"type": EVENT_CLOSED, "product_id": 1})
+            stream.push({"type": EVENT_CLOSED, "product_id": 2})
+            stream.take()
+            self.assertTrue(stream.finished)
+
+        async_to_sync(run)()
+
+
+@override_settings(AUCTION_PUBSUB="memory")
+class ProductEventsTestCase(TestCase):
+    """ SSE endpoint """
+
+    def setUp(self):
+        seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(seller=seller, **product_params)
+
+        # как тестовый клиент django: соединение теста живет в транзакции
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def connect(self, query_string):
+        return ApplicationCommunicator(
+            product_events_asgi,
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/events/",
+                "query_string": query_string.encode(),
+            },
+        )
+
+    async def receive_body(self, communicator):
+        output = await communicator.receive_output(timeout=1)
+        self.assertEqual(output["type"], "http.response.body")
+        return output
+
+    def test_stream(self):
+        """ should stream snapshot, price and close of a lot """
+
+        async def run():
+            communicator = self.connect(f"product={self.product.id}")
+            await communicator.send_input({"type": "http.request"})
+
+            start = await communicator.receive_output(timeout=1)
+            self.assertEqual(start["status"], 200)
+            self.assertIn(
+                (b"content-type", b"text/event-stream"), start["headers"]
+            )
+
+            retry = await self.receive_body(communicator)
+            self.assertTrue(retry["body"].startswith(b"retry: "))
+
+            snapshot = await self.receive_body(communicator)
+            self.assertEqual(
+                parse_events(snapshot["body"]),
+                [
+                    (
+                        EVENT_PRICE,
+                        {
+                            "product_id": self.product.id,
+                            "price": "10.00",
+                        },
+                    )
+                ],
+            )
+
+            pubsub = PubSubFactory.get_pubsub()
+            pubsub.publish(
+                {
+                    "type": EVENT_PRICE,
+                    "product_id": self.product.id,
+                    "price": "15.00",
+                }
+            )
+            pubsub.publish(
+                {
+                    "type": EVENT_CLOSED,
+                    "product_id": self.product.id,
+                    "status": ProductStatus.SOLD,
+                }
+            )
+
+            body = await self.receive_body(communicator)
+            self.assertEqual(
+                parse_events(body["body"]),
+                [
+                    (
+                        EVENT_PRICE,
+                        {"product_id": self.product.id, "price": "15.00"},
+                    ),
+                    (
+                        EVENT_CLOSED,
+                        {
+                            "product_id": self.product.id,
+                            "status": ProductStatus.SOLD,
+                        },
+                    ),
+                ],
+            )
+
+            end = await self.receive_body(communicator)
+            self.assertFalse(end.get("more_body", False))
+            await communicator.wait(timeout=1)
+
+            self.assertEqual(dict(pubsub.listeners), {})
+
+        async_to_sync(run)()
+
+    def test_disconnect(self):
+        """ should unsubscribe on client disconnect """
+
+        async def run():
+            communicator = self.connect(f"product={self.product.id}")
+            await communicator.send_input({"type": "http.request"})
+            await communicator.receive_output(timeout=1)
+            await self.receive_body(communicator)
+            await self.receive_body(communicator)
+
+            self.assertIn(self.product.id, PubSubFactory.get_pubsub().listeners)
+
+            await communicator.send_input({"type": "http.disconnect"})
+            await communicator.wait(timeout=1)
+
+            self.assertNotIn(
+                self.product.id, PubSubFactory.get_pubsub().listeners
+            )
+
+        async_to_sync(run)()
+
+    def test_wrong_product(self):
+        """ should reject wrong product ids """
+
+        async def run():
+            communicator = self.connect("product=abc")
+            await communicator.send_input({"type": "http.request"})
+            start = await communicator.receive_output(timeout=1)
+            self.assertEqual(start["status"], 400)
+
+        async_to_sync(run)()
+
+    def test_wsgi_snapshot(self):
+        """ sync view should return snapshot and retry """
+        response = self.client.get("/events/", {"product": self.product.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            parse_events(response.content),
+            [
+                (
+                    EVENT_PRICE,
+                    {
+                        "product_id": self.product.id,
+                        "price": "10.00",
+                    },
+                )
+            ],
+        )
+
+    def test_load_snapshot_signals(self):
+        """ ASGI snapshot should run inside django request signals """
+        started, finished = mock.Mock(), mock.Mock()
+        request_started.connect(started)
+        request_finished.connect(finished)
+        self.addCleanup(request_started.disconnect, started)
+        self.addCleanup(request_finished.disconnect, finished)
+
+        events = load_snapshot([self.product.id])
+
+        self.assertEqual(events[0]["product_id"], self.product.id)
+        started.assert_called_once()
+        finished.assert_called_once()
+
+    def test_asgi_route(self):
+        """ ASGI router should serve events/ without django """
+        self.assertIs(get_asgi_view("/events/"), product_events_asgi)
+        self.assertIsNone(get_asgi_view("/graphql/"))
+        self.assertIsNone(get_asgi_view("/missing/"))
@@ -1,44 +1,25 @@
 from unittest.mock import Mock, patch
 
-from celery.exceptions import Retry
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from auction.models import Client, Product
 from auction.tasks import (
+    close_due_products,
     deal_finalize,
     deal_send_email,
     product_send_email,
-    product_try_to_make_a_deal,
 )
-from auction.tests.fixtures import email_seller, password, product_params
 
 
-class TaskProductTryToMakeADealTestCase(TestCase):
-    """ product_try_to_make_a_deal """
+@override_settings(AUCTION_CLOSER_BATCH=2)
+class TaskCloseDueProductsTestCase(TestCase):
+    """ close_due_products """
 
-    def setUp(self):
-        self.seller = Client.objects.create_user(email_seller, password)
-        self.product_params = {"seller": self.seller, **product_params}
-        self.product = Product.objects.create(**self.product_params)
-
-    @patch("auction.models.Product.is_ready_to_make_a_deal", return_value=True)
-    @patch("auction.models.Product.make_a_deal", return_value=True)
-    def test_product_try_to_make_a_deal(self, mock_make_a_deal, mock_is_ready):
-        """ should call make_a_deal """
-        product_try_to_make_a_deal(self.product.id)
-        mock_make_a_deal.assert_called_once_with()
-        mock_is_ready.assert_called_once_with()
-
-    @patch("auction.tasks.product_try_to_make_a_deal.retry")
-    @patch("auction.models.Product.is_ready_to_make_a_deal", return_value=False)
-    def test_product_try_to_make_a_deal_raise_retry(
-        self, mock_is_ready, mock_retry
-    ):
-        """ should raise retry exception """
-        mock_retry.side_effect = Retry()
-        with self.assertRaises(Retry):
-            product_try_to_make_a_deal(self.product.id)
-            mock_is_ready.assert_called_once_with()
+    @patch("auction.models.Product.close_due_products")
+    def test_close_due_products(self, mock_close_due_products):
+        """ should close batches until there are no full batch """
+        mock_close_due_products.side_effect = [[Mock(), Mock()], [Mock()]]
+        self.assertEqual(close_due_products(), 3)
+        self.assertEqual(mock_close_due_products.call_count, 2)
 
 
 class TaskProductSendEmalTestCase(TestCase):
@@ -1,6 +1,11 @@
+import graphene
 from graphene_django.types import DjangoObjectType
 
+from .loaders import get_loaders, load_optional
 from .models import Bid, Client, Product
+from .structures.graphql import ProductListOrder
+
+ProductListOrderEnum = graphene.Enum.from_enum(ProductListOrder)
 
 
 class ClientType(DjangoObjectType):
@@ -9,14 +14,104 @@ class ClientType(DjangoObjectType):
         convert_choices_to_enum = False
         exclude = ["password"]
 
+    def resolve_product_set(self, info):
+        return get_loaders(info.context).client_products.load(self.id)
+
+    def resolve_bid_set(self, info):
+        return get_loaders(info.context).client_bids.load(self.id)
+
 
 class ProductType(DjangoObjectType):
+    current_price = graphene.Decimal(
+        description="Текущая цена: лидирующая ставка или стартовая цена"
+    )
+
     class Meta:
         model = Product
-        fields = "__all__"
+        # служебные поля наружу не отдаем
+        exclude = ["search_vector", "deal_attempts", "has_proxy_bids"]
+
+    def resolve_current_price(self, info):
+        # состояние ставок денормализовано в товаре, запросов не нужно
+        return self.get_final_bid_price()
+
+    def resolve_seller(self, info):
+        return get_loaders(info.context).client.load(self.seller_id)
+
+    def resolve_leading_bid(self, info):
+        return load_optional(get_loaders(info.context).bid, self.leading_bid_id)
+
+    def resolve_bid_set(self, info):
+        return get_loaders(info.context).product_bids.load(self.id)
+
+
+class ProductConnection(graphene.relay.Connection):
+    total_count = graphene.Int(
+        description="Общее количество товаров, считается только по запросу"
+    )
+
+    class Meta:
+        node = ProductType
+
+    def resolve_total_count(self, info):
+        return self.queryset.count()
+
+
+class PriceUpdateType(graphene.ObjectType):
+    """ новая лидирующая цена лота """
+
+    product_id = graphene.ID(required=True)
+    price = graphene.Decimal(required=True)
+
+
+class LotClosedType(graphene.ObjectType):
+    """ лот закрыт: продан или снят с аукциона """
+
+    product_id = graphene.ID(required=True)
+    status = graphene.String(required=True)
 
 
 class BidType(DjangoObjectType):
     class Meta:
         model = Bid
         fields = "__all__"
+
+    def resolve_client(self, info):
+        return get_loaders(info.context).client.load(self.client_id)
+
+    def resolve_product(self, info):
+        return get_loaders(info.context).product.load(self.product_id)
+
+
+class BidItemInput(graphene.InputObjectType):
+    """ ставка из пакета createBids """
+
+    product_id = graphene.ID(required=True)
+    price = graphene.Decimal(required=True)
+
+
+class BidResultType(graphene.ObjectType):
+    """ результат ставки из пакета: ставка или ошибка """
+
+    product_id = graphene.ID(required=True)
+    bid = graphene.Field(BidType)
+    price = graphene.Decimal()
+    pending = graphene.Boolean()
+    error = graphene.String()
+    code = graphene.String()
+
+    def resolve_bid(self, info):
+        # ставка из order book еще не записана в базу
+        return None if self.bid is None or self.bid.pk is None else self.bid
+
+    def resolve_price(self, info):
+        return None if self.bid is None else self.bid.price
+
+    def resolve_pending(self, info):
+        return None if self.bid is None else self.bid.pk is None
+
+    def resolve_error(self, info):
+        return None if self.error is None else self.error.message
+
+    def resolve_code(self, info):
+        return None if self.error is None else self.error.extensions["code"]
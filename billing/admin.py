@@ -1,7 +1,15 @@
 from django.contrib import admin
 
-from billing.models import Bill, Transaction
+from billing.models import Balance, BalanceCheckpoint, Bill, Transaction
+
+
+class BalanceAdmin(admin.ModelAdmin):
+    # баланс меняется только транзакциями
+    readonly_fields = ("client", "amount")
+
 
 # Register your models here.
 admin.site.register(Transaction)
 admin.site.register(Bill)
+admin.site.register(Balance, BalanceAdmin)
+admin.site.register(BalanceCheckpoint)
@@ -0,0 +1,42 @@
+from typing import List
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from billing.models import Balance
+from billing.models.balance import BalanceMismatch
+
+
+class Command(BaseCommand):
+    help = "Сверка материализованных балансов с суммой транзакций"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Пересчитать расходящиеся балансы по сумме транзакций",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Сверять с суммой всех транзакций, без контрольных точек",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options) -> None:
+        mismatches: List[BalanceMismatch] = Balance.reconcile(
+            fix=options["fix"],
+            chunk_size=options["chunk_size"],
+            full=options["full"],
+        )
+
+        for client_id, total, amount in mismatches:
+            self.stdout.write(
+                f"client #{client_id}: transactions {total}, balance {amount}"
+            )
+
+        status: str = "fixed" if options["fix"] else "found"
+        self.stdout.write(f"{len(mismatches)} mismatches {status}")
+
+        if mismatches and not options["fix"]:
+            # ненулевой код для мониторинга
+            raise CommandError("balances are out of sync")
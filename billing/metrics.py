@@ -0,0 +1,11 @@
+"""
+Метрики биллинга (см. core.metrics)
+"""
+from core.metrics import LAG_BUCKETS, Histogram
+
+BILL_ACTIVATION_LAG = Histogram(
+    "billing_bill_activation_lag_seconds",
+    "От создания счета до его активации",
+    ("bill_type",),
+    buckets=LAG_BUCKETS,
+)
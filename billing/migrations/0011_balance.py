@@ -0,0 +1,40 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:22
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# начальные балансы по сумме уже проведенных транзакций
+BACKFILL_BALANCE_SQL = """
+INSERT INTO billing_balance (client_id, amount, cdate, mdate)
+SELECT client_id, SUM(amount), NOW(), NOW()
+FROM billing_transaction
+GROUP BY client_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('billing', '0010_auto_20210225_1113'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Balance',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cdate', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата создания')),
+                ('mdate', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=19, verbose_name='Баланс')),
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Владелец баланса')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunSQL(BACKFILL_BALANCE_SQL, migrations.RunSQL.noop),
+    ]
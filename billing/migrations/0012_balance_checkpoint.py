@@ -0,0 +1,32 @@
+# Generated by Django 3.1.6 on 2026-10-18 12:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('billing', '0011_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cdate', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата создания')),
+                ('mdate', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=19, verbose_name='Баланс')),
+                ('client', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Владелец баланса')),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='billing.transaction', verbose_name='Последняя учтенная транзакция')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='balancecheckpoint',
+            index=models.Index(fields=['client', '-transaction'], name='billing_bal_client__02835c_idx'),
+        ),
+    ]
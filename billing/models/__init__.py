@@ -1,3 +1,5 @@
+from .balance import Balance as Balance  # noqa
 from .bill import Bill as Bill  # noqa
+from .checkpoint import BalanceCheckpoint as BalanceCheckpoint  # noqa
 from .payment import Payment as Payment  # noqa
 from .transaction import Transaction as Transaction  # noqa
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from decimal import Decimal
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from django.apps import apps
+from django.db import models, transaction
+
+from auction.models import Client
+from billing.models.base import ModelAbstract
+from billing.models.checkpoint import BalanceCheckpoint
+
+if TYPE_CHECKING:
+    from billing.models import Transaction
+
+
+# client_id, сумма по транзакциям, сумма в балансе
+BalanceMismatch = Tuple[int, Decimal, Decimal]
+
+
+class Balance(ModelAbstract):
+    """
+    Материализованный баланс клиента
+
+    Обновляется в одной транзакции со вставкой Transaction,
+    сверяется с суммой транзакций командой reconcile_balances.
+    """
+
+    client = models.OneToOneField(
+        Client,
+        verbose_name="Владелец баланса",
+        on_delete=models.CASCADE,
+    )
+    amount = models.DecimalField(
+        "Баланс", max_digits=19, decimal_places=2, default=Decimal(0)
+    )
+
+    def __str__(self) -> str:
+        return f"{self.client}: {self.amount}"
+
+    @classmethod
+    def add(cls, client_id: int, amount: Decimal) -> None:
+        """
+        Атомарно изменяем баланс клиента на amount,
+        вызывать в одной транзакции со вставкой транзакции баланса
+        """
+        updated: int = cls.objects.filter(client_id=client_id).update(
+            amount=models.F("amount") + amount
+        )
+
+        if updated:
+            return
+
+        # первая транзакция клиента, строку баланса могли создать параллельно
+        _, created = cls.objects.get_or_create(
+            client_id=client_id, defaults={"amount": amount}
+        )
+
+        if not created:
+            cls.objects.filter(client_id=client_id).update(
+                amount=models.F("amount") + amount
+            )
+
+    @classmethod
+    def apply_transactions(cls, transactions: Iterable[Transaction]) -> None:
+        """ изменяем балансы на пачку транзакций, вставленных bulk_create """
+        amounts: Dict[int, Decimal] = defaultdict(Decimal)
+
+        for txn in transactions:
+            amounts[txn.client_id] += txn.amount
+
+        # одинаковый порядок блокировок строк баланса между транзакциями
+        for client_id in sorted(amounts):
+            cls.add(client_id, amounts[client_id])
+
+    @classmethod
+    def get_amount(cls, client: Client, for_update: bool = False) -> Decimal:
+        """ баланс клиента, 0 если транзакций еще не было """
+        queryset = cls.objects.filter(client=client)
+
+        if for_update:
+            queryset = queryset.select_for_update()
+
+        amount = queryset.values_list("amount", flat=True).first()
+
+        return Decimal(0) if amount is None else amount
+
+    @classmethod
+    def reconcile(
+        cls, fix: bool = False, chunk_size: int = 1000, full: bool = False
+    ) -> List[BalanceMismatch]:
+        """
+        Сверяем материализованные балансы с журналом транзакций
+        (от последних контрольных точек, с full=True - по всем транзакциям),
+        с fix=True расхождения исправляются по сумме транзакций
+        """
+        transaction_model = apps.get_model("billing", "Transaction")
+
+        client_ids: List[int] = list(
+            Client.objects.order_by("id").values_list("id", flat=True)
+        )
+
+        mismatches: List[BalanceMismatch] = []
+
+        for start in range(0, len(client_ids), chunk_size):
+            end: int = start + chunk_size
+            chunk: List[int] = client_ids[start:end]
+
+            if full:
+                expected: Dict[int, Decimal] = dict(
+                    transaction_model.objects.filter(client_id__in=chunk)
+                    .values("client_id")
+                    .annotate(total=models.Sum("amount"))
+                    .values_list("client_id", "total")
+                )
+            else:
+                expected = BalanceCheckpoint.ledger_balances(chunk)
+
+            actual: Dict[int, Decimal] = dict(
+                cls.objects.filter(client_id__in=chunk).values_list(
+                    "client_id", "amount"
+                )
+            )
+
+            for client_id in chunk:
+                total: Decimal = expected.get(client_id, Decimal(0))
+                amount: Decimal = actual.get(client_id, Decimal(0))
+
+                if total != amount:
+                    mismatches.append((client_id, total, amount))
+
+        if fix:
+            for client_id, _, _ in mismatches:
+                cls.rebuild(client_id)
+
+        return mismatches
+
+    @classmethod
+    @transaction.atomic
+    def rebuild(cls, client_id: int) -> Decimal:
+        """
+        Пересчитываем баланс клиента по сумме транзакций,
+        под блокировкой строки баланса, чтобы не потерять параллельные вставки
+        """
+        transaction_model = apps.get_model("billing", "Transaction")
+
+        cls.objects.get_or_create(client_id=client_id)
+        balance: Balance = cls.objects.select_for_update().get(
+            client_id=client_id
+        )
+
+        total: Decimal = transaction_model.objects.filter(
+            client_id=client_id
+        ).aggregate(total=models.Sum("amount"))["total"] or Decimal(0)
+
+        balance.amount = total
+        balance.save(update_fields=["amount", "mdate"])
+
+        return total
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Type
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Type
 
 from django.apps import apps
 from django.db import models
+from django.utils import timezone
 
 from auction.models import Client
 from billing.meta import BillStatus, BillType
+from billing.metrics import BILL_ACTIVATION_LAG
+from billing.models.balance import Balance
 from billing.models.base import ModelAbstract
 from billing.strategies import BillStrategyFactory
 from billing.tasks import bill_activate
@@ -46,26 +50,63 @@ class Bill(ModelAbstract):
     def activate(self) -> Bill:
         """ Метод активации счета, в момент активации проводим транзакцию по балансу """
         strategy: BillStrategy = BillStrategyFactory.get_strategy(self)
-        return strategy.activate()
+        bill: Bill = strategy.activate()
+        self.observe_activation(timezone.now())
+        return bill
+
+    def observe_activation(self, now: datetime) -> None:
+        """ задержка активации счета в метрики """
+        lag: float = (now - self.cdate).total_seconds()
+        BILL_ACTIVATION_LAG.labels(self.bill_type).observe(max(lag, 0.0))
+
+    @classmethod
+    def bulk_activate(cls, bills: List[Bill]) -> List[Transaction]:
+        """
+        Активация пачки счетов: транзакции одной вставкой,
+        по одному UPDATE баланса на клиента, статус счетов одним UPDATE.
+        Вызывать внутри транзакции.
+        """
+        transaction: Type[Transaction] = apps.get_model(
+            "billing", "Transaction"
+        )
+
+        transactions: List[Transaction] = [
+            BillStrategyFactory.get_strategy(bill).transaction_create(
+                commit=False
+            )
+            for bill in bills
+        ]
+        transaction.objects.bulk_create(transactions)
+        Balance.apply_transactions(transactions)
+
+        cls.objects.filter(id__in=[bill.id for bill in bills]).update(
+            status=BillStatus.ACTIVATED
+        )
+        now: datetime = timezone.now()
+        for bill in bills:
+            bill.status = BillStatus.ACTIVATED
+            bill.observe_activation(now)
+
+        return transactions
 
     def async_activate(self) -> None:
         """ асинхронная активация счета """
         bill_activate.delay(bill_id=self.id)
 
-    def create_transaction_deposit(self) -> Transaction:
+    def create_transaction_deposit(self, commit: bool = True) -> Transaction:
         """ создание пополнение в балансе """
         transaction: Type[Transaction] = apps.get_model(
             "billing", "Transaction"
         )
         return transaction.deposit(
-            client=self.client, bill=self, amount=self.amount
+            client=self.client, bill=self, amount=self.amount, commit=commit
         )
 
-    def create_transaction_expense(self) -> Transaction:
+    def create_transaction_expense(self, commit: bool = True) -> Transaction:
         """ создание списание в балансе """
         transaction: Type[Transaction] = apps.get_model(
             "billing", "Transaction"
         )
         return transaction.expense(
-            client=self.client, bill=self, amount=self.amount
+            client=self.client, bill=self, amount=self.amount, commit=commit
         )
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from auction.models import Client
+from billing.models.base import ModelAbstract
+
+
+class BalanceCheckpoint(ModelAbstract):
+    """
+    Контрольная точка баланса клиента
+
+    Сумма всех транзакций клиента до transaction включительно.
+    Транзакции не меняются, поэтому баланс по журналу - это последняя
+    точка плюс сумма транзакций после нее.
+    """
+
+    client = models.ForeignKey(
+        Client,
+        verbose_name="Владелец баланса",
+        on_delete=models.CASCADE,
+        db_index=False,  # покрыт индексом (client, -transaction)
+    )
+    transaction = models.ForeignKey(
+        "billing.Transaction",
+        verbose_name="Последняя учтенная транзакция",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    amount = models.DecimalField("Баланс", max_digits=19, decimal_places=2)
+
+    class Meta:
+        indexes = [models.Index(fields=["client", "-transaction"])]
+
+    def __str__(self) -> str:
+        return f"{self.client} #{self.transaction_id}: {self.amount}"
+
+    @classmethod
+    def ledger_balances(cls, client_ids: Iterable[int]) -> Dict[int, Decimal]:
+        """
+        Баланс по журналу для пачки клиентов за два запроса:
+        последние точки и сумма транзакций после них
+        """
+        transaction_model = apps.get_model("billing", "Transaction")
+        client_ids = list(client_ids)
+
+        balances: Dict[int, Decimal] = {
+            client_id: Decimal(0) for client_id in client_ids
+        }
+
+        # DISTINCT ON (client_id) - последняя точка каждого клиента
+        checkpoints = (
+            cls.objects.filter(client_id__in=client_ids)
+            .order_by("client_id", "-transaction_id")
+            .distinct("client_id")
+            .values_list("client_id", "amount")
+        )
+        for client_id, amount in checkpoints:
+            balances[client_id] = amount
+
+        last_checkpoint = (
+            cls.objects.filter(client_id=models.OuterRef("client_id"))
+            .order_by("-transaction_id")
+            .values("transaction_id")[:1]
+        )
+        deltas = (
+            transaction_model.objects.filter(client_id__in=client_ids)
+            .filter(id__gt=Coalesce(models.Subquery(last_checkpoint), 0))
+            .values("client_id")
+            .annotate(total=models.Sum("amount"))
+            .values_list("client_id", "total")
+        )
+        for client_id, total in deltas:
+            balances[client_id] += total
+
+        return balances
+
+    @classmethod
+    def create_for_client(
+        cls, client_id: int, before: datetime
+    ) -> Optional[BalanceCheckpoint]:
+        """
+        Новая точка по транзакциям клиента, созданным до before.
+
+        Транзакции моложе before не учитываем: транзакция с меньшим id
+        может быть еще не закоммичена, лаг дает ей время завершиться.
+        cdate ставится внутри пишущей транзакции, поэтому лаг должен быть
+        больше самой долгой из них (BALANCE_CHECKPOINT_LAG).
+        """
+        transaction_model = apps.get_model("billing", "Transaction")
+
+        last: Optional[BalanceCheckpoint] = (
+            cls.objects.filter(client_id=client_id)
+            .order_by("-transaction_id")
+            .first()
+        )
+        last_transaction_id: int = 0 if last is None else last.transaction_id
+
+        up_to: Optional[int] = (
+            transaction_model.objects.filter(
+                client_id=client_id,
+                id__gt=last_transaction_id,
+                cdate__lte=before,
+            )
+            .aggregate(up_to=models.Max("id"))
+            .get("up_to")
+        )
+
+        if up_to is None:
+            return None
+
+        delta: Decimal = transaction_model.objects.filter(
+            client_id=client_id, id__gt=last_transaction_id, id__lte=up_to
+        ).aggregate(total=models.Sum("amount"))["total"]
+
+        return cls.objects.create(
+            client_id=client_id,
+            transaction_id=up_to,
+            amount=(Decimal(0) if last is None else last.amount) + delta,
+        )
+
+    @classmethod
+    def create_for_shard(
+        cls, shard: int, shards: int, now: Optional[datetime] = None
+    ) -> int:
+        """
+        Точки для клиентов шарда (client_id % shards == shard),
+        шарды не пересекаются и считаются параллельно
+        """
+        now = now or timezone.now()
+        before: datetime = now - timedelta(
+            seconds=settings.BALANCE_CHECKPOINT_LAG
+        )
+
+        client_ids: Iterable[int] = (
+            Client.objects.annotate(shard=models.F("id") % shards)
+            .filter(shard=shard)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .iterator()
+        )
+
+        created: int = 0
+
+        for client_id in client_ids:
+            if cls.create_for_client(client_id, before) is not None:
+                created += 1
+
+        return created
@@ -1,17 +1,19 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Iterable, Optional
 
 if TYPE_CHECKING:
     from billing.models import Bill
 
 from decimal import Decimal
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 from auction.models import Client
 from billing.meta import TransactionType
+from billing.models.balance import Balance
+from billing.models.checkpoint import BalanceCheckpoint
 from core.errors import CodeError
 
 
@@ -50,6 +52,23 @@ class Transaction(models.Model):
     def __str__(self) -> str:
         return f"#{self.id} {self.tnx_type}: {self.amount}({self.client})"
 
+    def save(
+        self,
+        force_insert: bool = False,
+        force_update: bool = False,
+        using: Optional[str] = None,
+        update_fields: Optional[Iterable[str]] = None,
+    ) -> None:
+        """ новая транзакция меняет баланс клиента в той же транзакции БД """
+        if self.pk is not None:
+            return super().save(
+                force_insert, force_update, using, update_fields
+            )
+
+        with transaction.atomic(using=using):
+            super().save(force_insert, force_update, using, update_fields)
+            Balance.add(self.client_id, self.amount)
+
     @classmethod
     def deposit(
         cls,
@@ -57,9 +76,11 @@ class Transaction(models.Model):
         bill: Bill,
         amount: Decimal,
         comment: Optional[str] = None,
+        commit: bool = True,
     ) -> Transaction:
         """
-        Создание депозита
+        Создание депозита,
+        с commit=False транзакция не сохраняется (для bulk_create)
         """
         if amount <= 0:
             raise CodeError.AMOUNT_SHOULD_BE_POSITIVE.exception
@@ -72,7 +93,8 @@ class Transaction(models.Model):
             comment=comment,
         )
 
-        txn.save()
+        if commit:
+            txn.save()
 
         return txn
 
@@ -83,9 +105,11 @@ class Transaction(models.Model):
         bill: Bill,
         amount: Decimal,
         comment: Optional[str] = None,
+        commit: bool = True,
     ) -> Transaction:
         """
-        Создание списания
+        Создание списания,
+        с commit=False транзакция не сохраняется (для bulk_create)
         """
         if amount <= 0:
             raise CodeError.AMOUNT_SHOULD_BE_POSITIVE.exception
@@ -98,11 +122,13 @@ class Transaction(models.Model):
             comment=comment,
         )
 
-        txn.save()
+        if commit:
+            txn.save()
 
         return txn
 
     @classmethod
+    @transaction.atomic
     def withdraw(
         cls,
         client: Client,
@@ -116,7 +142,8 @@ class Transaction(models.Model):
         if amount <= 0:
             raise CodeError.AMOUNT_SHOULD_BE_POSITIVE.exception
 
-        if cls.balance(client=client) < amount:
+        # блокируем строку баланса до вставки списания
+        if Balance.get_amount(client=client, for_update=True) < amount:
             raise CodeError.NOT_ENOUGH_BALANCE.exception
 
         txn = cls(
@@ -162,10 +189,12 @@ class Transaction(models.Model):
         """
         получение баланса клиента
         """
-        where = models.Q(client__exact=client)
-
-        result = cls.objects.filter(where).aggregate(
-            amount=models.Sum("amount")
-        )
+        return Balance.get_amount(client=client)
 
-        return result["amount"] or Decimal(0)
+    @classmethod
+    def ledger_balance(cls, client: Client) -> Decimal:
+        """
+        баланс по журналу транзакций:
+        последняя контрольная точка плюс транзакции после нее
+        """
+        return BalanceCheckpoint.ledger_balances([client.id])[client.id]
@@ -39,7 +39,7 @@ class BillStrategy:
 
         return self.bill
 
-    def transaction_create(self) -> Transaction:
+    def transaction_create(self, commit: bool = True) -> Transaction:
         raise NotImplementedError
 
     def activate(self) -> Bill:
@@ -50,8 +50,8 @@ class BillStrategy:
 
 
 class BillStrategyDeposit(BillStrategy):
-    def transaction_create(self) -> Transaction:
-        self.transaction = self.bill.create_transaction_deposit()
+    def transaction_create(self, commit: bool = True) -> Transaction:
+        self.transaction = self.bill.create_transaction_deposit(commit=commit)
 
         if self.transaction is None:
             raise CodeError.TRANSACTION_NOT_CREATED.exception
@@ -60,8 +60,8 @@ class BillStrategyDeposit(BillStrategy):
 
 
 class BillStrategyExpense(BillStrategy):
-    def transaction_create(self) -> Transaction:
-        self.transaction = self.bill.create_transaction_expense()
+    def transaction_create(self, commit: bool = True) -> Transaction:
+        self.transaction = self.bill.create_transaction_expense(commit=commit)
 
         if self.transaction is None:
             raise CodeError.TRANSACTION_NOT_CREATED.exception
@@ -1,11 +1,12 @@
 from typing import TYPE_CHECKING, Type
 
 from django.apps import apps
+from django.conf import settings
 
 from core.celery import app
 
 if TYPE_CHECKING:
-    from billing.models import Bill, Payment
+    from billing.models import BalanceCheckpoint, Bill, Payment
 
 
 @app.task()
@@ -22,3 +23,23 @@ def payment_process(payment_id):
     payment_model: Type[Payment] = apps.get_model("billing", "Payment")
     payment: Payment = payment_model.objects.get(id=payment_id)
     return payment.process()
+
+
+@app.task()
+def balance_checkpoints(shard, shards):
+    """ контрольные точки балансов для одного шарда клиентов """
+    checkpoint_model: Type[BalanceCheckpoint] = apps.get_model(
+        "billing", "BalanceCheckpoint"
+    )
+    return checkpoint_model.create_for_shard(shard=shard, shards=shards)
+
+
+@app.task()
+def balance_checkpoints_dispatch():
+    """ раскидываем шарды клиентов по воркерам """
+    shards: int = settings.BALANCE_CHECKPOINT_SHARDS
+
+    for shard in range(shards):
+        balance_checkpoints.delay(shard=shard, shards=shards)
+
+    return shards
@@ -0,0 +1,116 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from auction.models import Client
+from billing.meta import BillStatus, BillType
+from billing.models import Balance, Bill, Transaction
+
+email = "emailfortest@test.ru"
+amount = Decimal("12.34")
+vat = 20
+
+
+class BalanceTestCase(TestCase):
+    """Balance"""
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, "password")
+        self.bill = Bill.objects.create(
+            client=self.client,
+            bill_type=BillType.PREPAY,
+            status=BillStatus.NOT_ACTIVATED,
+            amount=amount,
+            vat=vat,
+        )
+
+    def test_transaction_updates_balance(self):
+        """ should create and update balance with each transaction """
+        Transaction.deposit(client=self.client, bill=self.bill, amount=amount)
+        Transaction.expense(client=self.client, bill=self.bill, amount=amount)
+        Transaction.deposit(client=self.client, bill=self.bill, amount=amount)
+
+        self.assertEqual(Balance.objects.get(client=self.client).amount, amount)
+        self.assertEqual(Transaction.balance(client=self.client), amount)
+
+    def test_transaction_update_does_not_change_balance(self):
+        """ should change balance only on insert """
+        txn = Transaction.deposit(
+            client=self.client, bill=self.bill, amount=amount
+        )
+        txn.comment = "test"
+        txn.save()
+
+        self.assertEqual(Transaction.balance(client=self.client), amount)
+
+    def test_balance_is_constant_query(self):
+        """ should read balance without aggregation over transactions """
+        for _ in range(3):
+            Transaction.deposit(
+                client=self.client, bill=self.bill, amount=amount
+            )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                Transaction.balance(client=self.client), amount * 3
+            )
+
+    def test_apply_transactions(self):
+        """ should update balances for transactions from bulk_create """
+        seller = Client.objects.create_user("seller@test.ru", "password")
+        transactions = Transaction.objects.bulk_create(
+            [
+                Transaction.deposit(
+                    client=client, bill=self.bill, amount=amount, commit=False
+                )
+                for client in (self.client, seller, self.client)
+            ]
+        )
+
+        Balance.apply_transactions(transactions)
+
+        self.assertEqual(Transaction.balance(client=self.client), amount * 2)
+        self.assertEqual(Transaction.balance(client=seller), amount)
+
+    def test_reconcile(self):
+        """ should find and fix mismatched balances """
+        Transaction.deposit(client=self.client, bill=self.bill, amount=amount)
+        Balance.objects.filter(client=self.client).update(amount=0)
+
+        self.assertEqual(
+            Balance.reconcile(), [(self.client.id, amount, Decimal(0))]
+        )
+        self.assertEqual(
+            Balance.reconcile(fix=True), [(self.client.id, amount, Decimal(0))]
+        )
+        self.assertEqual(Balance.reconcile(), [])
+        self.assertEqual(Transaction.balance(client=self.client), amount)
+
+    def test_reconcile_missing_balance(self):
+        """ should create missing balance row """
+        Transaction.deposit(client=self.client, bill=self.bill, amount=amount)
+        Balance.objects.all().delete()
+
+        Balance.reconcile(fix=True)
+
+        self.assertEqual(Transaction.balance(client=self.client), amount)
+
+    def test_reconcile_command(self):
+        """ should report mismatches and exit with error code """
+        Transaction.deposit(client=self.client, bill=self.bill, amount=amount)
+        Balance.objects.filter(client=self.client).update(amount=0)
+
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, "balances are out of sync"):
+            call_command("reconcile_balances", stdout=out)
+        self.assertIn("1 mismatches found", out.getvalue())
+
+        out = StringIO()
+        call_command("reconcile_balances", "--fix", stdout=out)
+        self.assertIn("1 mismatches fixed", out.getvalue())
+
+        out = StringIO()
+        call_command("reconcile_balances", stdout=out)
+        self.assertIn("0 mismatches found", out.getvalue())
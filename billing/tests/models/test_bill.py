@@ -5,7 +5,7 @@ from django.test import TestCase
 
 from auction.models import Client
 from billing.meta import BillStatus, BillType
-from billing.models import Bill, Transaction
+from billing.models import Balance, Bill, Transaction
 
 email = "emailfortest@test.ru"
 amount = Decimal("12.34")
@@ -51,6 +51,25 @@ class BillModelTestCase(TestCase, PrecreateMixin):
         self.assertIsInstance(bill, Bill)
         self.assertEqual(bill.status, BillStatus.ACTIVATED)
 
+    def test_bulk_activate(self):
+        """ should activate bills with one insert of transactions """
+        bills = [self.bill_prepay, self.bill_sell]
+        Balance.objects.create(client=self.client)
+
+        # вставка транзакций, баланс клиента и UPDATE статуса счетов
+        with self.assertNumQueries(3):
+            transactions = Bill.bulk_activate(bills)
+
+        self.assertEqual(
+            [txn.amount for txn in transactions], [amount, -amount / 2]
+        )
+        self.assertEqual(Transaction.objects.count(), 2)
+        self.assertEqual(
+            Bill.objects.filter(status=BillStatus.ACTIVATED).count(), 2
+        )
+        self.assertEqual(self.bill_sell.status, BillStatus.ACTIVATED)
+        self.assertEqual(Transaction.balance(self.client), amount / 2)
+
     @mock.patch("billing.models.bill.bill_activate.delay", return_value=None)
     def test_async_activate(self, mock_bill_activate_delay):
         """ should call delay """
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+
+from auction.models import Client
+from billing.meta import BillStatus, BillType
+from billing.models import Balance, BalanceCheckpoint, Bill, Transaction
+
+email = "emailfortest@test.ru"
+amount = Decimal("12.34")
+vat = 20
+
+
+class BalanceCheckpointTestCase(TestCase):
+    """BalanceCheckpoint"""
+
+    def setUp(self):
+        self.client = Client.objects.create_user(email, "password")
+        self.bill = Bill.objects.create(
+            client=self.client,
+            bill_type=BillType.PREPAY,
+            status=BillStatus.NOT_ACTIVATED,
+            amount=amount,
+            vat=vat,
+        )
+
+    def deposit(self, cdate=None):
+        txn = Transaction.deposit(
+            client=self.client, bill=self.bill, amount=amount
+        )
+        if cdate is not None:
+            Transaction.objects.filter(id=txn.id).update(cdate=cdate)
+        return txn
+
+    def test_create_for_client(self):
+        """ should sum transactions up to the latest one before lag """
+        self.deposit()
+        last = self.deposit()
+        self.deposit(cdate=timezone.now() + timedelta(seconds=10))
+
+        checkpoint = BalanceCheckpoint.create_for_client(
+            self.client.id, before=timezone.now()
+        )
+
+        self.assertEqual(checkpoint.transaction_id, last.id)
+        self.assertEqual(checkpoint.amount, amount * 2)
+
+    def test_create_for_client_incremental(self):
+        """ should continue from previous checkpoint """
+        self.deposit()
+        BalanceCheckpoint.create_for_client(self.client.id, timezone.now())
+        self.deposit()
+
+        checkpoint = BalanceCheckpoint.create_for_client(
+            self.client.id, timezone.now()
+        )
+
+        self.assertEqual(checkpoint.amount, amount * 2)
+        self.assertIsNone(
+            BalanceCheckpoint.create_for_client(self.client.id, timezone.now())
+        )
+
+    def test_ledger_balance(self):
+        """ should add transactions after the last checkpoint """
+        self.deposit()
+        self.deposit()
+        BalanceCheckpoint.create_for_client(self.client.id, timezone.now())
+        self.deposit()
+
+        # точка хранит сумму, старые транзакции больше не суммируются
+        Transaction.objects.filter(
+            id__lt=BalanceCheckpoint.objects.get().transaction_id
+        ).update(amount=0)
+
+        with self.assertNumQueries(2):
+            balance = Transaction.ledger_balance(client=self.client)
+
+        self.assertEqual(balance, amount * 3)
+
+    def test_ledger_balance_without_checkpoints(self):
+        """ should sum all transactions or return 0 """
+        self.assertEqual(Transaction.ledger_balance(self.client), Decimal(0))
+
+        self.deposit()
+
+        self.assertEqual(Transaction.ledger_balance(self.client), amount)
+
+    def test_lag_longer_than_tasks(self):
+        """ lag should outlive the longest writing transaction """
+        self.assertGreaterEqual(
+            settings.BALANCE_CHECKPOINT_LAG,
+            2 * settings.CELERY_TASK_TIME_LIMIT,
+        )
+
+    def test_create_for_shard(self):
+        """ should create checkpoints only for clients of shard """
+        seller = Client.objects.create_user("seller@test.ru", "password")
+        self.deposit()
+        Transaction.deposit(client=seller, bill=self.bill, amount=amount)
+
+        now = timezone.now() + timedelta(hours=1)
+        created = BalanceCheckpoint.create_for_shard(
+            shard=self.client.id % 2, shards=2, now=now
+        )
+
+        self.assertEqual(created, 1)
+        self.assertEqual(BalanceCheckpoint.objects.get().client, self.client)
+
+    def test_reconcile_with_checkpoints(self):
+        """ should reconcile balance against ledger with checkpoints """
+        self.deposit()
+        BalanceCheckpoint.create_for_client(self.client.id, timezone.now())
+        self.deposit()
+        Balance.objects.filter(client=self.client).update(amount=0)
+
+        self.assertEqual(
+            Balance.reconcile(), [(self.client.id, amount * 2, Decimal(0))]
+        )
+        self.assertEqual(
+            Balance.reconcile(full=True),
+            [(self.client.id, amount * 2, Decimal(0))],
+        )
@@ -1,8 +1,13 @@
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, call, patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-from billing.tasks import bill_activate, payment_process
+from billing.tasks import (
+    balance_checkpoints,
+    balance_checkpoints_dispatch,
+    bill_activate,
+    payment_process,
+)
 
 
 class TaskBillActivateTestCase(TestCase):
@@ -47,3 +52,22 @@ class TaskPaymentProcessTestCase(TestCase):
         mock_get_model.assert_called_once_with("billing", "Payment")
         mock_payment_model.objects.get.assert_called_once_with(id=42)
         mock_payment.process.assert_called_once_with()
+
+
+class TaskBalanceCheckpointsTestCase(TestCase):
+    """ should create balance checkpoints by shards """
+
+    @patch("billing.models.BalanceCheckpoint.create_for_shard", return_value=3)
+    def test_balance_checkpoints(self, mock_create_for_shard):
+        """ should call create_for_shard """
+        self.assertEqual(balance_checkpoints(shard=1, shards=4), 3)
+        mock_create_for_shard.assert_called_once_with(shard=1, shards=4)
+
+    @override_settings(BALANCE_CHECKPOINT_SHARDS=3)
+    @patch("billing.tasks.balance_checkpoints.delay")
+    def test_balance_checkpoints_dispatch(self, mock_delay):
+        """ should start a task for every shard """
+        self.assertEqual(balance_checkpoints_dispatch(), 3)
+        mock_delay.assert_has_calls(
+            [call(shard=shard, shards=3) for shard in range(3)]
+        )
@@ -13,4 +13,45 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# схема импортирует модели, поэтому после настройки django
+from django.urls import Resolver404, resolve  # noqa: E402
+
+from core.graphql_ws import GraphQLWebSocketApplication  # noqa: E402
+from core.schema import schema  # noqa: E402
+
+GRAPHQL_WS_PATH: str = "/graphql/"
+
+graphql_ws_application = GraphQLWebSocketApplication(schema)
+
+
+def get_asgi_view(path):
+    """
+    view из core/urls.py со своим ASGI приложением (например SSE),
+    такие запросы обрабатываем в обход Django
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+
+    return getattr(match.func, "asgi", None)
+
+
+async def application(scope, receive, send):
+    """ http - django, websocket на /graphql/ - graphql подписки """
+    if scope["type"] == "websocket":
+        if scope["path"] == GRAPHQL_WS_PATH:
+            return await graphql_ws_application(scope, receive, send)
+
+        await send({"type": "websocket.close"})
+        return
+
+    if scope["type"] == "http":
+        asgi_view = get_asgi_view(scope["path"])
+
+        if asgi_view is not None:
+            return await asgi_view(scope, receive, send)
+
+    return await django_application(scope, receive, send)
@@ -0,0 +1,151 @@
+"""
+Общие части нагрузочных тестов (management команды bench_*)
+
+Латентность копится в BenchmarkStats, запросы к базе считает
+QueryCounter через execute_wrapper соединения текущего потока.
+"""
+import json
+import math
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connection
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE")
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """ перцентиль по ближайшему рангу, values уже отсортированы """
+    if not values:
+        return 0.0
+
+    rank: int = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def check_benchmark_allowed(force: bool) -> None:
+    """ нагрузочные тесты пишут в базу, без DEBUG только явно """
+    if not settings.DEBUG and not force:
+        raise CommandError(
+            "benchmark writes to the database, use --force without DEBUG"
+        )
+
+
+class QueryCounter:
+    """
+    запросы и записанные строки в соединении текущего потока
+
+    with QueryCounter() as counter:
+        ...
+    counter.queries, counter.rows_written
+    """
+
+    def __init__(self) -> None:
+        self.queries: int = 0
+        self.rows_written: int = 0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any],
+    ) -> Any:
+        result: Any = execute(sql, params, many, context)
+        statement: str = sql.lstrip().split(" ", 1)[0].upper()
+
+        self.queries += 1
+        if statement in WRITE_STATEMENTS and context["cursor"].rowcount > 0:
+            self.rows_written += context["cursor"].rowcount
+
+        return result
+
+    def __enter__(self) -> "QueryCounter":
+        self.wrapper = connection.execute_wrapper(self)
+        self.wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.wrapper.__exit__(*exc_info)
+
+
+class BenchmarkStats:
+    """ латентность, исходы и запросы операций одного прогона """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.latencies: List[float] = []
+        self.outcomes: Counter = Counter()
+        self.queries: int = 0
+        self.rows_written: int = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+
+    def stop(self) -> None:
+        self.finished = time.perf_counter()
+
+    def add(
+        self,
+        latency: float,
+        outcome: str,
+        queries: int = 0,
+        rows_written: int = 0,
+    ) -> None:
+        """ вызывается из рабочих потоков """
+        with self.lock:
+            self.latencies.append(latency)
+            self.outcomes[outcome] += 1
+            self.queries += queries
+            self.rows_written += rows_written
+
+    @property
+    def wall_time(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        latencies: List[float] = sorted(self.latencies)
+        count: int = len(latencies)
+
+        return {
+            "name": self.name,
+            "operations": count,
+            "outcomes": dict(self.outcomes),
+            "outcome_ratios": {
+                outcome: round(value / count, 3)
+                for outcome, value in self.outcomes.items()
+            },
+            "wall_time_s": round(self.wall_time, 3),
+            "throughput_ops": round(count / self.wall_time, 1)
+            if self.wall_time
+            else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            "queries_per_op": round(self.queries / count, 2) if count else 0.0,
+            "rows_written_per_op": round(self.rows_written / count, 2)
+            if count
+            else 0.0,
+        }
+
+
+def format_summary(summary: Dict[str, Any], as_json: bool = False) -> str:
+    """ отчет прогона: строки key: value или одна строка json """
+    if as_json:
+        return json.dumps(summary)
+
+    return "\n".join(
+        [f"== {summary['name']}"]
+        + [f"{key}: {value}" for key, value in summary.items() if key != "name"]
+    )
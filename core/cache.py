@@ -0,0 +1,143 @@
+"""
+Бэкенд кэша Django на Redis
+
+В Django 3.1 своего Redis бэкенда нет, поэтому минимальная реализация
+BaseCache поверх клиента redis, которым уже пользуется order book.
+"""
+import pickle
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from redis import Redis
+
+
+class RedisCache(BaseCache):
+    """ кэш в Redis, LOCATION - url базы redis """
+
+    def __init__(self, server: str, params: Dict[str, Any]) -> None:
+        super().__init__(params)
+        self.redis: Redis = Redis.from_url(server)
+
+    def get_timeout_ms(self, timeout: Any = DEFAULT_TIMEOUT) -> Optional[int]:
+        """ время жизни в миллисекундах для SET PX, None - без срока """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+
+        return None if timeout is None else int(timeout * 1000)
+
+    def serialize(self, value: Any) -> bytes:
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def deserialize(self, value: Optional[bytes]) -> Any:
+        return None if value is None else pickle.loads(value)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+
+        timeout_ms: Optional[int] = self.get_timeout_ms(timeout)
+
+        if timeout_ms is not None and timeout_ms <= 0:
+            return False
+
+        return bool(
+            self.redis.set(key, self.serialize(value), px=timeout_ms, nx=True)
+        )
+
+    def get(self, key, default=None, version=None) -> Any:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        value: Optional[bytes] = self.redis.get(key)
+        return default if value is None else self.deserialize(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+
+        timeout_ms: Optional[int] = self.get_timeout_ms(timeout)
+
+        if timeout_ms is not None and timeout_ms <= 0:
+            self.redis.delete(key)
+            return
+
+        self.redis.set(key, self.serialize(value), px=timeout_ms)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        timeout_ms: Optional[int] = self.get_timeout_ms(timeout)
+
+        if timeout_ms is None:
+            # PERSIST вернет 0 и для ключа без срока
+            return bool(self.redis.exists(key)) and (
+                self.redis.persist(key) or True
+            )
+
+        return bool(self.redis.pexpire(key, timeout_ms))
+
+    def delete(self, key, version=None) -> bool:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self.redis.delete(key))
+
+    def has_key(self, key, version=None) -> bool:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self.redis.exists(key))
+
+    def get_many(self, keys: Iterable[Any], version=None) -> Dict[Any, Any]:
+        keys = list(keys)
+
+        if not keys:
+            return {}
+
+        made_keys: List[str] = [
+            self.make_key(key, version=version) for key in keys
+        ]
+        for key in made_keys:
+            self.validate_key(key)
+
+        values: List[Optional[bytes]] = self.redis.mget(made_keys)
+
+        return {
+            key: self.deserialize(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_many(
+        self, data, timeout=DEFAULT_TIMEOUT, version=None
+    ) -> List[Any]:
+        if not data:
+            return []
+
+        timeout_ms: Optional[int] = self.get_timeout_ms(timeout)
+
+        if timeout_ms is not None and timeout_ms <= 0:
+            self.delete_many(data.keys(), version=version)
+            return []
+
+        with self.redis.pipeline(transaction=False) as pipeline:
+            for key, value in data.items():
+                key = self.make_key(key, version=version)
+                self.validate_key(key)
+                pipeline.set(key, self.serialize(value), px=timeout_ms)
+            pipeline.execute()
+
+        return []
+
+    def delete_many(self, keys: Iterable[Any], version=None) -> None:
+        made_keys: List[str] = [
+            self.make_key(key, version=version) for key in keys
+        ]
+
+        if made_keys:
+            self.redis.delete(*made_keys)
+
+    def clear(self) -> None:
+        """ удаляем только ключи этого кэша, база redis может быть общей """
+        pattern: str = self.make_key("*")
+        keys: List[bytes] = list(self.redis.scan_iter(match=pattern))
+
+        if keys:
+            self.redis.delete(*keys)
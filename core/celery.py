@@ -2,6 +2,9 @@ import os
 
 from celery import Celery
 
+# сигналы метрик задач подключаются при импорте
+from core import celery_metrics  # noqa: F401
+
 env = "production" if os.environ.get("IS_PRODUCTION") else "dev"
 
 # set the default Django settings module for the 'celery' program.
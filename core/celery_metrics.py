@@ -0,0 +1,115 @@
+"""
+Метрики задач celery на сигналах: ожидание в очереди, время выполнения,
+повторы и падения задач auction.tasks и billing.tasks (см. core.metrics)
+
+Время постановки в очередь уходит в заголовок сообщения enqueued_at,
+ожидание считается от него или от eta отложенной задачи до старта
+в воркере, поэтому включает расхождение часов между хостами.
+Окна (rate, histogram_quantile за 5m) считаются на стороне Prometheus.
+"""
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from celery.signals import (
+    before_task_publish,
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_retry,
+)
+
+from core.metrics import Counter, Histogram
+
+TASK_PREFIXES = ("auction.tasks.", "billing.tasks.")
+ENQUEUED_HEADER = "enqueued_at"
+
+QUEUE_WAIT_BUCKETS = (
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    15.0,
+    60.0,
+    300.0,
+    900.0,
+)
+
+TASK_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "От постановки задачи в очередь до старта",
+    ("task",),
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Время выполнения задачи по итоговому состоянию",
+    ("task", "state"),
+)
+TASK_RETRIES = Counter("celery_task_retries_total", "Повторы задач", ("task",))
+TASK_FAILURES = Counter(
+    "celery_task_failures_total",
+    "Упавшие задачи по типу исключения",
+    ("task", "exception"),
+)
+
+
+def is_instrumented(name: Optional[str]) -> bool:
+    return name is not None and name.startswith(TASK_PREFIXES)
+
+
+def get_ready_time(request: Any) -> Optional[float]:
+    """ момент, с которого задача могла стартовать: постановка или eta """
+    enqueued_at: Optional[float] = getattr(request, ENQUEUED_HEADER, None)
+
+    if enqueued_at is None:
+        return None
+
+    eta: Optional[str] = getattr(request, "eta", None)
+    if eta:
+        return max(enqueued_at, datetime.fromisoformat(eta).timestamp())
+
+    return enqueued_at
+
+
+@before_task_publish.connect
+def task_published(sender=None, headers=None, **kwargs):
+    if is_instrumented(sender) and headers is not None:
+        headers[ENQUEUED_HEADER] = time.time()
+
+
+@task_prerun.connect
+def task_started(task, **kwargs):
+    if not is_instrumented(task.name):
+        return
+
+    task.request.metrics_started = time.perf_counter()
+
+    # eager задачи не проходят через очередь
+    ready: Optional[float] = get_ready_time(task.request)
+    if ready is not None:
+        TASK_QUEUE_WAIT.labels(task.name).observe(max(time.time() - ready, 0.0))
+
+
+@task_postrun.connect
+def task_finished(task, state=None, **kwargs):
+    started: Optional[float] = getattr(task.request, "metrics_started", None)
+
+    if started is not None:
+        TASK_DURATION.labels(task.name, state).observe(
+            time.perf_counter() - started
+        )
+
+
+@task_retry.connect
+def task_retried(sender=None, **kwargs):
+    if is_instrumented(sender.name):
+        TASK_RETRIES.labels(sender.name).inc()
+
+
+@task_failure.connect
+def task_failed(sender=None, exception=None, **kwargs):
+    if is_instrumented(sender.name):
+        TASK_FAILURES.labels(sender.name, type(exception).__name__).inc()
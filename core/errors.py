@@ -18,11 +18,22 @@ class CodeError(Enum):
     WRONG_TYPE = "Wrong type"
     WRONG_STATUS = "Wrong status"
     ALREADY_HAS_HIGHER_BID = "Already has higher bid"
+    LOWER_THAN_START_PRICE = "Price is lower than start price"
+    LOT_CLOSED = "Lot is closed"
     AMOUNT_SHOULD_BE_POSITIVE = "Amount param should be postive"
     NOT_ENOUGH_BALANCE = "Not enough amount on balance"
     TRANSACTION_NOT_CREATED = "Transaction was not created"
     PAYMENT_NOT_FOUND = "Payment not found"
     PRODUCT_NOT_FOUND = "Product not found"
+    WRONG_CURSOR = "Wrong cursor"
+    WRONG_BID_INPUT = "Wrong bid params"
+    TOO_MANY_BIDS = "Too many bids in one request"
+    SUBSCRIPTIONS_DISABLED = "Subscriptions are disabled"
+    QUERY_TOO_COMPLEX = "Query cost exceeds the limit"
+    QUERY_TOO_DEEP = "Query depth exceeds the limit"
+    # сообщения как в Apollo APQ, клиент распознает их по коду
+    PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+    PERSISTED_QUERY_HASH_MISMATCH = "provided sha does not match query"
 
     def __init__(self, message: str) -> None:
         self.message = message
@@ -0,0 +1,136 @@
+"""
+Backend graphql-core с кэшем разобранных и провалидированных документов
+
+Стандартный GraphQLCoreBackend разбирает запрос на каждый вызов и
+валидирует его на каждое выполнение. Здесь документ разбирается и
+валидируется один раз и живет в LRU по sha256 текста запроса.
+Перед выполнением запрос проверяется на бюджет стоимости и глубины,
+стоимость и профиль выполнения (core.graphql_profiler) уходят
+в extensions результата.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from graphql import GraphQLSchema
+from graphql.backend.base import GraphQLDocument
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult, execute
+from graphql.language import ast
+from graphql.language.parser import parse
+from graphql.validation import validate
+
+from core.errors import GenericException
+from core.graphql_profiler import profile_operation
+from core.query_cost import (
+    QueryCost,
+    check_query_cost,
+    get_operation,
+    get_query_cost,
+)
+
+DocumentKey = Tuple[GraphQLSchema, str]
+
+
+def query_hash(query: str) -> str:
+    """ sha256 текста запроса, как в persisted queries """
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def execute_validated(
+    schema: GraphQLSchema,
+    document_ast: ast.Document,
+    errors: List[GraphQLError],
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """ выполнение уже провалидированного документа в пределах бюджета """
+    if errors:
+        return ExecutionResult(errors=errors, invalid=True)
+
+    query_cost: QueryCost = get_query_cost(
+        schema,
+        document_ast,
+        kwargs.get("operation_name"),
+        kwargs.get("variable_values"),
+    )
+    extensions: Dict[str, Any] = {"cost": query_cost.as_extension()}
+
+    try:
+        check_query_cost(query_cost)
+    except GenericException as e:
+        return ExecutionResult(errors=[e], invalid=True, extensions=extensions)
+
+    operation: Optional[ast.OperationDefinition] = get_operation(
+        document_ast, kwargs.get("operation_name")
+    )
+
+    with profile_operation(
+        kwargs.get("context_value"),
+        operation.name.value if operation and operation.name else None,
+    ) as profile:
+        result: Any = execute(schema, document_ast, *args, **kwargs)
+
+    # подписка возвращает Observable, у него extensions нет
+    if isinstance(result, ExecutionResult):
+        result.extensions.update(extensions)
+        profile.log()
+
+        if settings.DEBUG:
+            result.extensions["profile"] = profile.as_extension()
+
+    return result
+
+
+class CachedDocumentBackend(GraphQLCoreBackend):
+    """ разбор и валидация один раз на запрос, LRU на max_size документов """
+
+    def __init__(self, max_size: int, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.max_size = max_size
+        self.documents: "OrderedDict[DocumentKey, GraphQLDocument]" = (
+            OrderedDict()
+        )
+        self.lock = threading.Lock()
+
+    def document_from_string(
+        self, schema: GraphQLSchema, document_string: Any
+    ) -> GraphQLDocument:
+        if isinstance(document_string, ast.Document):
+            return super().document_from_string(schema, document_string)
+
+        key: DocumentKey = (schema, query_hash(document_string))
+
+        with self.lock:
+            document = self.documents.get(key)
+            if document is not None:
+                self.documents.move_to_end(key)
+                return document
+
+        # ошибки разбора не кэшируем, их вернет view
+        document_ast: ast.Document = parse(document_string)
+        errors: List[GraphQLError] = validate(schema, document_ast)
+
+        document = GraphQLDocument(
+            schema=schema,
+            document_string=document_string,
+            document_ast=document_ast,
+            execute=partial(
+                execute_validated,
+                schema,
+                document_ast,
+                errors,
+                **self.execute_params,
+            ),
+        )
+
+        with self.lock:
+            self.documents[key] = document
+            while len(self.documents) > self.max_size:
+                self.documents.popitem(last=False)
+
+        return document
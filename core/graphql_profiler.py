@@ -0,0 +1,146 @@
+"""
+Профиль выполнения GraphQL операции
+
+profile_operation открывается на операцию в execute_validated и через
+execute_wrapper соединения считает SQL запросы и время базы.
+ProfilerMiddleware из GRAPHENE["MIDDLEWARE"] добавляет время и запросы
+резолверов по полям "Тип.поле". Запросы пачек DataLoader выполняются
+между резолверами и попадают только в итог операции.
+
+В DEBUG профиль уходит в extensions ответа, всегда - строкой json в лог.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ATTR: str = "graphql_profile"
+
+
+class FieldStats:
+    """ вызовы резолвера поля за операцию """
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.time: float = 0.0
+        self.queries: int = 0
+
+
+class OperationProfile:
+    """ время, SQL запросы и поля одной операции """
+
+    def __init__(self, operation_name: Optional[str]) -> None:
+        self.operation_name = operation_name
+        self.queries: int = 0
+        self.db_time: float = 0.0
+        self.fields: Dict[str, FieldStats] = {}
+        self.started: float = time.perf_counter()
+        self.duration: float = 0.0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Dict[str, Any],
+    ) -> Any:
+        started: float = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed: float = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += elapsed
+
+            if elapsed * 1000 >= settings.GRAPHQL_SLOW_QUERY_MS:
+                logger.warning(
+                    f"slow query {elapsed * 1000:.1f}ms"
+                    f" in {self.operation_name}: {sql}"
+                )
+
+    def add_field(self, name: str, elapsed: float, queries: int) -> None:
+        stats: Optional[FieldStats] = self.fields.get(name)
+        if stats is None:
+            stats = self.fields[name] = FieldStats()
+
+        stats.calls += 1
+        stats.time += elapsed
+        stats.queries += queries
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def as_extension(self) -> Dict[str, Any]:
+        """ итог операции и самые долгие поля """
+        fields: List[Any] = sorted(
+            self.fields.items(), key=lambda item: item[1].time, reverse=True
+        )
+
+        return {
+            "operation": self.operation_name,
+            "durationMs": round(self.duration * 1000, 2),
+            "queries": self.queries,
+            "dbTimeMs": round(self.db_time * 1000, 2),
+            "fields": [
+                {
+                    "field": name,
+                    "calls": stats.calls,
+                    "durationMs": round(stats.time * 1000, 2),
+                    "queries": stats.queries,
+                }
+                for name, stats in fields[: settings.GRAPHQL_PROFILE_FIELDS]
+            ],
+        }
+
+    def log(self) -> None:
+        logger.info(json.dumps({"graphql_profile": self.as_extension()}))
+
+
+@contextmanager
+def profile_operation(
+    context: Any, operation_name: Optional[str]
+) -> Iterator[OperationProfile]:
+    """ профиль операции, резолверы находят его в context """
+    profile = OperationProfile(operation_name)
+
+    if context is not None:
+        setattr(context, PROFILE_ATTR, profile)
+
+    try:
+        with connection.execute_wrapper(profile):
+            yield profile
+    finally:
+        profile.finish()
+
+        if context is not None:
+            setattr(context, PROFILE_ATTR, None)
+
+
+class ProfilerMiddleware:
+    """ время и SQL запросы резолверов полей в профиль операции """
+
+    def resolve(self, next: Callable[..., Any], root: Any, info: Any, **args):
+        profile: Optional[OperationProfile] = getattr(
+            info.context, PROFILE_ATTR, None
+        )
+
+        if profile is None:
+            return next(root, info, **args)
+
+        queries: int = profile.queries
+        started: float = time.perf_counter()
+        try:
+            return next(root, info, **args)
+        finally:
+            profile.add_field(
+                f"{info.parent_type.name}.{info.field_name}",
+                time.perf_counter() - started,
+                profile.queries - queries,
+            )
@@ -0,0 +1,202 @@
+"""
+GraphQL подписки по websocket, протокол graphql-ws
+(subscriptions-transport-ws), без channels
+
+Запрос подписки выполняется в потоке Django (резолверы ходят в базу),
+события приходят из потока pub/sub и перекладываются в очередь
+соединения, из которой их отправляет event loop.
+"""
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.signals import request_finished, request_started
+from graphene import Schema
+from graphql.execution import ExecutionResult
+
+from core.views import graphql_backend
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+GRAPHQL_WS: str = "graphql-ws"
+
+GQL_CONNECTION_INIT: str = "connection_init"
+GQL_CONNECTION_ACK: str = "connection_ack"
+GQL_CONNECTION_ERROR: str = "connection_error"
+GQL_CONNECTION_TERMINATE: str = "connection_terminate"
+GQL_START: str = "start"
+GQL_DATA: str = "data"
+GQL_ERROR: str = "error"
+GQL_COMPLETE: str = "complete"
+GQL_STOP: str = "stop"
+
+
+class GraphQLWebSocketConnection:
+    """ одно websocket соединение и его подписки """
+
+    def __init__(
+        self, schema: Schema, scope: Message, receive: Receive, send: Send
+    ) -> None:
+        self.schema = schema
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.loop = asyncio.get_event_loop()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.subscriptions: Dict[str, Any] = {}
+        self.context = SimpleNamespace(scope=scope, connection_params={})
+
+    async def run(self) -> None:
+        message: Message = await self.receive()
+
+        if message["type"] != "websocket.connect":
+            return
+
+        if GRAPHQL_WS not in self.scope.get("subprotocols", []):
+            await self.send({"type": "websocket.close", "code": 1002})
+            return
+
+        await self.send({"type": "websocket.accept", "subprotocol": GRAPHQL_WS})
+        sender = asyncio.ensure_future(self.send_loop())
+
+        try:
+            while True:
+                message = await self.receive()
+
+                if message["type"] == "websocket.disconnect":
+                    break
+
+                if not await self.handle(message.get("text") or ""):
+                    await self.outbox.join()
+                    await self.send({"type": "websocket.close", "code": 1000})
+                    break
+        finally:
+            for disposable in self.subscriptions.values():
+                disposable.dispose()
+            self.subscriptions.clear()
+            sender.cancel()
+
+    async def send_loop(self) -> None:
+        while True:
+            payload: Message = await self.outbox.get()
+            try:
+                await self.send(
+                    {"type": "websocket.send", "text": json.dumps(payload)}
+                )
+            finally:
+                self.outbox.task_done()
+
+    def put(self, payload: Message) -> None:
+        """ отправка из любого потока """
+        self.loop.call_soon_threadsafe(self.outbox.put_nowait, payload)
+
+    async def handle(self, text: str) -> bool:
+        """ сообщение клиента, False - закрыть соединение """
+        try:
+            message: Message = json.loads(text)
+            op_type: Optional[str] = message.get("type")
+            op_id: Optional[str] = message.get("id")
+        except (ValueError, AttributeError):
+            self.put({"type": GQL_CONNECTION_ERROR, "payload": "Wrong message"})
+            return True
+
+        if op_type == GQL_CONNECTION_INIT:
+            self.context.connection_params = message.get("payload") or {}
+            self.put({"type": GQL_CONNECTION_ACK})
+        elif op_type == GQL_CONNECTION_TERMINATE:
+            return False
+        elif op_type == GQL_START and op_id is not None:
+            await self.start(op_id, message.get("payload") or {})
+        elif op_type == GQL_STOP and op_id is not None:
+            self.stop(op_id)
+        else:
+            self.put(
+                {
+                    "type": GQL_ERROR,
+                    "id": op_id,
+                    "payload": {"message": f"Wrong type {op_type}"},
+                }
+            )
+
+        return True
+
+    def execute(self, payload: Message) -> Any:
+        """
+        запрос идет мимо обработчика django: сигналы цикла запроса
+        закрывают протухшие соединения с базой, как в auction.sse
+        """
+        request_started.send(sender=self.__class__)
+        try:
+            return self.schema.execute(
+                payload.get("query"),
+                variable_values=payload.get("variables"),
+                operation_name=payload.get("operationName"),
+                context_value=self.context,
+                allow_subscriptions=True,
+                backend=graphql_backend,
+            )
+        finally:
+            request_finished.send(sender=self.__class__)
+
+    async def start(self, op_id: str, payload: Message) -> None:
+        self.stop(op_id)
+
+        result: Any = await sync_to_async(self.execute)(payload)
+
+        # ошибка запроса или обычный query/mutation
+        if isinstance(result, ExecutionResult):
+            self.put(
+                {"type": GQL_DATA, "id": op_id, "payload": result.to_dict()}
+            )
+            self.put({"type": GQL_COMPLETE, "id": op_id})
+            return
+
+        def on_next(item: ExecutionResult) -> None:
+            self.put({"type": GQL_DATA, "id": op_id, "payload": item.to_dict()})
+
+        def on_error(error: Exception) -> None:
+            logger.warning(f"failed subscription {op_id}: {error}")
+            self.put(
+                {
+                    "type": GQL_ERROR,
+                    "id": op_id,
+                    "payload": {"message": str(error)},
+                }
+            )
+
+        def on_completed() -> None:
+            self.subscriptions.pop(op_id, None)
+            self.put({"type": GQL_COMPLETE, "id": op_id})
+
+        self.subscriptions[op_id] = result.subscribe(
+            on_next=on_next, on_error=on_error, on_completed=on_completed
+        )
+
+    def stop(self, op_id: str) -> None:
+        disposable: Optional[Any] = self.subscriptions.pop(op_id, None)
+
+        if disposable is not None:
+            disposable.dispose()
+            self.put({"type": GQL_COMPLETE, "id": op_id})
+
+
+class GraphQLWebSocketApplication:
+    """ ASGI приложение для websocket подписок """
+
+    def __init__(self, schema: Schema) -> None:
+        self.schema = schema
+
+    async def __call__(
+        self, scope: Message, receive: Receive, send: Send
+    ) -> None:
+        connection = GraphQLWebSocketConnection(
+            self.schema, scope, receive, send
+        )
+        await connection.run()
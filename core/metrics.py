@@ -0,0 +1,168 @@
+"""
+Метрики в текстовом формате Prometheus (endpoint /metrics)
+
+Метрики prometheus_client регистрируются один раз при импорте
+модуля-владельца (auction.metrics, billing.metrics, core.celery_metrics).
+
+Несколько процессов (воркеры gunicorn и celery): с переменной окружения
+PROMETHEUS_MULTIPROC_DIR значения пишутся в файлы каталога и /metrics
+собирает их multiprocess режимом prometheus_client. Каталог чистится
+при деплое, до старта процессов.
+
+Дорогие значения (запросы к базе) считает задача refresh_metrics
+раз в METRICS_REFRESH_INTERVAL, /metrics берет их из кэша Django.
+
+Доступ к /metrics: адреса METRICS_ALLOWED_IPS или токен METRICS_TOKEN
+в заголовке Authorization: Bearer <token>.
+"""
+import hmac
+import os
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# prometheus_client 0.8 (версию закрепляет flower) читает каталог только
+# из переменной в нижнем регистре и при импорте, поэтому переносим ее до него
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ.setdefault(
+        "prometheus_multiproc_dir", os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    )
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.http import (  # noqa: E402
+    HttpRequest,
+    HttpResponse,
+    HttpResponseForbidden,
+)
+from prometheus_client import (  # noqa: E402
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily, Metric  # noqa: E402
+from prometheus_client.multiprocess import (  # noqa: E402
+    MultiProcessCollector,
+)
+
+__all__ = (
+    "LATENCY_BUCKETS",
+    "LAG_BUCKETS",
+    "Counter",
+    "Histogram",
+    "CachedGauge",
+    "refresh_gauges",
+    "sample_value",
+    "metrics",
+)
+
+CACHE_PREFIX: str = "metrics:gauge"
+
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+# задержки фоновых процессов, секунды
+LAG_BUCKETS: Tuple[float, ...] = (
+    1.0,
+    5.0,
+    15.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+    600.0,
+    1800.0,
+    3600.0,
+)
+
+
+class CachedGauge:
+    """
+    gauge, значение которого считает refresh_metrics, а не каждый scrape
+
+    значение живет в кэше несколько интервалов обновления: если задача
+    перестала работать, метрика пропадает, а не застывает
+    """
+
+    def __init__(
+        self, name: str, documentation: str, callback: Callable[[], float]
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        CACHED_GAUGES.append(self)
+
+    @property
+    def cache_key(self) -> str:
+        return f"{CACHE_PREFIX}:{self.name}"
+
+    def refresh(self) -> None:
+        cache.set(
+            self.cache_key,
+            float(self.callback()),
+            timeout=settings.METRICS_REFRESH_INTERVAL * 4,
+        )
+
+    def collect(self) -> Iterator[Metric]:
+        value = cache.get(self.cache_key)
+
+        if value is not None:
+            yield GaugeMetricFamily(self.name, self.documentation, value=value)
+
+
+CACHED_GAUGES: List[CachedGauge] = []
+
+
+def refresh_gauges() -> None:
+    for gauge in CACHED_GAUGES:
+        gauge.refresh()
+
+
+def sample_value(name: str, labels: Optional[Dict[str, str]] = None) -> float:
+    """ значение метрики этого процесса, 0 если ее еще не было """
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+class Collector:
+    """ значения процессов и закэшированные gauge для одной выдачи """
+
+    def collect(self) -> Iterator[Metric]:
+        if os.environ.get("prometheus_multiproc_dir"):
+            yield from MultiProcessCollector(None).collect()
+        else:
+            yield from REGISTRY.collect()
+
+        for gauge in CACHED_GAUGES:
+            yield from gauge.collect()
+
+
+def is_metrics_allowed(request: HttpRequest) -> bool:
+    token: str = settings.METRICS_TOKEN or ""
+
+    if token and hmac.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", "").encode(),
+        f"Bearer {token}".encode(),
+    ):
+        return True
+
+    return request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request: HttpRequest) -> HttpResponse:
+    """ endpoint для Prometheus """
+    if not is_metrics_allowed(request):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        generate_latest(Collector()), content_type=CONTENT_TYPE_LATEST
+    )
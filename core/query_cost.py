@@ -0,0 +1,236 @@
+"""
+Статическая оценка стоимости и глубины GraphQL запроса
+
+Считается до выполнения по документу и переменным. Поле стоит свой вес
+из GRAPHQL_FIELD_COSTS: по умолчанию 1 за объект и 0 за скаляр.
+Вложенные поля списка умножаются на размер страницы (first, pageSize)
+или на GRAPHQL_DEFAULT_LIST_SIZE, если размер не задан. У relay
+connection размер из аргументов поля переходит на его список edges.
+Поля интроспекции (__schema, __type, __typename) бесплатны.
+"""
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from graphql import GraphQLSchema
+from graphql.language import ast
+from graphql.type.definition import (
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLObjectType,
+    get_named_type,
+)
+
+from core.errors import CodeError
+
+PAGE_SIZE_ARGUMENTS: Tuple[str, ...] = ("first", "pageSize")
+
+Variables = Dict[str, Any]
+Fragments = Dict[str, ast.FragmentDefinition]
+
+
+class QueryCost(NamedTuple):
+    cost: int
+    depth: int
+
+    def as_extension(self) -> Dict[str, int]:
+        """ для extensions ответа """
+        return {
+            "requested": self.cost,
+            "maximum": settings.GRAPHQL_MAX_COST,
+            "depth": self.depth,
+            "maximumDepth": settings.GRAPHQL_MAX_DEPTH,
+        }
+
+
+def get_operation(
+    document_ast: ast.Document, operation_name: Optional[str]
+) -> Optional[ast.OperationDefinition]:
+    operations = [
+        definition
+        for definition in document_ast.definitions
+        if isinstance(definition, ast.OperationDefinition)
+    ]
+
+    if operation_name is None:
+        return operations[0] if len(operations) == 1 else None
+
+    for operation in operations:
+        if operation.name and operation.name.value == operation_name:
+            return operation
+
+    return None
+
+
+def get_root_type(
+    schema: GraphQLSchema, operation: ast.OperationDefinition
+) -> Optional[GraphQLObjectType]:
+    if operation.operation == "mutation":
+        return schema.get_mutation_type()
+    if operation.operation == "subscription":
+        return schema.get_subscription_type()
+    return schema.get_query_type()
+
+
+def get_variables(
+    operation: ast.OperationDefinition, variables: Optional[Variables]
+) -> Variables:
+    """ переменные запроса с целыми значениями по умолчанию """
+    values: Variables = dict(variables or {})
+
+    for definition in operation.variable_definitions or []:
+        name: str = definition.variable.name.value
+        if name not in values and isinstance(
+            definition.default_value, ast.IntValue
+        ):
+            values[name] = int(definition.default_value.value)
+
+    return values
+
+
+def get_page_size(field: ast.Field, variables: Variables) -> Optional[int]:
+    """ размер страницы из аргументов поля """
+    for argument in field.arguments or []:
+        if argument.name.value not in PAGE_SIZE_ARGUMENTS:
+            continue
+
+        value: Any = argument.value
+        if isinstance(value, ast.Variable):
+            value = variables.get(value.name.value)
+        elif isinstance(value, ast.IntValue):
+            value = int(value.value)
+
+        if isinstance(value, int) and value > 0:
+            return value
+
+    return None
+
+
+def get_field_weight(type_name: str, field_name: str, is_leaf: bool) -> int:
+    default: int = 0 if is_leaf else 1
+    return settings.GRAPHQL_FIELD_COSTS.get(
+        f"{type_name}.{field_name}", default
+    )
+
+
+class QueryCostAnalyzer:
+    """ обход документа с подстановкой фрагментов и переменных """
+
+    def __init__(
+        self, schema: GraphQLSchema, fragments: Fragments, variables: Variables
+    ) -> None:
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+
+    def selection_set_cost(
+        self,
+        selection_set: Optional[ast.SelectionSet],
+        parent_type: Any,
+        page_size: Optional[int],
+    ) -> QueryCost:
+        cost: int = 0
+        depth: int = 0
+
+        for selection in selection_set.selections if selection_set else []:
+            if isinstance(selection, ast.Field):
+                child: QueryCost = self.field_cost(
+                    selection, parent_type, page_size
+                )
+            else:
+                child = self.fragment_cost(selection, parent_type, page_size)
+
+            cost += child.cost
+            depth = max(depth, child.depth)
+
+        return QueryCost(cost, depth)
+
+    def fragment_cost(
+        self, selection: Any, parent_type: Any, page_size: Optional[int]
+    ) -> QueryCost:
+        if isinstance(selection, ast.FragmentSpread):
+            fragment: Any = self.fragments.get(selection.name.value)
+        else:
+            fragment = selection
+
+        if fragment is None:
+            return QueryCost(0, 0)
+
+        if fragment.type_condition is not None:
+            parent_type = (
+                self.schema.get_type(fragment.type_condition.name.value)
+                or parent_type
+            )
+
+        return self.selection_set_cost(
+            fragment.selection_set, parent_type, page_size
+        )
+
+    def field_cost(
+        self, field: ast.Field, parent_type: Any, page_size: Optional[int]
+    ) -> QueryCost:
+        name: str = field.name.value
+        fields: Dict[str, Any] = getattr(parent_type, "fields", {})
+
+        if name.startswith("__") or name not in fields:
+            return QueryCost(0, 0)
+
+        field_type: Any = fields[name].type
+        if isinstance(field_type, GraphQLNonNull):
+            field_type = field_type.of_type
+
+        size: Optional[int] = get_page_size(field, self.variables)
+
+        if isinstance(field_type, GraphQLList):
+            # размер страницы connection достается ее edges
+            multiplier: int = (
+                size or page_size or settings.GRAPHQL_DEFAULT_LIST_SIZE
+            )
+            size = None
+        else:
+            multiplier = 1
+
+        children: QueryCost = self.selection_set_cost(
+            field.selection_set, get_named_type(field_type), size
+        )
+        weight: int = get_field_weight(
+            parent_type.name, name, field.selection_set is None
+        )
+
+        return QueryCost(
+            weight + multiplier * children.cost, children.depth + 1
+        )
+
+
+def get_query_cost(
+    schema: GraphQLSchema,
+    document_ast: ast.Document,
+    operation_name: Optional[str] = None,
+    variables: Optional[Variables] = None,
+) -> QueryCost:
+    """ стоимость и глубина операции документа """
+    operation = get_operation(document_ast, operation_name)
+
+    if operation is None:
+        return QueryCost(0, 0)
+
+    fragments: Fragments = {
+        definition.name.value: definition
+        for definition in document_ast.definitions
+        if isinstance(definition, ast.FragmentDefinition)
+    }
+    analyzer = QueryCostAnalyzer(
+        schema, fragments, get_variables(operation, variables)
+    )
+
+    return analyzer.selection_set_cost(
+        operation.selection_set, get_root_type(schema, operation), None
+    )
+
+
+def check_query_cost(query_cost: QueryCost) -> None:
+    """ отказ запросам сверх бюджета """
+    if query_cost.depth > settings.GRAPHQL_MAX_DEPTH:
+        raise CodeError.QUERY_TOO_DEEP.exception
+
+    if query_cost.cost > settings.GRAPHQL_MAX_COST:
+        raise CodeError.QUERY_TOO_COMPLEX.exception
@@ -35,4 +35,13 @@ class Mutation(
     pass
 
 
-schema = graphene.Schema(query=Query, mutation=Mutation)
+class Subscription(
+    auction_schema.Subscription,
+    graphene.ObjectType,
+):
+    pass
+
+
+schema = graphene.Schema(
+    query=Query, mutation=Mutation, subscription=Subscription
+)
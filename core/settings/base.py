@@ -39,6 +39,7 @@ GRAPHENE = {
     "SCHEMA": "core.schema.schema",
     "MIDDLEWARE": [
         "graphql_jwt.middleware.JSONWebTokenMiddleware",
+        "core.graphql_profiler.ProfilerMiddleware",
     ],
 }
 
@@ -94,6 +95,36 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TASK_TIME_LIMIT = 5 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
+CELERY_BEAT_SCHEDULE = {
+    "close-due-products": {
+        "task": "auction.tasks.close_due_products",
+        "schedule": AUCTION_CLOSER_TICK,  # noqa
+    },
+    "order-book-flush": {
+        "task": "auction.tasks.order_book_flush",
+        "schedule": AUCTION_ORDER_BOOK_FLUSH_INTERVAL,  # noqa
+    },
+    "balance-checkpoints": {
+        "task": "billing.tasks.balance_checkpoints_dispatch",
+        "schedule": BALANCE_CHECKPOINT_INTERVAL,  # noqa
+    },
+    "refresh-metrics": {
+        "task": "auction.tasks.refresh_metrics",
+        "schedule": METRICS_REFRESH_INTERVAL,  # noqa
+    },
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "core.cache.RedisCache",
+        "LOCATION": CACHE_URL,  # noqa
+    }
+    if CACHE_URL  # noqa
+    else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    }
+}
 
 DATABASES = {
     "default": {
@@ -170,5 +201,9 @@ LOGGING = {
             "handlers": ["console"],
             "level": LOG_LEVEL,
         },
+        "core.graphql_profiler": {
+            "handlers": ["console"],
+            "level": LOG_LEVEL,
+        },
     },
 }
@@ -1,6 +1,7 @@
 # some business logic conf
 import os
-from typing import Dict, Union
+from decimal import Decimal
+from typing import Dict, List, Optional, Union
 
 DEFAULT_COMPANY: int = 1
 COMMISSION_PART: Dict[int, int] = {
@@ -19,3 +20,86 @@ PAYMENT_SYSTEMS: Dict[str, Dict[str, Union[str, bool, None]]] = {
         "return_url": PAYMENT_RETURN_URL,
     }
 }
+
+# Order book активных лотов: None - выключен, "memory" или "redis"
+AUCTION_ORDER_BOOK: Optional[str] = os.environ.get("AUCTION_ORDER_BOOK")
+AUCTION_ORDER_BOOK_URL: Optional[str] = os.environ.get(
+    "AUCTION_ORDER_BOOK_URL"
+) or os.environ.get("REDIS_URL")
+AUCTION_ORDER_BOOK_DEPTH: int = 100  # сколько лучших ставок держим по лоту
+AUCTION_ORDER_BOOK_FLUSH_BATCH: int = 500
+AUCTION_ORDER_BOOK_FLUSH_INTERVAL: float = 1.0  # секунды
+
+# Pub/sub событий лотов для подписок: None - выключен, "memory" или "redis",
+# "memory" видит только события своего процесса, а закрытия лотов
+# публикует воркер celery, поэтому по умолчанию redis при REDIS_URL
+AUCTION_PUBSUB_URL: Optional[str] = os.environ.get(
+    "AUCTION_PUBSUB_URL"
+) or os.environ.get("REDIS_URL")
+AUCTION_PUBSUB: Optional[str] = os.environ.get(
+    "AUCTION_PUBSUB", "redis" if AUCTION_PUBSUB_URL else None
+)
+
+# SSE поток событий лотов (events/)
+SSE_MAX_PRODUCTS: int = 100  # лотов на одно соединение
+SSE_KEEPALIVE: float = 15.0  # секунды между комментариями при тишине
+SSE_RETRY_MS: int = 5000  # пауза переподключения клиента
+
+# GraphQL: разобранные документы в LRU процесса, persisted queries в кэше
+GRAPHQL_DOCUMENT_CACHE_SIZE: int = 1000
+GRAPHQL_PERSISTED_QUERY_TIMEOUT: int = 7 * 24 * 60 * 60  # секунды
+
+# Бюджет GraphQL запроса, считается до выполнения (core.query_cost)
+GRAPHQL_MAX_COST: int = 1000
+GRAPHQL_MAX_DEPTH: int = 10
+GRAPHQL_DEFAULT_LIST_SIZE: int = 10  # для списков без first/pageSize
+# вес поля "Тип.поле", по умолчанию объект - 1, скаляр - 0
+GRAPHQL_FIELD_COSTS: Dict[str, int] = {
+    "Query.searchProducts": 5,
+    "ProductConnection.totalCount": 5,
+}
+
+# Профиль операций GraphQL (core.graphql_profiler)
+GRAPHQL_SLOW_QUERY_MS: float = 100.0  # SQL запрос дольше - warning в лог
+GRAPHQL_PROFILE_FIELDS: int = 20  # самых долгих полей в профиле
+
+# Максимальный размер страницы productListConnection
+PRODUCT_LIST_MAX_FIRST: int = 100
+PRODUCT_SEARCH_MAX_LENGTH: int = 256
+
+# Кэш чтений товаров: CACHE_URL - Redis, иначе LRU в памяти процесса
+CACHE_URL: Optional[str] = os.environ.get("CACHE_URL")
+PRODUCT_CACHE_TIMEOUT: int = 60  # секунды, страховка поверх инвалидации
+
+# Максимум ставок в одном createBids
+BIDS_BATCH_MAX_SIZE: int = 100
+
+# Шаг, на который автоставка перебивает конкурента
+PROXY_BID_INCREMENT: Decimal = Decimal("1.00")
+
+# Закрытие лотов по времени
+# ставка по лоту с мягким закрытием продлевает его до ставка + столько секунд
+SOFT_CLOSE_EXTENSION: int = 2 * 60
+AUCTION_CLOSER_TICK: float = 1.0  # секунды
+AUCTION_CLOSER_BATCH: int = 500
+# после стольких неудачных закрытий лот остается на ручной разбор
+AUCTION_CLOSER_MAX_ATTEMPTS: int = 10
+
+# Контрольные точки балансов
+BALANCE_CHECKPOINT_INTERVAL: float = 60 * 60.0  # секунды
+BALANCE_CHECKPOINT_SHARDS: int = 8  # параллельных задач на один проход
+# секунды, не трогаем свежие транзакции: лаг должен быть заметно больше
+# самой долгой пишущей транзакции, задачи celery живут до
+# CELERY_TASK_TIME_LIMIT (5 минут)
+BALANCE_CHECKPOINT_LAG: int = 30 * 60
+
+# Метрики (/metrics), значения процессов собирает prometheus_client
+# по каталогу из переменной окружения PROMETHEUS_MULTIPROC_DIR, см. core.metrics
+# доступ без токена только с этих адресов
+METRICS_ALLOWED_IPS: List[str] = (
+    os.environ.get("METRICS_ALLOWED_IPS") or "127.0.0.1"
+).split(",")
+# токен для Authorization: Bearer, без него доступ только по адресу
+METRICS_TOKEN: Optional[str] = os.environ.get("METRICS_TOKEN")
+# секунды, как часто refresh_metrics считает метрики с запросами к базе
+METRICS_REFRESH_INTERVAL: float = 15.0
@@ -0,0 +1,64 @@
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from auction.models import Client
+from core.benchmark import (
+    BenchmarkStats,
+    QueryCounter,
+    check_benchmark_allowed,
+    percentile,
+)
+
+
+class BenchmarkStatsTestCase(SimpleTestCase):
+    """ benchmark statistics """
+
+    def test_percentile(self):
+        """ should take nearest rank """
+        values = [float(value) for value in range(1, 101)]
+
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 99), 99.0)
+        self.assertEqual(percentile([1.0], 95), 1.0)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_summary(self):
+        """ should summarize latencies, outcomes and queries """
+        stats = BenchmarkStats("test")
+        stats.started, stats.finished = 10.0, 12.0
+        for latency in (0.001, 0.002, 0.003, 0.004):
+            stats.add(latency, "accepted", queries=3, rows_written=2)
+        stats.add(0.1, "rejected", queries=2)
+
+        summary = stats.summary()
+
+        self.assertEqual(summary["operations"], 5)
+        self.assertEqual(summary["outcomes"], {"accepted": 4, "rejected": 1})
+        self.assertEqual(summary["outcome_ratios"]["rejected"], 0.2)
+        self.assertEqual(summary["throughput_ops"], 2.5)
+        self.assertEqual(summary["p50_ms"], 3.0)
+        self.assertEqual(summary["p99_ms"], 100.0)
+        self.assertEqual(summary["queries_per_op"], 2.8)
+        self.assertEqual(summary["rows_written_per_op"], 1.6)
+
+    @override_settings(DEBUG=False)
+    def test_check_benchmark_allowed(self):
+        """ should require --force without DEBUG """
+        with self.assertRaises(CommandError):
+            check_benchmark_allowed(force=False)
+
+        check_benchmark_allowed(force=True)
+
+
+class QueryCounterTestCase(TestCase):
+    def test_query_counter(self):
+        """ should count queries and written rows """
+        Client.objects.create(email="first@test.ru")
+        Client.objects.create(email="second@test.ru")
+
+        with QueryCounter() as counter:
+            Client.objects.update(is_active=False)
+            list(Client.objects.all())
+
+        self.assertEqual(counter.queries, 2)
+        self.assertEqual(counter.rows_written, 2)
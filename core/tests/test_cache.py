@@ -0,0 +1,74 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from redis import Redis, RedisError
+
+from core.cache import RedisCache
+
+
+def is_redis_available() -> bool:
+    if not settings.AUCTION_ORDER_BOOK_URL:
+        return False
+    try:
+        return Redis.from_url(settings.AUCTION_ORDER_BOOK_URL).ping()
+    except RedisError:
+        return False
+
+
+@skipUnless(is_redis_available(), "redis is not available")
+class RedisCacheTestCase(SimpleTestCase):
+    """ redis cache backend """
+
+    def setUp(self):
+        self.cache = RedisCache(
+            settings.AUCTION_ORDER_BOOK_URL, {"KEY_PREFIX": "test:cache"}
+        )
+        self.cache.clear()
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def test_set_get(self):
+        """ should keep python values """
+        self.cache.set("key", {"price": 1}, timeout=10)
+
+        self.assertEqual(self.cache.get("key"), {"price": 1})
+        self.assertIsNone(self.cache.get("missing"))
+        self.assertEqual(self.cache.get("missing", 42), 42)
+
+    def test_add(self):
+        """ should not overwrite existing key """
+        self.assertTrue(self.cache.add("key", 1))
+        self.assertFalse(self.cache.add("key", 2))
+        self.assertEqual(self.cache.get("key"), 1)
+
+    def test_timeout(self):
+        """ should expire by timeout and skip non-positive timeout """
+        self.cache.set("key", 1, timeout=10)
+        self.assertTrue(0 < self.cache.redis.pttl(self.cache.make_key("key")))
+
+        self.cache.set("key", 1, timeout=0)
+        self.assertFalse(self.cache.has_key("key"))
+
+        self.cache.set("key", 1, timeout=None)
+        self.assertEqual(self.cache.redis.pttl(self.cache.make_key("key")), -1)
+
+    def test_many(self):
+        """ should get, set and delete many keys """
+        self.cache.set_many({"a": 1, "b": 2})
+
+        self.assertEqual(self.cache.get_many(["a", "b", "c"]), {"a": 1, "b": 2})
+
+        self.cache.delete_many(["a", "b"])
+        self.assertEqual(self.cache.get_many(["a", "b"]), {})
+
+    def test_clear(self):
+        """ should remove only own keys """
+        self.cache.redis.set("test:other", 1)
+        self.cache.set("key", 1)
+
+        self.cache.clear()
+
+        self.assertFalse(self.cache.has_key("key"))
+        self.assertTrue(self.cache.redis.delete("test:other"))
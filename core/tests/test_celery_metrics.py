@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from celery.signals import task_retry
+from django.test import TestCase
+
+from auction.tasks import deal_send_email
+from billing.tasks import payment_process
+from core.celery_metrics import ENQUEUED_HEADER, get_ready_time, task_published
+from core.metrics import sample_value
+
+TASK = "billing.tasks.payment_process"
+DURATION_COUNT = "celery_task_duration_seconds_count"
+FAILURES = "celery_task_failures_total"
+RETRIES = "celery_task_retries_total"
+
+
+class CeleryMetricsTestCase(TestCase):
+    """ celery task metrics """
+
+    def test_success(self):
+        """ should record run time by final state """
+        labels = {"task": "auction.tasks.deal_send_email", "state": "SUCCESS"}
+        before = sample_value(DURATION_COUNT, labels)
+
+        deal_send_email.apply(kwargs={"deal_id": 1, "type": "test"})
+
+        self.assertEqual(sample_value(DURATION_COUNT, labels) - before, 1)
+
+    def test_failure(self):
+        """ should count failures by exception type """
+        failure_labels = {"task": TASK, "exception": "DoesNotExist"}
+        duration_labels = {"task": TASK, "state": "FAILURE"}
+        failures_before = sample_value(FAILURES, failure_labels)
+        duration_before = sample_value(DURATION_COUNT, duration_labels)
+
+        payment_process.apply(kwargs={"payment_id": 0})
+
+        self.assertEqual(
+            sample_value(FAILURES, failure_labels) - failures_before, 1
+        )
+        self.assertEqual(
+            sample_value(DURATION_COUNT, duration_labels) - duration_before, 1
+        )
+
+    def test_retry(self):
+        """ should count retries of instrumented tasks only """
+        before = sample_value(RETRIES, {"task": TASK})
+
+        task_retry.send(sender=payment_process, request=None, reason="test")
+        other_task = type("OtherTask", (), {"name": "other.task"})()
+        task_retry.send(sender=other_task, request=None, reason="test")
+
+        self.assertEqual(sample_value(RETRIES, {"task": TASK}) - before, 1)
+        self.assertEqual(sample_value(RETRIES, {"task": "other.task"}), 0)
+
+    def test_published(self):
+        """ should stamp only instrumented tasks on publish """
+        headers, other = {}, {}
+
+        task_published(sender=TASK, headers=headers)
+        task_published(sender="other.task", headers=other)
+
+        self.assertAlmostEqual(headers[ENQUEUED_HEADER], time.time(), delta=5)
+        self.assertEqual(other, {})
+
+    def test_ready_time(self):
+        """ should wait from enqueue or eta of delayed task """
+        now = time.time()
+        eta = datetime.now(timezone.utc) + timedelta(seconds=60)
+
+        self.assertIsNone(get_ready_time(SimpleNamespace()))
+        self.assertEqual(
+            get_ready_time(SimpleNamespace(enqueued_at=now, eta=None)), now
+        )
+        self.assertAlmostEqual(
+            get_ready_time(
+                SimpleNamespace(enqueued_at=now, eta=eta.isoformat())
+            ),
+            now + 60,
+            delta=1,
+        )
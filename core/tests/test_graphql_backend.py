@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from graphql.language.parser import parse
+from graphql.validation import validate
+
+from core.graphql_backend import CachedDocumentBackend
+from core.schema import schema
+
+QUERY = "query { productList { id } }"
+
+
+class CachedDocumentBackendTestCase(SimpleTestCase):
+    """ parsed and validated documents LRU """
+
+    def setUp(self):
+        self.backend = CachedDocumentBackend(max_size=2)
+
+    def document(self, query):
+        return self.backend.document_from_string(schema, query)
+
+    def test_parse_and_validate_once(self):
+        """ same query should be parsed and validated once """
+        with mock.patch(
+            "core.graphql_backend.parse", wraps=parse
+        ) as mock_parse, mock.patch(
+            "core.graphql_backend.validate", wraps=validate
+        ) as mock_validate:
+            first = self.document(QUERY)
+            second = self.document(QUERY)
+
+        self.assertIs(first, second)
+        mock_parse.assert_called_once()
+        mock_validate.assert_called_once()
+
+    def test_invalid_document(self):
+        """ validation errors should be returned on execute """
+        result = self.document("query { missingField }").execute()
+
+        self.assertTrue(result.invalid)
+        self.assertIn("missingField", result.errors[0].message)
+
+    def test_lru(self):
+        """ should evict least recently used document """
+        first = self.document(QUERY)
+        self.document("query { productList { name } }")
+        self.document(QUERY)
+        self.document("query { productList { description } }")
+
+        self.assertIs(self.document(QUERY), first)
+        self.assertEqual(len(self.backend.documents), 2)
+        self.assertNotIn(
+            "query { productList { name } }",
+            [
+                document.document_string
+                for document in self.backend.documents.values()
+            ],
+        )
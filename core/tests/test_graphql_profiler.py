@@ -0,0 +1,101 @@
+import json
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+
+from auction.models import Client, Product
+from auction.tests.fixtures import product_params
+from core.graphql_profiler import OperationProfile, profile_operation
+
+PRODUCT_LIST = """
+query Products { productList { id name seller { id } } }
+"""
+
+
+class OperationProfileTestCase(TestCase):
+    """ operation profile """
+
+    def test_queries(self):
+        """ should count queries of operation and drop profile after it """
+
+        class Context:
+            pass
+
+        context = Context()
+
+        with profile_operation(context, "Products") as profile:
+            self.assertIs(context.graphql_profile, profile)
+            Client.objects.count()
+            Client.objects.count()
+
+        self.assertIsNone(context.graphql_profile)
+        self.assertEqual(profile.queries, 2)
+        self.assertGreater(profile.db_time, 0)
+        self.assertGreaterEqual(profile.duration, profile.db_time)
+
+    @override_settings(GRAPHQL_SLOW_QUERY_MS=0)
+    def test_slow_query(self):
+        """ should log queries slower than GRAPHQL_SLOW_QUERY_MS """
+        with self.assertLogs("core.graphql_profiler", "WARNING") as logs:
+            with profile_operation(None, "Products"):
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+
+        self.assertIn("slow query", logs.output[0])
+        self.assertIn("in Products: SELECT 1", logs.output[0])
+
+    @override_settings(GRAPHQL_PROFILE_FIELDS=1)
+    def test_as_extension(self):
+        """ should keep only slowest fields """
+        profile = OperationProfile("Products")
+        profile.add_field("ProductType.id", 0.001, 0)
+        profile.add_field("Query.productList", 0.002, 1)
+        profile.add_field("Query.productList", 0.002, 1)
+
+        self.assertEqual(
+            profile.as_extension()["fields"],
+            [
+                {
+                    "field": "Query.productList",
+                    "calls": 2,
+                    "durationMs": 4.0,
+                    "queries": 2,
+                }
+            ],
+        )
+
+
+class ProfilerViewTestCase(GraphQLTestCase):
+    """ operation profile in GraphQL view """
+
+    def setUp(self):
+        for index in range(3):
+            seller = Client.objects.create_user(f"seller{index}@test.ru", "pw")
+            Product.objects.create(seller=seller, **product_params)
+
+    @override_settings(DEBUG=True)
+    def test_profile_extension(self):
+        """ should return resolver timings and queries in debug mode """
+        response = self.query(PRODUCT_LIST)
+
+        self.assertResponseNoErrors(response)
+        profile = json.loads(response.content)["extensions"]["profile"]
+        fields = {field["field"]: field for field in profile["fields"]}
+
+        self.assertEqual(profile["operation"], "Products")
+        self.assertEqual(fields["Query.productList"]["queries"], 1)
+        # продавцы грузятся пачкой DataLoader вне резолверов
+        self.assertEqual(fields["ProductType.seller"]["queries"], 0)
+        self.assertGreater(profile["queries"], 1)
+        self.assertEqual(fields["ProductType.seller"]["calls"], 3)
+        self.assertEqual(fields["ClientType.id"]["calls"], 3)
+
+    def test_profile_log(self):
+        """ should log profile and hide it from response without debug """
+        with self.assertLogs("core.graphql_profiler", "INFO") as logs:
+            response = self.query(PRODUCT_LIST)
+
+        self.assertNotIn("profile", json.loads(response.content)["extensions"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["graphql_profile"]["operation"], "Products")
@@ -0,0 +1,227 @@
+import json
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import TestCase, override_settings
+
+from auction.models import Client, Product
+from auction.pubsub import EVENT_CLOSED, EVENT_PRICE, PubSubFactory
+from auction.tests.fixtures import email_seller, password_seller, product_params
+from core.graphql_ws import (
+    GRAPHQL_WS,
+    GraphQLWebSocketApplication,
+    GraphQLWebSocketConnection,
+)
+from core.schema import schema
+
+PRICE_SUBSCRIPTION = """
+subscription priceUpdated($productId: ID!) {
+    priceUpdated(productId: $productId) {
+        productId
+        price
+    }
+}
+"""
+
+
+@override_settings(AUCTION_PUBSUB="memory")
+class GraphQLWebSocketTestCase(TestCase):
+    """ graphql-ws subscriptions """
+
+    def setUp(self):
+        seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(seller=seller, **product_params)
+
+        # как тестовый клиент django: соединение теста живет в транзакции
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def connect(self, subprotocols=(GRAPHQL_WS,)):
+        return ApplicationCommunicator(
+            GraphQLWebSocketApplication(schema),
+            {
+                "type": "websocket",
+                "path": "/graphql/",
+                "subprotocols": list(subprotocols),
+            },
+        )
+
+    async def send(self, communicator, message):
+        await communicator.send_input(
+            {"type": "websocket.receive", "text": json.dumps(message)}
+        )
+
+    async def receive(self, communicator):
+        output = await communicator.receive_output(timeout=1)
+        self.assertEqual(output["type"], "websocket.send")
+        return json.loads(output["text"])
+
+    async def init(self, communicator):
+        await communicator.send_input({"type": "websocket.connect"})
+        output = await communicator.receive_output(timeout=1)
+        self.assertEqual(
+            output, {"type": "websocket.accept", "subprotocol": GRAPHQL_WS}
+        )
+
+        await self.send(communicator, {"type": "connection_init"})
+        self.assertEqual(
+            await self.receive(communicator), {"type": "connection_ack"}
+        )
+
+    def publish(self, event):
+        PubSubFactory.get_pubsub().publish(
+            {"product_id": self.product.id, **event}
+        )
+
+    def test_price_updated(self):
+        """ should push price updates until lot closes """
+
+        async def run():
+            communicator = self.connect()
+            await self.init(communicator)
+
+            await self.send(
+                communicator,
+                {
+                    "type": "start",
+                    "id": "1",
+                    "payload": {
+                        "query": PRICE_SUBSCRIPTION,
+                        "variables": {"productId": self.product.id},
+                    },
+                },
+            )
+            await communicator.receive_nothing()
+
+            self.publish({"type": EVENT_PRICE, "price": "15.00"})
+            self.assertEqual(
+                await self.receive(communicator),
+                {
+                    "type": "data",
+                    "id": "1",
+                    "payload": {
+                        "data": {
+                            "priceUpdated": {
+                                "productId": str(self.product.id),
+                                "price": "15.00",
+                            }
+                        }
+                    },
+                },
+            )
+
+            self.publish({"type": EVENT_CLOSED, "status": "sold"})
+            self.assertEqual(
+                await self.receive(communicator),
+                {"type": "complete", "id": "1"},
+            )
+            self.assertEqual(dict(PubSubFactory.get_pubsub().listeners), {})
+
+            await communicator.send_input({"type": "websocket.disconnect"})
+            await communicator.wait(timeout=1)
+
+        async_to_sync(run)()
+
+    def test_stop(self):
+        """ stop should remove listener """
+
+        async def run():
+            communicator = self.connect()
+            await self.init(communicator)
+
+            await self.send(
+                communicator,
+                {
+                    "type": "start",
+                    "id": "1",
+                    "payload": {
+                        "query": PRICE_SUBSCRIPTION,
+                        "variables": {"productId": self.product.id},
+                    },
+                },
+            )
+            await communicator.receive_nothing()
+            self.assertIn(self.product.id, PubSubFactory.get_pubsub().listeners)
+
+            await self.send(communicator, {"type": "stop", "id": "1"})
+            self.assertEqual(
+                await self.receive(communicator),
+                {"type": "complete", "id": "1"},
+            )
+            self.assertNotIn(
+                self.product.id, PubSubFactory.get_pubsub().listeners
+            )
+
+            await communicator.send_input({"type": "websocket.disconnect"})
+            await communicator.wait(timeout=1)
+
+        async_to_sync(run)()
+
+    def test_product_not_found(self):
+        """ should return error for unknown product """
+
+        async def run():
+            communicator = self.connect()
+            await self.init(communicator)
+
+            await self.send(
+                communicator,
+                {
+                    "type": "start",
+                    "id": "1",
+                    "payload": {
+                        "query": PRICE_SUBSCRIPTION,
+                        "variables": {"productId": self.product.id + 1000},
+                    },
+                },
+            )
+            data = await self.receive(communicator)
+            self.assertEqual(data["type"], "data")
+            self.assertEqual(
+                data["payload"]["errors"][0]["message"], "Product not found"
+            )
+            self.assertEqual(
+                await self.receive(communicator),
+                {"type": "complete", "id": "1"},
+            )
+
+            await communicator.send_input({"type": "websocket.disconnect"})
+            await communicator.wait(timeout=1)
+
+        async_to_sync(run)()
+
+    def test_execute_request_signals(self):
+        """ subscription query should run inside django request signals """
+        started, finished = mock.Mock(), mock.Mock()
+        request_started.connect(started)
+        request_finished.connect(finished)
+        self.addCleanup(request_started.disconnect, started)
+        self.addCleanup(request_finished.disconnect, finished)
+        connection = GraphQLWebSocketConnection(
+            schema, {"type": "websocket"}, mock.Mock(), mock.Mock()
+        )
+
+        connection.execute(
+            {
+                "query": PRICE_SUBSCRIPTION,
+                "variables": {"productId": self.product.id},
+            }
+        )
+
+        started.assert_called_once()
+        finished.assert_called_once()
+
+    def test_wrong_subprotocol(self):
+        """ should reject connection without graphql-ws subprotocol """
+
+        async def run():
+            communicator = self.connect(subprotocols=())
+            await communicator.send_input({"type": "websocket.connect"})
+            output = await communicator.receive_output(timeout=1)
+            self.assertEqual(output["type"], "websocket.close")
+
+        async_to_sync(run)()
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from auction.models import Client, Product
+from auction.tasks import refresh_metrics
+from auction.tests.fixtures import product_params
+from core.metrics import CACHED_GAUGES, CachedGauge
+
+
+class CachedGaugeTestCase(TestCase):
+    """ gauges refreshed by periodic task """
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+        def callback():
+            self.calls += 1
+            return 42
+
+        self.gauge = CachedGauge("test_gauge", "Test", callback)
+        self.addCleanup(CACHED_GAUGES.remove, self.gauge)
+
+    def test_collect(self):
+        """ should expose value computed by refresh only """
+        self.assertEqual(list(self.gauge.collect()), [])
+
+        self.gauge.refresh()
+        (metric,) = self.gauge.collect()
+
+        self.assertEqual(metric.samples[0].value, 42.0)
+        self.assertEqual(self.calls, 1)
+
+
+class MetricsViewTestCase(TestCase):
+    """ /metrics endpoint """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_metrics(self):
+        """ should expose registered metrics with active lots """
+        seller = Client.objects.create_user("seller@test.ru", "pw")
+        Product.objects.create(seller=seller, **product_params).activate()
+        refresh_metrics()
+
+        # значение gauge уже в кэше, запросов к базе нет
+        with self.assertNumQueries(0):
+            response = self.client.get("/metrics/")
+        content = response.content.decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn("auction_active_lots 1.0\n", content)
+        self.assertIn("# TYPE auction_bids_total counter", content)
+        self.assertIn("# TYPE celery_task_duration_seconds histogram", content)
+
+    def test_metrics_forbidden(self):
+        """ should allow only listed addresses without token """
+        response = self.client.get("/metrics/", REMOTE_ADDR="10.0.0.1")
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        """ should allow any address with token """
+        response = self.client.get(
+            "/metrics/",
+            REMOTE_ADDR="10.0.0.1",
+            HTTP_AUTHORIZATION="Bearer secret",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(
+            "/metrics/",
+            REMOTE_ADDR="10.0.0.1",
+            HTTP_AUTHORIZATION="Bearer wrong",
+        )
+        self.assertEqual(response.status_code, 403)
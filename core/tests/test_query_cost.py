@@ -0,0 +1,121 @@
+import json
+
+from django.test import SimpleTestCase, override_settings
+from graphene_django.utils.testing import GraphQLTestCase
+from graphql.language.parser import parse
+
+from core.errors import CodeError
+from core.query_cost import QueryCost, get_query_cost
+from core.schema import schema
+
+CONNECTION_QUERY = """
+query Products($first: Int = 5) {
+    productListConnection(first: $first) {
+        totalCount
+        edges { node { id } }
+    }
+}
+"""
+
+
+class QueryCostTestCase(SimpleTestCase):
+    """ static query cost analysis """
+
+    def cost(self, query, **kwargs):
+        return get_query_cost(schema, parse(query), **kwargs)
+
+    def test_list_default_size(self):
+        """ should count list without page size by default size """
+        self.assertEqual(
+            self.cost("query { productList { id seller { id } } }"),
+            QueryCost(cost=11, depth=3),
+        )
+
+    def test_page_size(self):
+        """ should multiply list children by pageSize """
+        self.assertEqual(
+            self.cost("query { productList(pageSize: 20) { seller { id } } }"),
+            QueryCost(cost=21, depth=3),
+        )
+
+    def test_connection_variables(self):
+        """ should take first from variables and its default for edges """
+        self.assertEqual(self.cost(CONNECTION_QUERY), QueryCost(12, 4))
+        self.assertEqual(
+            self.cost(CONNECTION_QUERY, variables={"first": 50}),
+            QueryCost(57, 4),
+        )
+
+    def test_fragments(self):
+        """ should count fields of fragments """
+        query = """
+        query { product(id: 1) { ...Seller ... on ProductType { id } } }
+        fragment Seller on ProductType { seller { id } }
+        """
+
+        self.assertEqual(self.cost(query), QueryCost(2, 3))
+
+    def test_introspection(self):
+        """ introspection fields should be free """
+        self.assertEqual(
+            self.cost("query { __schema { types { name } } }"), QueryCost(0, 0)
+        )
+
+    def test_operation_name(self):
+        """ should count only selected operation """
+        query = (
+            "query A { productList { id } } query B { product(id: 1) { id } }"
+        )
+
+        self.assertEqual(self.cost(query, operation_name="B"), QueryCost(1, 2))
+        self.assertEqual(self.cost(query), QueryCost(0, 0))
+
+
+class QueryCostViewTestCase(GraphQLTestCase):
+    """ query budget in GraphQL view """
+
+    def post(self, query, variables=None):
+        return self.client.post(
+            self.GRAPHQL_URL,
+            json.dumps({"query": query, "variables": variables}),
+            content_type="application/json",
+        )
+
+    def test_cost_extension(self):
+        """ should return computed cost in extensions """
+        response = self.post(CONNECTION_QUERY, {"first": 50})
+
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["extensions"]["cost"],
+            {
+                "requested": 57,
+                "maximum": 1000,
+                "depth": 4,
+                "maximumDepth": 10,
+            },
+        )
+
+    @override_settings(GRAPHQL_MAX_COST=50)
+    def test_too_complex(self):
+        """ should reject query over cost budget before execution """
+        response = self.post(CONNECTION_QUERY, {"first": 50})
+        content = json.loads(response.content)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("data", content)
+        self.assertEqual(
+            content["errors"][0]["extensions"]["code"],
+            CodeError.QUERY_TOO_COMPLEX.code,
+        )
+        self.assertEqual(content["extensions"]["cost"]["requested"], 57)
+
+    @override_settings(GRAPHQL_MAX_DEPTH=3)
+    def test_too_deep(self):
+        """ should reject query over depth limit """
+        response = self.post(CONNECTION_QUERY)
+
+        self.assertEqual(
+            json.loads(response.content)["errors"][0]["extensions"]["code"],
+            CodeError.QUERY_TOO_DEEP.code,
+        )
@@ -0,0 +1,90 @@
+import json
+
+from django.core.cache import cache
+from graphene_django.utils.testing import GraphQLTestCase
+
+from auction.models import Client, Product
+from auction.tests.fixtures import email_seller, password_seller, product_params
+from core.errors import CodeError
+from core.graphql_backend import query_hash
+from core.views import PersistedGraphQLView, graphql_backend
+
+QUERY = "query { productList { id } }"
+
+
+class PersistedQueriesTestCase(GraphQLTestCase):
+    """ automatic persisted queries """
+
+    def setUp(self):
+        cache.clear()
+        seller = Client.objects.create_user(email_seller, password_seller)
+        self.product = Product.objects.create(seller=seller, **product_params)
+
+    def post(self, body):
+        return self.client.post(
+            self.GRAPHQL_URL,
+            json.dumps(body),
+            content_type="application/json",
+        )
+
+    def persisted(self, sha256_hash):
+        return {"persistedQuery": {"version": 1, "sha256Hash": sha256_hash}}
+
+    def test_register_and_run_by_hash(self):
+        """ should run query by hash after registration """
+        response = self.post({"extensions": self.persisted(query_hash(QUERY))})
+        content = json.loads(response.content)
+        self.assertEqual(
+            content["errors"][0]["extensions"]["code"],
+            CodeError.PERSISTED_QUERY_NOT_FOUND.code,
+        )
+
+        response = self.post(
+            {"query": QUERY, "extensions": self.persisted(query_hash(QUERY))}
+        )
+        self.assertResponseNoErrors(response)
+
+        response = self.post({"extensions": self.persisted(query_hash(QUERY))})
+        self.assertResponseNoErrors(response)
+        self.assertEqual(
+            json.loads(response.content)["data"]["productList"],
+            [{"id": str(self.product.id)}],
+        )
+
+    def test_get_by_hash(self):
+        """ should accept extensions in GET params """
+        self.post(
+            {"query": QUERY, "extensions": self.persisted(query_hash(QUERY))}
+        )
+
+        response = self.client.get(
+            self.GRAPHQL_URL,
+            {"extensions": json.dumps(self.persisted(query_hash(QUERY)))},
+            HTTP_ACCEPT="application/json",
+        )
+
+        self.assertResponseNoErrors(response)
+
+    def test_hash_mismatch(self):
+        """ should not register query under wrong hash """
+        response = self.post(
+            {"query": QUERY, "extensions": self.persisted("0" * 64)}
+        )
+        content = json.loads(response.content)
+
+        self.assertEqual(
+            content["errors"][0]["extensions"]["code"],
+            CodeError.PERSISTED_QUERY_HASH_MISMATCH.code,
+        )
+
+    def test_plain_query(self):
+        """ should run queries without extensions as before """
+        response = self.post({"query": QUERY})
+
+        self.assertResponseNoErrors(response)
+
+    def test_cached_backend(self):
+        """ view should execute queries with cached documents backend """
+        self.assertIs(
+            PersistedGraphQLView().get_backend(request=None), graphql_backend
+        )
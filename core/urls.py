@@ -1,10 +1,15 @@
 from django.contrib import admin
 from django.urls import include, path
 from django.views.decorators.csrf import csrf_exempt
-from graphene_django.views import GraphQLView
+
+from auction.sse import product_events
+from core.metrics import metrics
+from core.views import PersistedGraphQLView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("health/", include("auction.urls")),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("metrics/", metrics, name="metrics"),
+    path("events/", product_events, name="product_events"),
+    path("graphql/", csrf_exempt(PersistedGraphQLView.as_view(graphiql=True))),
 ]
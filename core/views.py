@@ -0,0 +1,123 @@
+"""
+GraphQL endpoint с persisted queries (протокол Apollo APQ)
+
+Клиент шлет sha256 запроса в extensions.persistedQuery.sha256Hash,
+текст запроса - только если сервер его еще не знает
+(ошибка PERSISTED_QUERY_NOT_FOUND). Реестр hash -> текст живет в кэше
+Django, разобранные документы - в LRU CachedDocumentBackend.
+"""
+import json
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+from graphene_django.views import GraphQLView
+from graphql.execution import ExecutionResult
+
+from core.errors import CodeError, GenericException
+from core.graphql_backend import CachedDocumentBackend, query_hash
+
+PERSISTED_QUERY_PREFIX: str = "graphql:persisted"
+
+graphql_backend = CachedDocumentBackend(
+    max_size=settings.GRAPHQL_DOCUMENT_CACHE_SIZE
+)
+
+
+def persisted_query_key(sha256_hash: str) -> str:
+    return f"{PERSISTED_QUERY_PREFIX}:{sha256_hash}"
+
+
+def get_persisted_query_hash(
+    request: HttpRequest, data: Dict[str, Any]
+) -> Optional[str]:
+    """ hash из extensions тела запроса или GET параметра """
+    extensions: Any = data.get("extensions") or request.GET.get("extensions")
+
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            return None
+
+    if not isinstance(extensions, dict):
+        return None
+
+    persisted_query: Any = extensions.get("persistedQuery")
+
+    if not isinstance(persisted_query, dict):
+        return None
+
+    sha256_hash: Any = persisted_query.get("sha256Hash")
+
+    return sha256_hash if isinstance(sha256_hash, str) else None
+
+
+def resolve_persisted_query(
+    query: Optional[str], sha256_hash: Optional[str]
+) -> Optional[str]:
+    """
+    текст запроса по hash, новый запрос с hash запоминаем
+    """
+    if sha256_hash is None:
+        return query
+
+    if query is None:
+        query = cache.get(persisted_query_key(sha256_hash))
+
+        if query is None:
+            raise CodeError.PERSISTED_QUERY_NOT_FOUND.exception
+
+        return query
+
+    if query_hash(query) != sha256_hash:
+        raise CodeError.PERSISTED_QUERY_HASH_MISMATCH.exception
+
+    cache.set(
+        persisted_query_key(sha256_hash),
+        query,
+        timeout=settings.GRAPHQL_PERSISTED_QUERY_TIMEOUT,
+    )
+    return query
+
+
+class PersistedGraphQLView(GraphQLView):
+    """ GraphQLView с persisted queries, кэшем документов и extensions """
+
+    # extensions последнего результата, ответ кодируется сразу после него
+    extensions: Optional[Dict[str, Any]] = None
+
+    def get_backend(self, request):
+        # GraphQLView.__init__ подставляет backend по умолчанию
+        return graphql_backend
+
+    def execute_graphql_request(
+        self,
+        request,
+        data,
+        query,
+        variables,
+        operation_name,
+        show_graphiql=False,
+    ):
+        try:
+            query = resolve_persisted_query(
+                query, get_persisted_query_hash(request, data)
+            )
+        except GenericException as e:
+            return ExecutionResult(errors=[e], invalid=True)
+
+        result = super().execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        self.extensions = getattr(result, "extensions", None)
+
+        return result
+
+    def json_encode(self, request, d, pretty=False):
+        if self.extensions and isinstance(d, dict) and "extensions" not in d:
+            d = {**d, "extensions": self.extensions}
+            self.extensions = None
+
+        return super().json_encode(request, d, pretty)